@@ -1,5 +1,8 @@
 const Exam = require('../models/Exam');
 const { USER_ROLES } = require('../config/constants');
+const { syncCourseCalendarsForCourse } = require('../services/ai-integration.service');
+
+const logCalendarSyncError = (error) => console.error('Course calendar sync failed:', error.message);
 
 // @desc    Get all exams
 // @route   GET /api/exams
@@ -108,6 +111,9 @@ const createExam = async (req, res) => {
       createdBy: req.user.id
     });
 
+    // Not awaited: the AI service's course calendars follow exam changes in the background
+    syncCourseCalendarsForCourse(exam.course).catch(logCalendarSyncError);
+
     res.status(201).json({
       success: true,
       message: 'Exam created successfully',
@@ -181,6 +187,11 @@ const updateExam = async (req, res) => {
       { new: true, runValidators: true }
     );
 
+    syncCourseCalendarsForCourse(updatedExam.course).catch(logCalendarSyncError);
+    if (exam.course !== updatedExam.course) {
+      syncCourseCalendarsForCourse(exam.course).catch(logCalendarSyncError);
+    }
+
     res.json({
       success: true,
       message: 'Exam updated successfully',
@@ -210,6 +221,7 @@ const deleteExam = async (req, res) => {
 
     // Soft delete
     await Exam.findByIdAndUpdate(req.params.id, { isActive: false });
+    syncCourseCalendarsForCourse(exam.course).catch(logCalendarSyncError);
 
     res.json({
       success: true,
@@ -2,6 +2,9 @@ const Syllabus = require("../models/Syllabus");
 const Course = require("../models/Course");
 const User = require("../models/User");
 const { USER_ROLES } = require("../config/constants");
+const { syncCourseCalendar } = require("../services/ai-integration.service");
+
+const logCalendarSyncError = (error) => console.error("Course calendar sync failed:", error.message);
 
 // @desc    Get all syllabuses (role-based filtering)
 // @route   GET /api/syllabus
@@ -84,6 +87,9 @@ const createSyllabus = async (req, res) => {
       academicYear: new Date().getFullYear().toString(),
     });
 
+    // Not awaited: the AI service's course calendar carries the department's syllabus focus
+    syncCourseCalendar(syllabus.department).catch(logCalendarSyncError);
+
     const populatedSyllabus = await Syllabus.findById(syllabus._id)
       .populate("subject", "courseName courseCode department")
       .populate("createdBy", "name email");
@@ -205,6 +211,8 @@ const updateSyllabus = async (req, res) => {
       .populate("subject", "courseName courseCode department")
       .populate("createdBy", "name email");
 
+    syncCourseCalendar(updatedSyllabus.department).catch(logCalendarSyncError);
+
     res.json({
       success: true,
       data: updatedSyllabus,
@@ -248,6 +256,7 @@ const deleteSyllabus = async (req, res) => {
 
     // Soft delete
     await Syllabus.findByIdAndUpdate(req.params.id, { isActive: false });
+    syncCourseCalendar(syllabus.department).catch(logCalendarSyncError);
 
     res.json({
       success: true,
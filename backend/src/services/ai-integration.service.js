@@ -25,6 +25,74 @@ const Exam = require("../models/Exam");
 const Syllabus = require("../models/Syllabus");
 const Course = require("../models/Course");
 
+// Last suggestions response (and its ETag) per student, for conditional requests
+const SUGGESTION_RESPONSE_LIMIT = 1000;
+const suggestionResponses = new Map();
+
+// Course ids (exam course names) in each department's calendar as last registered by this process,
+// with the time of that sync. Other replicas (or an AI service restart) can change the registered
+// calendar meanwhile, so entries are only trusted for CALENDAR_SYNC_TTL_MS before syncing again.
+const CALENDAR_SYNC_TTL_MS = 5 * 60 * 1000;
+const registeredCalendars = new Map();
+
+// Register a department's upcoming exams and syllabus focus with the AI service, so suggestion
+// payloads for its students can send course_ids instead of upcoming_exams and syllabus_focus_areas.
+// Call after exams or syllabi of the department change; failures are logged, and the department's
+// students send full exam lists until the next successful sync.
+exports.syncCourseCalendar = async (department) => {
+  try {
+    const departmentCourses = await Course.find({ department, isActive: true });
+    const names = new Set();
+    for (const course of departmentCourses) {
+      names.add(course.courseName);
+      names.add(course.courseCode);
+    }
+    const exams = await Exam.find({
+      course: { $in: [...names] },
+      isActive: true,
+      date: { $gte: new Date() },
+    });
+
+    const byCourse = new Map();
+    for (const exam of exams) {
+      if (!byCourse.has(exam.course)) byCourse.set(exam.course, []);
+      // Full start time, so the AI service counts days remaining exactly as getSuggestions does
+      byCourse.get(exam.course).push({ date: new Date(exam.date).toISOString(), total_marks: exam.totalMarks });
+    }
+    const courses = [];
+    for (const [course, courseExams] of byCourse) {
+      const syllabus = await Syllabus.findOne({ course, isActive: true });
+      courses.push({
+        course_id: course,
+        course,
+        exams: courseExams,
+        topics: syllabus && syllabus.topics ? syllabus.topics.map(t => t.title) : [],
+        content_summary: syllabus ? (syllabus.description || "Review all units.") : null,
+      });
+    }
+
+    await exports.registerCourseCalendar(department, courses);
+    registeredCalendars.set(department, { courses: new Set(byCourse.keys()), syncedAt: Date.now() });
+    return true;
+  } catch (error) {
+    console.error(`Error syncing course calendar for ${department}:`, error.message);
+    registeredCalendars.delete(department);
+    return false;
+  }
+};
+
+// Re-sync the calendars of every department offering this course (by name or code)
+exports.syncCourseCalendarsForCourse = async (course) => {
+  try {
+    const departments = await Course.distinct("department", {
+      $or: [{ courseName: course }, { courseCode: course }],
+    });
+    await Promise.all(departments.map(department => exports.syncCourseCalendar(department)));
+  } catch (error) {
+    console.error(`Error syncing course calendars for ${course}:`, error.message);
+  }
+};
+
 exports.getSuggestions = async (studentId) => {
   try {
     // 1. Fetch Student Data
@@ -38,6 +106,16 @@ exports.getSuggestions = async (studentId) => {
         isActive: true 
     }).populate('exam');
 
+    const department = student.department || "General";
+    const calendar = registeredCalendars.get(department);
+    if (!calendar || Date.now() - calendar.syncedAt > CALENDAR_SYNC_TTL_MS) {
+      await exports.syncCourseCalendar(department);
+    }
+    const registered = registeredCalendars.has(department)
+      ? registeredCalendars.get(department).courses
+      : new Set();
+
+    const courseIds = [];
     const upcomingExams = [];
     const syllabusFocusAreas = [];
     const today = new Date();
@@ -47,6 +125,12 @@ exports.getSuggestions = async (studentId) => {
         
         const examDate = new Date(ticket.exam.date);
         if (examDate >= today) {
+             // The AI service resolves registered courses from the department calendar
+             if (registered.has(ticket.exam.course)) {
+                 courseIds.push(ticket.exam.course);
+                 continue;
+             }
+
              const diffTime = Math.abs(examDate - today);
              const daysRemaining = Math.ceil(diffTime / (1000 * 60 * 60 * 24)); 
              
@@ -77,8 +161,9 @@ exports.getSuggestions = async (studentId) => {
     // Prepare payload for Python AI
     const payload = {
         student_id: studentId,
-        department: student.department || "General",
+        department,
         current_semester: student.semester || 1,
+        course_ids: courseIds,
         upcoming_exams: upcomingExams,
         syllabus_focus_areas: syllabusFocusAreas,
         // Mocking grades/attendance for now as they might be in a separate collection or not fully implemented
@@ -86,11 +171,38 @@ exports.getSuggestions = async (studentId) => {
         attendance: 85 // Default good attendance
     };
 
-    // TODO: Integrate with Python AI service
-    const response = await axios.post(
+    // Revalidate the last response for this student: the AI service answers
+    // 304 Not Modified when the suggestions would be unchanged
+    const key = String(studentId);
+    const previous = suggestionResponses.get(key);
+    const request = () => axios.post(
       `${process.env.AI_SERVICE_URL}/api/get-suggestions`,
-      payload
+      payload,
+      {
+        headers: previous ? { "If-None-Match": previous.etag } : {},
+        validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+      }
     );
+    let response;
+    try {
+      response = await request();
+    } catch (error) {
+      // 404: the AI service lost the department's calendar (e.g. restarted); register it again and retry once
+      if (!(error.response && error.response.status === 404 && courseIds.length)) throw error;
+      await exports.syncCourseCalendar(department);
+      response = await request();
+    }
+    if (response.status === 304 && previous) {
+      return previous.data;
+    }
+    if (response.headers.etag) {
+      suggestionResponses.delete(key);
+      suggestionResponses.set(key, { etag: response.headers.etag, data: response.data });
+      if (suggestionResponses.size > SUGGESTION_RESPONSE_LIMIT) {
+        // Maps iterate in insertion order, so this drops the least recently stored entry
+        suggestionResponses.delete(suggestionResponses.keys().next().value);
+      }
+    }
     return response.data;
   } catch (error) {
     console.error("Error getting suggestions:", error.message);
@@ -102,6 +214,18 @@ exports.getSuggestions = async (studentId) => {
   }
 };
 
+// Register a department's exam calendar and syllabus focus with the AI service, e.g. after
+// exams are scheduled. courses: [{ course_id, course, exams: [{ date: ISO date-time, total_marks }],
+// topics: [String], content_summary }]. Suggestion payloads for the department can then send
+// course_ids instead of upcoming_exams and syllabus_focus_areas.
+exports.registerCourseCalendar = async (department, courses) => {
+  const response = await axios.post(
+    `${process.env.AI_SERVICE_URL}/api/course-calendar`,
+    { department, courses }
+  );
+  return response.data.data;
+};
+
 exports.simpleMindMapGeneration = (text) => {
   // Simple implementation: split text into topics
   const lines = text.split("\n").filter((line) => line.trim().length > 0);
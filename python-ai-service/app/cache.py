@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+_INLINE_WHITESPACE = re.compile(r'[ \t\f\v]+')
+
+
+def normalize_syllabus(text: str) -> str:
+    """Normalize whitespace without losing the line structure topic extraction relies on"""
+    lines = (_INLINE_WHITESPACE.sub(' ', line).strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+def mindmap_cache_key(syllabus_text: str, days_remaining: Optional[int] = None) -> str:
+    """Content address of a mindmap request"""
+    digest = hashlib.sha256()
+    digest.update(f"{days_remaining}\n".encode('utf-8'))
+    # Same bytes as hashing normalize_syllabus(syllabus_text), without building the normalized copy
+    separator = b''
+    for line in syllabus_text.splitlines():
+        line = _INLINE_WHITESPACE.sub(' ', line).strip()
+        if line:
+            digest.update(separator)
+            digest.update(line.encode('utf-8'))
+            separator = b'\n'
+    return digest.hexdigest()
+
+
+class CacheStore(ABC):
+    """Interface for a second-tier cache store"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Remove key; returns whether it was present"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class LRUCache(CacheStore):
+    """Thread-safe in-process LRU cache with a per-entry TTL"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'entries': len(self._entries), 'max_entries': self.max_entries, 'ttl': self.ttl}
+
+
+class SQLiteCacheStore(CacheStore):
+    """Local SQLite-backed store for JSON-serializable results, shared across restarts and worker processes
+
+    The connection is opened lazily in each process: a store created before
+    a pre-fork server forks its workers never shares a connection with them.
+    """
+
+    def __init__(self, path: str, ttl: float = 86400.0):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Called with self._lock held
+        if self._conn is None or self._pid != os.getpid():
+            # timeout: wait for other workers' write transactions instead of failing with "database is locked"
+            self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)')
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT value FROM cache WHERE key = ? AND expires_at >= ?', (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO cache (key, expires_at, value) VALUES (?, ?, ?)',
+                (key, time.time() + self.ttl, json.dumps(value))
+            )
+            conn.commit()
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def purge_expired(self, max_rows: int = 0) -> int:
+        """Delete expired rows, then the rows expiring soonest beyond max_rows (0: no cap); returns how many
+
+        The cap applies to the whole file, which every store configured with
+        the same path shares.
+        """
+        with self._lock:
+            conn = self._connection()
+            removed = conn.execute('DELETE FROM cache WHERE expires_at < ?', (time.time(),)).rowcount
+            if max_rows:
+                excess = conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0] - max_rows
+                if excess > 0:
+                    removed += conn.execute(
+                        'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires_at LIMIT ?)',
+                        (excess,)
+                    ).rowcount
+            conn.commit()
+            return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._connection().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        return {'backend': 'sqlite', 'path': self.path, 'entries': entries, 'ttl': self.ttl}
+
+
+class ResultCache:
+    """Two-tier result cache: in-process LRU in front of an optional pluggable store
+
+    get() and set() block on the store's I/O; coroutines use get_async()
+    and set_async(), which run that I/O on a worker thread.
+    """
+
+    def __init__(self, memory: LRUCache, backend: Optional[CacheStore] = None):
+        self.memory = memory
+        self.backend = backend
+        # Counters are updated from the event loop and from executor threads
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.backend_hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.memory.get(key)
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+        if self.backend is not None:
+            value = self.backend.get(key)
+            if value is not None:
+                # Promote to the memory tier for the next request
+                self.memory.set(key, value)
+                with self._lock:
+                    self.hits += 1
+                    self.backend_hits += 1
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.backend is not None:
+            self.backend.set(key, value)
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """get() without blocking the event loop on the store"""
+        if self.backend is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def set_async(self, key: str, value: Any) -> None:
+        """set() without blocking the event loop on the store"""
+        if self.backend is None:
+            self.set(key, value)
+        else:
+            await asyncio.to_thread(self.set, key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits, backend_hits, misses = self.hits, self.backend_hits, self.misses
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'backend_hits': backend_hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'memory': self.memory.stats(),
+            'backend': self.backend.stats() if self.backend is not None else None
+        }
+
+
+def create_cache_store(max_entries: int, ttl: float, backend: str = '', path: str = '') -> CacheStore:
+    """A single-tier store: SQLite when configured (shared by every worker), else an in-process LRU"""
+    if backend == 'sqlite':
+        return SQLiteCacheStore(path, ttl=ttl)
+    if backend:
+        raise ValueError(f"Unknown cache backend: {backend}")
+    return LRUCache(max_entries, ttl)
+
+
+def create_result_cache(max_entries: int, ttl: float, backend: str = '', path: str = '') -> ResultCache:
+    """Build a ResultCache from configuration values"""
+    store = None
+    if backend == 'sqlite':
+        store = SQLiteCacheStore(path, ttl=ttl)
+    elif backend:
+        raise ValueError(f"Unknown cache backend: {backend}")
+    return ResultCache(LRUCache(max_entries, ttl), store)
@@ -0,0 +1,242 @@
+import numbers
+
+import numpy as np
+from typing import Dict, List, Any, Optional, Tuple
+
+# Defaults used by SuggestionEngine._analyze_performance when a student has no data
+DEFAULT_GPA = 7.5
+DEFAULT_ATTENDANCE = 0.0
+DEFAULT_EXAM_SCORE = 75.0
+
+PERFORMANCE_LEVELS = np.array(['excellent', 'good', 'average', 'needs_improvement'])
+
+# Metric columns reported with cohort percentiles and z-scores
+COHORT_METRICS = ('gpa', 'avg_attendance', 'avg_exam_score')
+
+
+def _number(value: Any, field: str) -> float:
+    """value as a float, rejecting what np.mean rejects in _analyze_performance (numeric strings included)"""
+    if not isinstance(value, numbers.Real):
+        raise TypeError(f"{field} must be a number, got {type(value).__name__}")
+    return float(value)
+
+
+def nearest_exams_first(exams: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Upcoming exams sorted by days remaining (stable, undated last), without touching the input list"""
+    return sorted(exams, key=lambda exam: exam.get('days_remaining', 999))
+
+
+def percentile_ranks(values: np.ndarray) -> np.ndarray:
+    """Percentile rank of each value within its cohort (ties share the mid rank)"""
+    if values.size == 0:
+        return values.astype(np.float64)
+    ordered = np.sort(values)
+    below = np.searchsorted(ordered, values, side='left')
+    at_or_below = np.searchsorted(ordered, values, side='right')
+    return (below + at_or_below) * (50.0 / values.size)
+
+
+def z_scores(values: np.ndarray) -> np.ndarray:
+    """Standard scores against the cohort mean; zero when the cohort has no spread"""
+    if values.size == 0:
+        return values.astype(np.float64)
+    std = values.std()
+    if std == 0:
+        return np.zeros_like(values, dtype=np.float64)
+    return (values - values.mean()) / std
+
+
+def _grouped_mean(values: List[float], owners: List[int], size: int, default: float) -> np.ndarray:
+    """Mean of values grouped by owner index, default where an owner has no values"""
+    values = np.asarray(values, dtype=np.float64)
+    owners = np.asarray(owners, dtype=np.intp)
+    sums = np.bincount(owners, weights=values, minlength=size)
+    counts = np.bincount(owners, minlength=size)
+    means = np.full(size, default, dtype=np.float64)
+    np.divide(sums, counts, out=means, where=counts > 0)
+    return means
+
+
+class CohortAnalytics:
+    """Columnar performance analysis for many students at once
+
+    Grades, attendance and exam scores for the whole cohort are flattened
+    into NumPy arrays once; every metric is then a grouped reduction over
+    those arrays instead of a per-student np.mean on a tiny list.
+    """
+
+    def __init__(self, grade_points: Dict[str, float]):
+        self.grade_points = grade_points
+
+    def load(self, students: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Flatten student records into columns, collecting per-student load errors"""
+        grade_values, grade_owners = [], []
+        attendance_values, attendance_owners = [], []
+        exam_values, exam_owners = [], []
+        course_counts = []
+        rows = []  # cohort row -> index in students
+        errors: Dict[int, str] = {}
+
+        for index, student in enumerate(students):
+            try:
+                # Convert into temporaries first so one bad record cannot leave partial columns behind
+                grades = student.get('grades', [])
+                points = [float(self.grade_points.get(grade.get('grade', 'F'), 0)) for grade in grades]
+
+                attendance = student.get('attendance', {})
+                if isinstance(attendance, (int, float)):
+                    present = [float(attendance)]
+                elif isinstance(attendance, dict):
+                    present = [_number(value, 'attendance') for value in attendance.values()]
+                else:
+                    present = []
+
+                scores = [_number(score.get('score', 0), 'exam score') for score in student.get('exam_scores', [])]
+            except Exception as e:
+                errors[index] = f"Invalid student data: {e}"
+                continue
+
+            row = len(rows)
+            rows.append(index)
+            course_counts.append(len(grades))
+            grade_values.extend(points)
+            grade_owners.extend([row] * len(points))
+            attendance_values.extend(present)
+            attendance_owners.extend([row] * len(present))
+            exam_values.extend(scores)
+            exam_owners.extend([row] * len(scores))
+
+        size = len(rows)
+        return {
+            'rows': rows,
+            'errors': errors,
+            'total_courses': np.asarray(course_counts, dtype=np.intp),
+            'gpa': _grouped_mean(grade_values, grade_owners, size, DEFAULT_GPA),
+            'avg_attendance': _grouped_mean(attendance_values, attendance_owners, size, DEFAULT_ATTENDANCE),
+            'avg_exam_score': _grouped_mean(exam_values, exam_owners, size, DEFAULT_EXAM_SCORE)
+        }
+
+    def performance_levels(self, gpa: np.ndarray, attendance: np.ndarray, exam: np.ndarray) -> np.ndarray:
+        """Vectorized version of the performance level thresholds"""
+        choice = np.select(
+            [
+                (gpa >= 8.5) & (attendance >= 85) & (exam >= 85),
+                (gpa >= 7.0) & (attendance >= 75) & (exam >= 70),
+                (gpa >= 5.5) & (attendance >= 65) & (exam >= 60)
+            ],
+            [0, 1, 2],
+            default=3
+        )
+        return PERFORMANCE_LEVELS[choice]
+
+    def analyze(self, students: List[Dict[str, Any]]) -> Tuple[List[Optional[Dict[str, Any]]], Dict[int, str]]:
+        """Performance analysis for every student, in input order
+
+        Each entry matches SuggestionEngine._analyze_performance for that
+        student, or is None if the record could not be loaded; the second
+        value maps those indexes to their error messages.
+        """
+        columns = self.load(students)
+        return self._build_results(students, columns), columns['errors']
+
+    def analyze_cohort(self, students: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Per-student analysis plus cohort percentiles, z-scores and summary statistics"""
+        columns = self.load(students)
+        results = self._build_results(students, columns)
+
+        percentiles = {metric: np.round(percentile_ranks(columns[metric]), 2) for metric in COHORT_METRICS}
+        scores = {metric: np.round(z_scores(columns[metric]), 3) for metric in COHORT_METRICS}
+
+        analysed = []
+        for row, index in enumerate(columns['rows']):
+            entry = results[index]
+            # Exam context is per-student request data, not an analytics result
+            for key in ('days_remaining', 'upcoming_exams', 'syllabus_focus_areas'):
+                entry.pop(key)
+            entry['student_id'] = students[index].get('student_id')
+            entry['percentiles'] = {metric: float(percentiles[metric][row]) for metric in COHORT_METRICS}
+            entry['z_scores'] = {metric: float(scores[metric][row]) for metric in COHORT_METRICS}
+            analysed.append(entry)
+
+        return {
+            'students': analysed,
+            'summary': self.summarize(columns),
+            'errors': [
+                {'index': index, 'student_id': students[index].get('student_id'), 'error': message}
+                for index, message in sorted(columns['errors'].items())
+            ]
+        }
+
+    def summarize(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """Cohort-wide distribution of each metric and of performance levels"""
+        size = len(columns['rows'])
+        summary: Dict[str, Any] = {'students': size}
+        if size == 0:
+            return summary
+
+        for metric in COHORT_METRICS:
+            values = columns[metric]
+            p25, p50, p75, p90 = np.percentile(values, [25, 50, 75, 90])
+            summary[metric] = {
+                'mean': round(float(values.mean()), 2),
+                'std': round(float(values.std()), 2),
+                'min': round(float(values.min()), 2),
+                'max': round(float(values.max()), 2),
+                'p25': round(float(p25), 2),
+                'p50': round(float(p50), 2),
+                'p75': round(float(p75), 2),
+                'p90': round(float(p90), 2)
+            }
+
+        levels = self.performance_levels(columns['gpa'], columns['avg_attendance'], columns['avg_exam_score'])
+        names, counts = np.unique(levels, return_counts=True)
+        summary['performance_levels'] = {str(name): int(count) for name, count in zip(names, counts)}
+        return summary
+
+    def _build_results(self, students: List[Dict[str, Any]], columns: Dict[str, Any]) -> List[Optional[Dict[str, Any]]]:
+        """Turn loaded columns into per-student analysis dicts, in input order"""
+        gpa = columns['gpa']
+        attendance = columns['avg_attendance']
+        exam = columns['avg_exam_score']
+        levels = self.performance_levels(gpa, attendance, exam)
+
+        # Strength and weakness flags for the whole cohort at once
+        strong_gpa, weak_gpa = gpa >= 8.0, gpa < 6.0
+        strong_attendance, weak_attendance = attendance >= 85, attendance < 70
+        strong_exam, weak_exam = exam >= 80, exam < 60
+
+        gpa_rounded = np.round(gpa, 2)
+        attendance_rounded = np.round(attendance, 2)
+        exam_rounded = np.round(exam, 2)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(students)
+        for row, index in enumerate(columns['rows']):
+            student = students[index]
+            strengths = []
+            weaknesses = []
+            if strong_gpa[row]:
+                strengths.append('Strong academic performance')
+            elif weak_gpa[row]:
+                weaknesses.append('Academic performance needs improvement')
+            if strong_attendance[row]:
+                strengths.append('Excellent attendance record')
+            elif weak_attendance[row]:
+                weaknesses.append('Poor attendance affecting performance')
+            if strong_exam[row]:
+                strengths.append('Good exam performance')
+            elif weak_exam[row]:
+                weaknesses.append('Exam scores need improvement')
+
+            results[index] = {
+                'gpa': float(gpa_rounded[row]),
+                'avg_attendance': float(attendance_rounded[row]),
+                'avg_exam_score': float(exam_rounded[row]),
+                'performance_level': str(levels[row]),
+                'strengths': strengths,
+                'weaknesses': weaknesses,
+                'total_courses': int(columns['total_courses'][row]),
+                'days_remaining': student.get('days_remaining'),
+                'upcoming_exams': nearest_exams_first(student.get('upcoming_exams', [])),
+                'syllabus_focus_areas': student.get('syllabus_focus_areas', [])
+            }
+        return results
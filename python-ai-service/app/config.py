@@ -0,0 +1,140 @@
+import os
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return value.strip().lower() in ('1', 'true', 'yes', 'on') if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+# Executor settings for CPU-bound work
+# 'thread' shares the warm singletons; 'process' sidesteps the GIL for the TextBlob path
+MINDMAP_EXECUTOR = os.getenv('AI_MINDMAP_EXECUTOR', 'thread')
+MINDMAP_WORKERS = _env_int('AI_MINDMAP_WORKERS', 2)
+SUGGESTION_EXECUTOR = os.getenv('AI_SUGGESTION_EXECUTOR', 'thread')
+SUGGESTION_WORKERS = _env_int('AI_SUGGESTION_WORKERS', 4)
+
+# Requests allowed to wait for a worker before new ones get a 503
+EXECUTOR_QUEUE_SIZE = _env_int('AI_EXECUTOR_QUEUE_SIZE', 16)
+
+# Seconds a request waits for its result before getting a 504
+REQUEST_TIMEOUT = _env_float('AI_REQUEST_TIMEOUT', 30.0)
+
+# Mindmap result cache; set AI_MINDMAP_CACHE_BACKEND=sqlite for a persistent second tier
+MINDMAP_CACHE_SIZE = _env_int('AI_MINDMAP_CACHE_SIZE', 256)
+MINDMAP_CACHE_TTL = _env_float('AI_MINDMAP_CACHE_TTL', 3600.0)
+MINDMAP_CACHE_BACKEND = os.getenv('AI_MINDMAP_CACHE_BACKEND', '')
+MINDMAP_CACHE_PATH = os.getenv('AI_MINDMAP_CACHE_PATH', 'mindmap_cache.sqlite3')
+# SQLite cache files are purged of expired rows this often (seconds), and each file is
+# capped at this many rows by dropping the entries that expire soonest (0: no cap)
+CACHE_PURGE_INTERVAL = _env_float('AI_CACHE_PURGE_INTERVAL', 600.0)
+CACHE_MAX_ROWS = _env_int('AI_CACHE_MAX_ROWS', 100_000)
+
+# Per-student suggestion snapshots, reused while the student's payload is unchanged;
+# they use the mindmap cache backend unless configured separately
+SUGGESTION_SNAPSHOT_SIZE = _env_int('AI_SUGGESTION_SNAPSHOT_SIZE', 10000)
+SUGGESTION_SNAPSHOT_TTL = _env_float('AI_SUGGESTION_SNAPSHOT_TTL', 86400.0)
+SUGGESTION_SNAPSHOT_BACKEND = os.getenv('AI_SUGGESTION_SNAPSHOT_BACKEND', MINDMAP_CACHE_BACKEND)
+SUGGESTION_SNAPSHOT_PATH = os.getenv('AI_SUGGESTION_SNAPSHOT_PATH', MINDMAP_CACHE_PATH)
+
+# Department exam calendars and syllabus focus registered by the backend
+COURSE_CALENDAR_SIZE = _env_int('AI_COURSE_CALENDAR_SIZE', 1000)
+COURSE_CALENDAR_TTL = _env_float('AI_COURSE_CALENDAR_TTL', 180 * 86400.0)
+COURSE_CALENDAR_BACKEND = os.getenv('AI_COURSE_CALENDAR_BACKEND', MINDMAP_CACHE_BACKEND)
+COURSE_CALENDAR_PATH = os.getenv('AI_COURSE_CALENDAR_PATH', MINDMAP_CACHE_PATH)
+
+# Recommendation tip selection/order: 'seeded' (per student and day, so responses are
+# repeatable and carry an ETag) or 'random' (varies on every call, no ETag)
+SUGGESTION_ORDERING = os.getenv('AI_SUGGESTION_ORDERING', 'seeded')
+
+# Stored mindmap versions available as a base for incremental regeneration;
+# they share the mindmap cache's TTL and (when configured) its SQLite file
+MINDMAP_VERSION_STORE_SIZE = _env_int('AI_MINDMAP_VERSION_STORE_SIZE', 128)
+
+# Near-duplicate syllabi (MinHash estimate of shingle overlap at least the threshold)
+# are rebuilt from the matched syllabus's stored version, reparsing only changed units.
+# Off by default: a rebuilt mindmap counts sentences per unit, so its complexity figures
+# can differ from a fresh one's and depend on which syllabi the worker saw before
+MINDMAP_NEAR_DUPLICATES = _env_bool('AI_MINDMAP_NEAR_DUPLICATES', False)
+NEAR_DUPLICATE_THRESHOLD = _env_float('AI_NEAR_DUPLICATE_THRESHOLD', 0.8)
+
+# Bulk mindmap jobs: persisted in a local SQLite file and processed in the background
+# by every worker, on a pool separate from interactive requests
+MINDMAP_JOB_PATH = os.getenv('AI_MINDMAP_JOB_PATH', 'mindmap_jobs.sqlite3')
+MINDMAP_JOB_WORKERS = _env_int('AI_MINDMAP_JOB_WORKERS', 2)
+MINDMAP_JOB_LIMIT = _env_int('AI_MINDMAP_JOB_LIMIT', 1000)
+MINDMAP_JOB_ITEM_TIMEOUT = _env_float('AI_MINDMAP_JOB_ITEM_TIMEOUT', 300.0)
+# Seconds before an item still marked running (hung or killed worker) is claimed again
+MINDMAP_JOB_LEASE = _env_float('AI_MINDMAP_JOB_LEASE', 600.0)
+MINDMAP_JOB_RETENTION = _env_float('AI_MINDMAP_JOB_RETENTION', 7 * 86400.0)
+
+# Response compression (brotli when installed, else gzip) for bodies of at least this many bytes
+COMPRESSION_MIN_SIZE = _env_int('AI_COMPRESSION_MIN_SIZE', 1024)
+GZIP_LEVEL = _env_int('AI_GZIP_LEVEL', 6)
+BROTLI_QUALITY = _env_int('AI_BROTLI_QUALITY', 4)
+
+# Largest number of students accepted by the batch suggestions endpoint
+SUGGESTION_BATCH_LIMIT = _env_int('AI_SUGGESTION_BATCH_LIMIT', 1000)
+
+# Item-item course neighbour table (built offline by build_course_neighbours.py);
+# heuristic course recommendations only while the file does not exist
+COURSE_NEIGHBOURS_PATH = os.getenv('AI_COURSE_NEIGHBOURS_PATH', 'course_neighbours.bin')
+COURSE_NEIGHBOURS_K = _env_int('AI_COURSE_NEIGHBOURS_K', 20)
+# Course pairs with fewer common students than this are not considered similar
+COURSE_MIN_OVERLAP = _env_int('AI_COURSE_MIN_OVERLAP', 3)
+
+# When to load NLTK/TextBlob resources:
+# 'background' starts loading at startup without blocking /health,
+# 'import' loads while main is imported (pre-fork / snapshot friendly),
+# 'lazy' waits for the first request that needs them
+NLP_PRELOAD = os.getenv('AI_NLP_PRELOAD', 'background')
+
+# Sentence/word segmentation for keywords and complexity: 'fast' (regular expressions,
+# same words as TextBlob) or 'accurate' (punkt sentence splitting, as TextBlob does)
+TEXT_SEGMENTATION = os.getenv('AI_TEXT_SEGMENTATION', 'fast')
+
+# Input limits: request bodies over MAX_REQUEST_BYTES are refused before parsing,
+# syllabi over MAX_SYLLABUS_CHARS characters with 413
+MAX_REQUEST_BYTES = _env_int('AI_MAX_REQUEST_BYTES', 32 * 1024 * 1024)
+MAX_SYLLABUS_CHARS = _env_int('AI_MAX_SYLLABUS_CHARS', 10_000_000)
+# Syllabi longer than this many characters are processed unit by unit in bounded chunks
+MINDMAP_CHUNK_SIZE = _env_int('AI_MINDMAP_CHUNK_SIZE', 1024 * 1024)
+
+# Mindmap graph construction: 'native' tree or 'networkx' DiGraph
+MINDMAP_GRAPH_BACKEND = os.getenv('AI_MINDMAP_GRAPH_BACKEND', 'native')
+
+# TF-IDF corpus index for keyword extraction; empty path falls back to raw frequency.
+# Only interactive mindmap requests add syllabi, saved on a background thread every SAVE_EVERY documents
+KEYWORD_INDEX_PATH = os.getenv('AI_KEYWORD_INDEX_PATH', 'keyword_index.bin')
+KEYWORD_INDEX_SAVE_EVERY = _env_int('AI_KEYWORD_INDEX_SAVE_EVERY', 20)
+
+# Per-stage latency metrics served on /metrics; disabling makes instrumentation a no-op
+METRICS_ENABLED = _env_bool('AI_METRICS_ENABLED', True)
+
+# Pre-fork deployment (serve.py): workers forked after resources are loaded once
+WORKERS = _env_int('AI_WORKERS', 2)
+# Each worker exits gracefully after this many requests (plus random jitter) and is replaced; 0 disables
+WORKER_MAX_REQUESTS = _env_int('AI_WORKER_MAX_REQUESTS', 10000)
+WORKER_MAX_REQUESTS_JITTER = _env_int('AI_WORKER_MAX_REQUESTS_JITTER', 1000)
+# Seconds a stopping worker may spend finishing in-flight requests
+WORKER_GRACEFUL_TIMEOUT = _env_float('AI_WORKER_GRACEFUL_TIMEOUT', 30.0)
+
+# Admin endpoints (/api/admin/...) require this token in the X-Admin-Token header;
+# they and the profiler are disabled while it is unset
+ADMIN_TOKEN = os.getenv('AI_ADMIN_TOKEN', '')
+# Fraction of executor tasks profiled with AI_PROFILE_MODE ('cprofile' or 'stacks')
+PROFILE_SAMPLE_RATE = _env_float('AI_PROFILE_SAMPLE_RATE', 0.0)
+PROFILE_MODE = os.getenv('AI_PROFILE_MODE', 'cprofile')
+# Tasks running at least this long keep their stack samples (0 disables the capture)
+PROFILE_SLOW_MS = _env_float('AI_PROFILE_SLOW_MS', 2000.0)
+PROFILE_SAMPLE_INTERVAL_MS = _env_float('AI_PROFILE_SAMPLE_INTERVAL_MS', 10.0)
+PROFILE_LIMIT = _env_int('AI_PROFILE_LIMIT', 50)
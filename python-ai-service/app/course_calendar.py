@@ -0,0 +1,164 @@
+"""
+Department exam calendars and syllabus focus, registered once per department
+
+The backend registers each department's courses (exam dates, syllabus
+topics and summary) with the service. Suggestion requests then list the
+student's course ids instead of carrying the exam and syllabus lists, and
+resolve() turns them into the same upcoming_exams / syllabus_focus_areas
+data from a prebuilt per-department index.
+
+Calendars live in a single-tier store (SQLite when the cache backend is
+configured, so a registration made through one worker is seen by all).
+Each worker keeps the index it built together with the calendar version
+and rebuilds it only when a new calendar is registered.
+"""
+
+import bisect
+import math
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .cache import CacheStore
+from .snapshots import payload_fingerprint
+
+_KEY_PREFIX = 'course-calendar:'
+_VERSION_PREFIX = 'course-calendar-version:'
+_SECONDS_PER_DAY = 86400
+
+
+class CalendarNotRegisteredError(LookupError):
+    """Raised when course ids reference a department without a registered calendar"""
+
+
+class CourseEntry(NamedTuple):
+    name: str
+    exam_times: List[float]  # exam start times as POSIX timestamps, sorted
+    exams: List[Dict[str, Any]]  # in the same order
+    focus: Optional[Dict[str, Any]]
+
+
+def exam_timestamp(value: str) -> float:
+    """POSIX time of an ISO date or date-time; a bare date or naive time is taken as UTC"""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _build_index(courses: List[Dict[str, Any]]) -> Dict[str, CourseEntry]:
+    index = {}
+    for course in courses:
+        times_and_exams = sorted(
+            ((exam_timestamp(exam['date']), exam) for exam in course.get('exams', [])), key=lambda item: item[0]
+        )
+        focus = None
+        if course.get('topics') or course.get('content_summary'):
+            focus = {
+                'course': course['course'],
+                'topics': course.get('topics', []),
+                'content_summary': course.get('content_summary') or 'Review all units.'
+            }
+        index[course['course_id']] = CourseEntry(
+            course['course'],
+            [time for time, _ in times_and_exams],
+            [exam for _, exam in times_and_exams],
+            focus
+        )
+    return index
+
+
+class CourseCalendar:
+    """Registered exam calendars and syllabus focus per department"""
+
+    def __init__(self, store: CacheStore):
+        self.store = store
+        self._lock = threading.Lock()
+        # department -> (version, index) built by this worker
+        self._indexes: Dict[str, Tuple[str, Dict[str, CourseEntry]]] = {}
+        self.resolved = 0
+        self.rebuilds = 0
+
+    def register(self, department: str, courses: List[Dict[str, Any]]) -> str:
+        """Replace a department's calendar; returns its version
+
+        Each course is a dict with course_id, course (display name), exams
+        (dicts with an ISO 'date', or date-time for the exam's start, and
+        optional total_marks), topics and content_summary.
+        """
+        _build_index(courses)  # reject malformed dates before storing anything
+        version = payload_fingerprint(courses)[:16]
+        self.store.set(_KEY_PREFIX + department, {'version': version, 'courses': courses})
+        # Written last: workers that see the new version always find the new calendar
+        self.store.set(_VERSION_PREFIX + department, version)
+        return version
+
+    def get(self, department: str) -> Optional[Dict[str, Any]]:
+        """The registered calendar ({'version', 'courses'}) or None"""
+        return self.store.get(_KEY_PREFIX + department)
+
+    def _index(self, department: str) -> Optional[Dict[str, CourseEntry]]:
+        version = self.store.get(_VERSION_PREFIX + department)
+        if version is None:
+            return None
+        with self._lock:
+            cached = self._indexes.get(department)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        calendar = self.get(department)
+        if calendar is None:
+            return None
+        index = _build_index(calendar['courses'])
+        with self._lock:
+            self._indexes[department] = (calendar['version'], index)
+            self.rebuilds += 1
+        return index
+
+    def resolve(self, department: str, course_ids: Iterable[str],
+                now: Optional[datetime] = None) -> Optional[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """(upcoming_exams, syllabus_focus_areas) for a student's courses; None if the department is unknown
+
+        Each course contributes its next exam that has not started yet, with
+        days_remaining rounded up from the time left, as the backend computes
+        it for exams it sends itself. Exams come nearest first, and the focus
+        areas follow the same order. Course ids missing from the calendar are
+        skipped.
+        """
+        index = self._index(department)
+        if index is None:
+            return None
+        timestamp = (now or datetime.now(timezone.utc)).timestamp()
+        upcoming = []
+        for course_id in dict.fromkeys(course_ids):
+            entry = index.get(course_id)
+            if entry is None:
+                continue
+            position = bisect.bisect_left(entry.exam_times, timestamp)
+            if position < len(entry.exam_times):
+                days = math.ceil((entry.exam_times[position] - timestamp) / _SECONDS_PER_DAY)
+                upcoming.append((days, course_id, entry, entry.exams[position]))
+        upcoming.sort(key=lambda item: item[0])
+
+        exams = []
+        focus_areas = []
+        for days, course_id, entry, exam in upcoming:
+            exams.append({
+                'course': entry.name,
+                'course_id': course_id,
+                'date': exam['date'],
+                'days_remaining': days,
+                'total_marks': exam.get('total_marks')
+            })
+            if entry.focus is not None:
+                focus_areas.append(entry.focus)
+        with self._lock:
+            self.resolved += 1
+        return exams, focus_areas
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'indexed_departments': len(self._indexes),
+                'resolved': self.resolved,
+                'rebuilds': self.rebuilds
+            }
@@ -0,0 +1,374 @@
+"""
+Item-item course recommendations
+
+An exported grade file (CSV with student_id, course and grade columns;
+grades are letters of the grade scale or grade points) is loaded into a
+sparse student x course matrix. build_neighbour_table() scores every pair
+of courses by Pearson-style cosine similarity (grades centered on each
+course's mean; pairs with fewer than min_overlap common students are
+ignored) and keeps the k most similar courses of each one. Centering on
+the course rather than the student keeps new grades in one course from
+changing every other course's column, which is what makes refreshes
+incremental.
+
+The table is written to a compact binary file that workers memory-map,
+so a recommendation is a lookup of the student's courses' neighbour lists
+and a weighted merge. refresh_neighbour_table() updates a table from a
+newer export, recomputing only the courses whose grade columns changed.
+"""
+
+import csv
+import hashlib
+import heapq
+import logging
+import os
+import struct
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .keyword_index import term_hash
+
+logger = logging.getLogger(__name__)
+
+# File layout (little endian):
+#   header   8s magic, u64 courses, u64 k, u64 min_overlap, u64 name bytes
+#   int32[courses * k]     neighbour course indices, most similar first, -1 padded
+#   float32[courses * k]   similarities
+#   uint64[courses]        fingerprint of each course's grade column
+#   uint32[courses + 1]    character offsets of the course names
+#   name bytes             UTF-8 course names
+MAGIC = b'CRSNB001'
+HEADER = struct.Struct('<8sQQQQ')
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _file_identity(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def parse_grade(grade: object, grade_points: Dict[str, float]) -> Optional[float]:
+    """Grade points of a letter grade or a number; None when it is neither"""
+    if isinstance(grade, (int, float)):
+        return float(grade)
+    grade = str(grade).strip()
+    if grade in grade_points:
+        return float(grade_points[grade])
+    try:
+        return float(grade)
+    except ValueError:
+        return None
+
+
+class GradeMatrix:
+    """Sparse student x course grade matrix, stored both by student (CSR) and by course (CSC)"""
+
+    def __init__(self, records: Iterable[Tuple[str, str, float]]):
+        grades: Dict[Tuple[str, str], float] = {}
+        for student, course, points in records:
+            # A later record for the same student and course replaces the earlier one
+            grades[(student, course)] = points
+        self.students = sorted({student for student, _ in grades})
+        self.courses = sorted({course for _, course in grades})
+        self.course_index = {course: index for index, course in enumerate(self.courses)}
+        student_index = {student: index for index, student in enumerate(self.students)}
+
+        count = len(grades)
+        rows = np.fromiter((student_index[s] for s, _ in grades), dtype=np.int64, count=count)
+        cols = np.fromiter((self.course_index[c] for _, c in grades), dtype=np.int64, count=count)
+        values = np.fromiter(grades.values(), dtype=np.float64, count=count)
+
+        # Grades centered on their course's mean
+        col_counts = np.bincount(cols, minlength=len(self.courses))
+        means = np.bincount(cols, weights=values, minlength=len(self.courses)) / np.maximum(col_counts, 1)
+        centered = values - means[cols]
+        self.norms = np.sqrt(np.bincount(cols, weights=centered ** 2, minlength=len(self.courses)))
+
+        # CSR: each student's grades
+        order = np.lexsort((cols, rows))
+        self.row_indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(self.students)))])
+        self.row_courses = cols[order]
+        self.row_centered = centered[order]
+
+        # CSC: each course's students and grades
+        order = np.lexsort((rows, cols))
+        self.col_indptr = np.concatenate([[0], np.cumsum(col_counts)])
+        self.col_students = rows[order]
+        self.col_centered = centered[order]
+
+    @classmethod
+    def from_csv(cls, path: str, grade_points: Dict[str, float]) -> 'GradeMatrix':
+        """Load an exported grade file (columns student_id, course, grade)"""
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            missing = {'student_id', 'course', 'grade'} - set(reader.fieldnames or [])
+            if missing:
+                raise ValueError(f"{path} is missing columns: {', '.join(sorted(missing))}")
+            records = []
+            for line, row in enumerate(reader, start=2):
+                student, course = row['student_id'].strip(), row['course'].strip()
+                if not student or not course or not row['grade'].strip():
+                    continue
+                points = parse_grade(row['grade'], grade_points)
+                if points is None:
+                    raise ValueError(f"{path}:{line}: unknown grade {row['grade']!r}")
+                records.append((student, course, points))
+        return cls(records)
+
+    @property
+    def grades(self) -> int:
+        return len(self.row_courses)
+
+    def column_fingerprints(self) -> np.ndarray:
+        """Hash of each course's (student, centered grade) column; equal hashes mean equal similarities"""
+        student_hashes = np.fromiter((term_hash(s) for s in self.students), dtype=np.uint64, count=len(self.students))
+        fingerprints = np.zeros(len(self.courses), dtype=np.uint64)
+        for course in range(len(self.courses)):
+            start, end = self.col_indptr[course], self.col_indptr[course + 1]
+            column = np.empty(end - start, dtype=[('student', '<u8'), ('grade', '<f8')])
+            column['student'] = student_hashes[self.col_students[start:end]]
+            # Already in student name order, which does not depend on who else is in the export
+            column['grade'] = self.col_centered[start:end]
+            digest = hashlib.blake2b(column.tobytes(), digest_size=8).digest()
+            fingerprints[course] = int.from_bytes(digest, 'little')
+        return fingerprints
+
+    def similarities(self, course: int, min_overlap: int) -> np.ndarray:
+        """Centered cosine similarity of one course to every course (0 for itself and sparse pairs)"""
+        start, end = self.col_indptr[course], self.col_indptr[course + 1]
+        students = self.col_students[start:end]
+        weights = self.col_centered[start:end]
+        # Every grade of every student who took this course, gathered from the CSR rows
+        row_starts = self.row_indptr[students]
+        lengths = self.row_indptr[students + 1] - row_starts
+        offsets = np.repeat(row_starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        entries = offsets + np.arange(lengths.sum())
+        courses = self.row_courses[entries]
+        dots = np.bincount(courses, weights=self.row_centered[entries] * np.repeat(weights, lengths),
+                           minlength=len(self.courses))
+        overlap = np.bincount(courses, minlength=len(self.courses))
+        denominator = self.norms[course] * self.norms
+        sims = np.divide(dots, denominator, out=np.zeros(len(self.courses)), where=denominator > 0)
+        sims[overlap < min_overlap] = 0.0
+        sims[course] = 0.0
+        return sims
+
+
+def _top_k(candidates: np.ndarray, sims: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """The k most similar positive candidates (ties by index), padded with -1 / 0"""
+    # Ranked at stored precision, so refreshed and rebuilt tables order neighbours alike
+    sims = sims.astype(np.float32)
+    keep = sims > 0
+    candidates, sims = candidates[keep], sims[keep]
+    order = np.lexsort((candidates, -sims))[:k]
+    neighbours = np.full(k, -1, dtype=np.int32)
+    scores = np.zeros(k, dtype=np.float32)
+    neighbours[:len(order)] = candidates[order]
+    scores[:len(order)] = sims[order]
+    return neighbours, scores
+
+
+class NeighbourTable:
+    """Top-k similar courses of every course"""
+
+    def __init__(self, courses: List[str], neighbours: np.ndarray, sims: np.ndarray,
+                 fingerprints: np.ndarray, min_overlap: int):
+        self.courses = courses
+        self.course_index = {course: index for index, course in enumerate(courses)}
+        self.neighbours = neighbours
+        self.sims = sims
+        self.fingerprints = fingerprints
+        self.min_overlap = min_overlap
+
+    @property
+    def k(self) -> int:
+        return self.neighbours.shape[1]
+
+    @classmethod
+    def load(cls, path: str) -> 'NeighbourTable':
+        """Memory-map a table file"""
+        with open(path, 'rb') as f:
+            magic, courses, k, min_overlap, name_bytes = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a course neighbour table")
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        offset = HEADER.size
+        neighbours = data[offset:offset + 4 * courses * k].view(np.int32).reshape(courses, k)
+        offset += 4 * courses * k
+        sims = data[offset:offset + 4 * courses * k].view(np.float32).reshape(courses, k)
+        offset = _aligned(offset + 4 * courses * k)
+        fingerprints = data[offset:offset + 8 * courses].view(np.uint64)
+        offset += 8 * courses
+        name_offsets = data[offset:offset + 4 * (courses + 1)].view(np.uint32)
+        offset += 4 * (courses + 1)
+        names = bytes(data[offset:offset + name_bytes]).decode('utf-8')
+        course_names = [names[name_offsets[i]:name_offsets[i + 1]] for i in range(courses)]
+        return cls(course_names, neighbours, sims, fingerprints, min_overlap)
+
+    def save(self, path: str) -> None:
+        """Write the table atomically"""
+        names = ''.join(self.courses)
+        name_offsets = np.concatenate([[0], np.cumsum([len(course) for course in self.courses])]).astype('<u4')
+        encoded = names.encode('utf-8')
+        courses, k = self.neighbours.shape
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, courses, k, self.min_overlap, len(encoded)))
+            f.write(np.ascontiguousarray(self.neighbours, dtype='<i4').tobytes())
+            f.write(np.ascontiguousarray(self.sims, dtype='<f4').tobytes())
+            f.write(b'\0' * (_aligned(HEADER.size + 8 * courses * k) - (HEADER.size + 8 * courses * k)))
+            f.write(self.fingerprints.astype('<u8').tobytes())
+            f.write(name_offsets.tobytes())
+            f.write(encoded)
+        os.replace(tmp_path, path)
+
+    def similar(self, course: str) -> List[Tuple[str, float]]:
+        """A course's neighbours with their similarity, most similar first"""
+        index = self.course_index.get(course)
+        if index is None:
+            return []
+        return [(self.courses[n], float(s)) for n, s in zip(self.neighbours[index], self.sims[index]) if n >= 0]
+
+    def recommend(self, grades: Dict[str, float], limit: int = 3) -> List[Tuple[str, float]]:
+        """Courses the student has not taken, with the grade points predicted from similar courses
+
+        The prediction for a course is the similarity-weighted mean of the
+        student's grades in the taken courses that list it as a neighbour.
+        """
+        taken = {self.course_index[course]: points for course, points in grades.items() if course in self.course_index}
+        weighted: Dict[int, float] = {}
+        weights: Dict[int, float] = {}
+        for course, points in taken.items():
+            for neighbour, sim in zip(self.neighbours[course].tolist(), self.sims[course].tolist()):
+                if neighbour < 0:
+                    break
+                if neighbour in taken:
+                    continue
+                weighted[neighbour] = weighted.get(neighbour, 0.0) + sim * points
+                weights[neighbour] = weights.get(neighbour, 0.0) + sim
+        # Best prediction first; more supporting evidence breaks ties
+        best = heapq.nlargest(limit, weights, key=lambda n: (weighted[n] / weights[n], weights[n], -n))
+        return [(self.courses[n], weighted[n] / weights[n]) for n in best]
+
+
+def build_neighbour_table(matrix: GradeMatrix, k: int = 20, min_overlap: int = 3) -> NeighbourTable:
+    """Similarities of every course pair, reduced to each course's top k"""
+    count = len(matrix.courses)
+    neighbours = np.full((count, k), -1, dtype=np.int32)
+    sims = np.zeros((count, k), dtype=np.float32)
+    candidates = np.arange(count)
+    for course in range(count):
+        neighbours[course], sims[course] = _top_k(candidates, matrix.similarities(course, min_overlap), k)
+    return NeighbourTable(list(matrix.courses), neighbours, sims, matrix.column_fingerprints(), min_overlap)
+
+
+def refresh_neighbour_table(table: NeighbourTable, matrix: GradeMatrix) -> Tuple[NeighbourTable, int]:
+    """Update a table to a newer export; returns (table, courses recomputed)
+
+    Only pairs involving a course whose grade column changed (grades added,
+    changed or removed in that course) get new similarities. Those
+    courses are recomputed in full; every other course merges the new
+    scores into its stored list, unless its list held a changed course,
+    which may have dropped out, in which case it is recomputed too. The
+    result matches build_neighbour_table on the same export.
+    """
+    count = len(matrix.courses)
+    k = table.k
+    fingerprints = matrix.column_fingerprints()
+    # Old index -> new index (-1 for courses no longer in the export)
+    remap = np.array([matrix.course_index.get(course, -1) for course in table.courses] + [-1], dtype=np.int64)
+    previous = np.full(count, -1, dtype=np.int64)
+    previous[remap[:-1][remap[:-1] >= 0]] = np.flatnonzero(remap[:-1] >= 0)
+
+    changed: Set[int] = {course for course in range(count)
+                         if previous[course] < 0 or table.fingerprints[previous[course]] != fingerprints[course]}
+    removed = len(table.courses) - int((remap[:-1] >= 0).sum())
+
+    neighbours = np.full((count, k), -1, dtype=np.int32)
+    sims = np.zeros((count, k), dtype=np.float32)
+    candidates = np.arange(count)
+    changed_list = sorted(changed)
+    changed_rows = np.zeros((len(changed_list), count))
+    for row, course in enumerate(changed_list):
+        changed_rows[row] = matrix.similarities(course, table.min_overlap)
+        neighbours[course], sims[course] = _top_k(candidates, changed_rows[row], k)
+
+    changed_index = np.array(changed_list, dtype=np.int64)
+    recomputed = len(changed_list)
+    for course in range(count):
+        if course in changed:
+            continue
+        old_neighbours = np.asarray(table.neighbours[previous[course]], dtype=np.int64)
+        valid = old_neighbours >= 0
+        mapped = remap[old_neighbours[valid]]
+        stale = np.any(mapped < 0) or any(int(n) in changed for n in mapped)
+        if stale:
+            neighbours[course], sims[course] = _top_k(candidates, matrix.similarities(course, table.min_overlap), k)
+            recomputed += 1
+            continue
+        # Unchanged pairs keep their stored scores; changed courses can only enter the list
+        merged_candidates = np.concatenate([mapped, changed_index])
+        merged_sims = np.concatenate([np.asarray(table.sims[previous[course]], dtype=np.float64)[valid],
+                                      changed_rows[:, course]])
+        neighbours[course], sims[course] = _top_k(merged_candidates, merged_sims, k)
+
+    logger.info(f"Refreshed course neighbours: {len(changed_list)} changed, {removed} removed, "
+                f"{recomputed} of {count} courses recomputed")
+    return NeighbourTable(list(matrix.courses), neighbours, sims, fingerprints, table.min_overlap), recomputed
+
+
+class CourseRecommender:
+    """Recommendations from a neighbour table file, remapped when the file is replaced"""
+
+    # Seconds between checks for a refreshed table file
+    CHECK_INTERVAL = 30.0
+
+    def __init__(self, path: str):
+        self.path = path
+        self.table: Optional[NeighbourTable] = None
+        self._identity: Optional[Tuple[int, int, int]] = None
+        self._checked = 0.0
+        self._reload()
+
+    def _reload(self) -> None:
+        self._checked = time.monotonic()
+        identity = _file_identity(self.path)
+        if identity == self._identity:
+            return
+        try:
+            self.table = NeighbourTable.load(self.path) if identity is not None else None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load course neighbour table {self.path}: {e}")
+            self.table = None
+        self._identity = identity
+
+    @property
+    def version(self) -> Optional[str]:
+        """Identifies the loaded table (changes when the file is refreshed)"""
+        if self._identity is None:
+            return None
+        return '-'.join(str(part) for part in self._identity)
+
+    def recommend(self, grades: Dict[str, float], limit: int = 3) -> List[Tuple[str, float]]:
+        if time.monotonic() - self._checked > self.CHECK_INTERVAL:
+            self._reload()
+        if self.table is None:
+            return []
+        return self.table.recommend(grades, limit)
+
+    def stats(self) -> Dict[str, object]:
+        table = self.table
+        return {
+            'path': self.path,
+            'loaded': table is not None,
+            'courses': len(table.courses) if table is not None else 0,
+            'k': table.k if table is not None else 0
+        }
@@ -0,0 +1,89 @@
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+
+
+class ExecutorTimeoutError(Exception):
+    """Raised when a task does not finish within the request timeout"""
+
+
+class WorkExecutor:
+    """Runs blocking work off the asyncio event loop
+
+    At most ``max_workers`` tasks run at once and ``queue_size`` more may
+    wait for a worker; anything beyond that is rejected immediately so a
+    burst of slow requests cannot starve the loop or grow memory without
+    bound. A task that times out keeps its slot until it really finishes,
+    because threads and pool processes cannot be interrupted.
+    """
+
+    def __init__(self, name: str, kind: str = 'thread', max_workers: int = 2,
+                 queue_size: int = 16, timeout: float = 30.0):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._pending = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._pool: Executor = self._create_pool()
+
+    def _create_pool(self) -> Executor:
+        if self.kind == 'process':
+            return ProcessPoolExecutor(max_workers=self.max_workers)
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.queue_size
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run func(*args) on the pool and await its result"""
+        if self._pending >= self.capacity:
+            self._rejected += 1
+            raise ExecutorSaturatedError(f"{self.name} executor is saturated ({self._pending} tasks pending)")
+
+        loop = asyncio.get_running_loop()
+        if self.kind == 'thread':
+            # Carry context variables (e.g. per-request stage timings) into the worker thread
+            func = functools.partial(contextvars.copy_context().run, func)
+        self._pending += 1
+        future = loop.run_in_executor(self._pool, func, *args)
+        future.add_done_callback(self._release)
+        try:
+            # shield() keeps the slot accounted for until the work really ends
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self._timed_out += 1
+            raise ExecutorTimeoutError(f"{self.name} task exceeded {self.timeout}s")
+
+    def _release(self, future: asyncio.Future) -> None:
+        self._pending -= 1
+        if not future.cancelled() and future.exception() is not None:
+            # Consume the exception of abandoned (timed out) tasks so it is not reported as unretrieved
+            logger.debug(f"{self.name} task failed: {future.exception()}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'queue_size': self.queue_size,
+            'pending': self._pending,
+            'rejected': self._rejected,
+            'timed_out': self._timed_out
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
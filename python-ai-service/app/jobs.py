@@ -0,0 +1,293 @@
+"""
+Bulk mindmap jobs
+
+A job is a list of syllabi submitted in one request. Jobs and their items
+live in a local SQLite file, so a restart does not lose submitted work:
+items that were running when a worker died are claimed again once their
+lease expires (immediately, when the claiming process is known to be gone).
+
+Every service process runs a JobRunner. Runners claim pending items in
+small batches inside a write transaction, so pre-forked workers share the
+queue without processing an item twice, and report progress per item.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, created_at REAL, total INTEGER)',
+    'CREATE TABLE IF NOT EXISTS job_items ('
+    ' job_id TEXT, position INTEGER, status TEXT, request TEXT, result TEXT, error TEXT,'
+    ' claimed_by INTEGER, claimed_at REAL, finished_at REAL,'
+    ' PRIMARY KEY (job_id, position))',
+    'CREATE INDEX IF NOT EXISTS job_items_status ON job_items (status, claimed_at)'
+)
+
+# Item states; a job's state is derived from its items
+PENDING, RUNNING, COMPLETED, FAILED = 'pending', 'running', 'completed', 'failed'
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """SQLite-backed job queue and result store, shared by every worker process
+
+    Like SQLiteCacheStore, the connection is opened lazily in each process.
+    """
+
+    def __init__(self, path: str, lease: float = 600.0):
+        self.path = path
+        self.lease = lease
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Called with self._lock held
+        if self._conn is None or self._pid != os.getpid():
+            # Autocommit mode: claims use explicit BEGIN IMMEDIATE transactions
+            self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+            self._pid = os.getpid()
+        return self._conn
+
+    def create(self, requests: List[Dict[str, Any]]) -> str:
+        """Queue a job with one item per request; returns the job id"""
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('INSERT INTO jobs (id, created_at, total) VALUES (?, ?, ?)',
+                             (job_id, time.time(), len(requests)))
+                conn.executemany(
+                    'INSERT INTO job_items (job_id, position, status, request) VALUES (?, ?, ?, ?)',
+                    [(job_id, position, PENDING, json.dumps(request)) for position, request in enumerate(requests)]
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return job_id
+
+    def claim(self, limit: int) -> List[Dict[str, Any]]:
+        """Mark up to limit items as running for this process and return them, oldest jobs first
+
+        Items whose lease ran out (their worker hung or died) are claimable again.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = conn.execute(
+                    'SELECT job_items.job_id, position, request FROM job_items'
+                    ' JOIN jobs ON jobs.id = job_items.job_id'
+                    ' WHERE status = ? OR (status = ? AND claimed_at < ?)'
+                    ' ORDER BY jobs.created_at, position LIMIT ?',
+                    (PENDING, RUNNING, now - self.lease, limit)
+                ).fetchall()
+                conn.executemany(
+                    'UPDATE job_items SET status = ?, claimed_by = ?, claimed_at = ? WHERE job_id = ? AND position = ?',
+                    [(RUNNING, self._pid, now, job_id, position) for job_id, position, _ in rows]
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return [{'job_id': job_id, 'position': position, 'request': json.loads(request)}
+                for job_id, position, request in rows]
+
+    def complete(self, job_id: str, position: int, result: Dict[str, Any]) -> None:
+        self._finish(job_id, position, COMPLETED, json.dumps(result), None)
+
+    def fail(self, job_id: str, position: int, error: str) -> None:
+        self._finish(job_id, position, FAILED, None, error)
+
+    def _finish(self, job_id: str, position: int, status: str, result: Optional[str], error: Optional[str]) -> None:
+        with self._lock:
+            self._connection().execute(
+                'UPDATE job_items SET status = ?, result = ?, error = ?, finished_at = ? WHERE job_id = ? AND position = ?',
+                (status, result, error, time.time(), job_id, position)
+            )
+
+    def release_orphaned(self) -> int:
+        """Return items claimed by processes that no longer exist to the queue; returns how many"""
+        with self._lock:
+            conn = self._connection()
+            claimants = [row[0] for row in conn.execute(
+                'SELECT DISTINCT claimed_by FROM job_items WHERE status = ?', (RUNNING,)
+            )]
+            dead = [pid for pid in claimants if pid != os.getpid() and not _process_alive(pid)]
+            released = 0
+            for pid in dead:
+                cursor = conn.execute(
+                    'UPDATE job_items SET status = ?, claimed_by = NULL, claimed_at = NULL'
+                    ' WHERE status = ? AND claimed_by = ?',
+                    (PENDING, RUNNING, pid)
+                )
+                released += cursor.rowcount
+        return released
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job progress, or None for an unknown job"""
+        with self._lock:
+            conn = self._connection()
+            job = conn.execute('SELECT created_at, total FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if job is None:
+                return None
+            counts = dict(conn.execute(
+                'SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status', (job_id,)
+            ).fetchall())
+            finished_at = conn.execute(
+                'SELECT MAX(finished_at) FROM job_items WHERE job_id = ?', (job_id,)
+            ).fetchone()[0]
+        created_at, total = job
+        done = counts.get(COMPLETED, 0) + counts.get(FAILED, 0)
+        if done == total:
+            state = COMPLETED
+        elif done or counts.get(RUNNING, 0):
+            state = RUNNING
+        else:
+            state = 'queued'
+        return {
+            'job_id': job_id,
+            'status': state,
+            'created_at': created_at,
+            'finished_at': finished_at if state == COMPLETED else None,
+            'progress': {
+                'total': total,
+                'completed': counts.get(COMPLETED, 0),
+                'failed': counts.get(FAILED, 0),
+                'running': counts.get(RUNNING, 0),
+                'pending': counts.get(PENDING, 0),
+                'percent': round(100.0 * done / total, 1) if total else 100.0
+            }
+        }
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """Items of a job in submission order, with their result or error once finished"""
+        with self._lock:
+            rows = self._connection().execute(
+                'SELECT position, status, result, error FROM job_items WHERE job_id = ?'
+                ' ORDER BY position LIMIT ? OFFSET ?',
+                (job_id, limit, offset)
+            ).fetchall()
+        items = []
+        for position, status, result, error in rows:
+            item: Dict[str, Any] = {'index': position, 'status': status}
+            if status == COMPLETED:
+                item['data'] = json.loads(result)
+            elif status == FAILED:
+                item['error'] = error
+            items.append(item)
+        return items
+
+    def purge_finished(self, max_age: float) -> int:
+        """Delete jobs whose items all finished more than max_age seconds ago; returns how many"""
+        cutoff = time.time() - max_age
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                job_ids = [row[0] for row in conn.execute(
+                    'SELECT job_id FROM job_items GROUP BY job_id'
+                    ' HAVING SUM(status IN (?, ?)) = COUNT(*) AND MAX(finished_at) < ?',
+                    (COMPLETED, FAILED, cutoff)
+                )]
+                for job_id in job_ids:
+                    conn.execute('DELETE FROM job_items WHERE job_id = ?', (job_id,))
+                    conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        return len(job_ids)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            conn = self._connection()
+            jobs = conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM job_items GROUP BY status').fetchall())
+        return {'path': self.path, 'jobs': jobs, 'items': {state: counts.get(state, 0)
+                                                          for state in (PENDING, RUNNING, COMPLETED, FAILED)}}
+
+
+class JobRunner:
+    """Background loop that works through queued job items in this process
+
+    process(request) computes one item's result; up to batch_size items run
+    concurrently. The loop sleeps poll_interval seconds when the queue is
+    empty, or less when notify() reports a new job from this process.
+    """
+
+    def __init__(self, store: JobStore, process: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 batch_size: int = 2, poll_interval: float = 1.0, retention: float = 7 * 86400.0):
+        self.store = store
+        self.process = process
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.processed = 0
+        self.failed = 0
+        self._wake: Optional[asyncio.Event] = None
+
+    def notify(self) -> None:
+        if self._wake is not None:
+            self._wake.set()
+
+    async def run(self) -> None:
+        """Process items until cancelled"""
+        self._wake = asyncio.Event()
+        released = await asyncio.to_thread(self.store.release_orphaned)
+        if released:
+            logger.info(f"Re-queued {released} job items left running by a stopped worker")
+        await asyncio.to_thread(self.store.purge_finished, self.retention)
+        while True:
+            if not await self.run_once():
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+
+    async def run_once(self) -> int:
+        """Claim and process one batch; returns how many items it handled"""
+        items = await asyncio.to_thread(self.store.claim, self.batch_size)
+        await asyncio.gather(*(self._process_item(item) for item in items))
+        return len(items)
+
+    async def _process_item(self, item: Dict[str, Any]) -> None:
+        try:
+            result = await self.process(item['request'])
+        except Exception as e:
+            # HTTPException-style errors carry the useful message in .detail
+            error = str(getattr(e, 'detail', '') or e)
+            logger.warning(f"Job {item['job_id']} item {item['position']} failed: {error}")
+            await asyncio.to_thread(self.store.fail, item['job_id'], item['position'], error)
+            self.failed += 1
+        else:
+            await asyncio.to_thread(self.store.complete, item['job_id'], item['position'], result)
+            self.processed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {'processed': self.processed, 'failed': self.failed, 'store': self.store.stats()}
@@ -0,0 +1,247 @@
+import hashlib
+import heapq
+import logging
+import os
+import struct
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process owns the index file
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# File layout (little endian):
+#   header   8s magic, u64 documents, u64 terms, u64 seen documents
+#   uint64[terms]   term hashes, sorted
+#   uint32[terms]   document frequency of each term
+#   padding to 8 bytes
+#   uint64[seen]    content hashes of documents already counted, sorted
+MAGIC = b'KWIDX001'
+HEADER = struct.Struct('<8sQQQ')
+
+
+def term_hash(term: str) -> int:
+    """Stable 64-bit hash of a term (Python's hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(term.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _file_identity(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+@contextmanager
+def _exclusive_lock(path: str) -> Iterator[None]:
+    """Serialize saves across worker processes sharing the index file"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class CorpusIndex:
+    """Document-frequency index over every syllabus the service has seen
+
+    The persisted part is memory-mapped read-only and queried with
+    np.searchsorted on sorted term hashes; documents added since the last
+    save live in a small in-memory delta that is merged on save(). Once
+    autosave_every documents are pending, add_document starts that save on
+    a background thread; the index stays readable and writable meanwhile,
+    with the delta being written kept in view until the new file is mapped.
+
+    Several worker processes may share one file: save() takes a file lock
+    and first picks up whatever other workers saved, so their counts are
+    merged rather than overwritten. A syllabus first seen by two workers
+    between their saves is counted by both.
+    """
+
+    def __init__(self, path: str = '', autosave_every: int = 0):
+        self.path = path
+        # Save in the background once this many documents are pending (0 disables)
+        self.autosave_every = autosave_every
+        self._lock = threading.Lock()
+        # Held for a whole save, so saves in this process run one at a time
+        self._save_lock = threading.Lock()
+        self._autosaving = False
+        self._base_documents = 0
+        self._base_hashes = np.zeros(0, dtype=np.uint64)
+        self._base_df = np.zeros(0, dtype=np.uint32)
+        self._base_seen = np.zeros(0, dtype=np.uint64)
+        self._delta_df: Dict[int, int] = {}
+        self._delta_seen: Set[int] = set()
+        # The delta a running save is writing, counted until the new file is mapped
+        self._flushing_df: Dict[int, int] = {}
+        self._flushing_seen: Set[int] = set()
+        self._mapped_identity: Optional[Tuple[int, int, int]] = None
+        if path and os.path.exists(path):
+            self._map(path)
+
+    def _map(self, path: str) -> None:
+        with open(path, 'rb') as f:
+            magic, documents, terms, seen = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a keyword index file")
+        data = np.memmap(path, dtype=np.uint8, mode='r')
+        offset = HEADER.size
+        self._base_hashes = data[offset:offset + 8 * terms].view(np.uint64)
+        offset += 8 * terms
+        self._base_df = data[offset:offset + 4 * terms].view(np.uint32)
+        offset = _aligned(offset + 4 * terms)
+        self._base_seen = data[offset:offset + 8 * seen].view(np.uint64)
+        self._base_documents = documents
+        self._mapped_identity = _file_identity(path)
+
+    @property
+    def documents(self) -> int:
+        return self._base_documents + len(self._flushing_seen) + len(self._delta_seen)
+
+    @property
+    def pending(self) -> int:
+        """Documents added since the last save"""
+        return len(self._delta_seen)
+
+    def _seen(self, doc_hash: int) -> bool:
+        if doc_hash in self._delta_seen or doc_hash in self._flushing_seen:
+            return True
+        index = np.searchsorted(self._base_seen, np.uint64(doc_hash))
+        return bool(index < len(self._base_seen) and self._base_seen[index] == doc_hash)
+
+    def add_document(self, doc_id: str, terms: Iterable[str]) -> bool:
+        """Count a document's distinct terms once; returns False if doc_id was already counted"""
+        doc_hash = term_hash(doc_id)
+        with self._lock:
+            if self._seen(doc_hash):
+                return False
+            self._delta_seen.add(doc_hash)
+            for term in set(terms):
+                h = term_hash(term)
+                self._delta_df[h] = self._delta_df.get(h, 0) + 1
+            should_save = (self.autosave_every and self.path and not self._autosaving
+                           and self.pending >= self.autosave_every)
+            if should_save:
+                self._autosaving = True
+        if should_save:
+            threading.Thread(target=self._autosave, name='keyword-index-save', daemon=True).start()
+        return True
+
+    def _autosave(self) -> None:
+        try:
+            self.save()
+        except Exception as e:
+            # The delta stays pending and is retried on the next autosave or save()
+            logger.warning(f"Saving keyword index {self.path} failed: {e}")
+        finally:
+            with self._lock:
+                self._autosaving = False
+
+    def document_frequencies(self, terms: List[str]) -> np.ndarray:
+        """Document frequency for each term, base and delta combined"""
+        hashes = np.fromiter((term_hash(term) for term in terms), dtype=np.uint64, count=len(terms))
+        with self._lock:
+            df = np.zeros(len(terms), dtype=np.int64)
+            if len(self._base_hashes):
+                index = np.searchsorted(self._base_hashes, hashes)
+                index[index >= len(self._base_hashes)] = 0
+                found = self._base_hashes[index] == hashes
+                df[found] = self._base_df[index[found]]
+            for delta in (self._flushing_df, self._delta_df):
+                if delta:
+                    df += np.fromiter((delta.get(int(h), 0) for h in hashes), dtype=np.int64, count=len(terms))
+        return df
+
+    def top_keywords(self, counts: Counter, k: int) -> List[str]:
+        """Top-k terms by TF-IDF, selected with a heap; ties keep first-seen order"""
+        if not counts:
+            return []
+        terms = list(counts)
+        df = self.document_frequencies(terms)
+        # Smoothed idf: terms in every document still score above zero
+        idf = np.log((1.0 + self.documents) / (1.0 + df)) + 1.0
+        scores = np.fromiter((counts[term] for term in terms), dtype=np.float64, count=len(terms)) * idf
+        best = heapq.nlargest(k, range(len(terms)), key=scores.__getitem__)
+        return [terms[i] for i in best]
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Merge the delta into the base and write it atomically, then remap the new file
+
+        The merge and the write run without holding the index lock, so
+        add_document and queries only wait for the final swap.
+        """
+        path = path or self.path
+        if not path:
+            return
+        with self._save_lock, _exclusive_lock(path):
+            with self._lock:
+                # Another worker may have saved since this one last mapped the file
+                identity = _file_identity(path)
+                if identity is not None and identity != self._mapped_identity:
+                    self._map(path)
+                flushing_df, flushing_seen = self._delta_df, self._delta_seen
+                self._flushing_df, self._flushing_seen = flushing_df, flushing_seen
+                self._delta_df, self._delta_seen = {}, set()
+                base_hashes, base_df, base_seen = self._base_hashes, self._base_df, self._base_seen
+                documents = self._base_documents + len(flushing_seen)
+
+            tmp_path = f"{path}.tmp"
+            try:
+                if flushing_df:
+                    delta_hashes = np.fromiter(flushing_df.keys(), dtype=np.uint64, count=len(flushing_df))
+                    delta_df = np.fromiter(flushing_df.values(), dtype=np.int64, count=len(flushing_df))
+                    hashes, inverse = np.unique(np.concatenate([base_hashes, delta_hashes]), return_inverse=True)
+                    df = np.bincount(inverse, weights=np.concatenate([base_df, delta_df]), minlength=len(hashes))
+                    df = df.astype(np.uint32)
+                else:
+                    hashes, df = np.array(base_hashes), np.array(base_df)
+                seen = np.union1d(base_seen, np.fromiter(flushing_seen, dtype=np.uint64, count=len(flushing_seen)))
+
+                with open(tmp_path, 'wb') as f:
+                    f.write(HEADER.pack(MAGIC, documents, len(hashes), len(seen)))
+                    f.write(hashes.astype('<u8').tobytes())
+                    f.write(df.astype('<u4').tobytes())
+                    f.write(b'\0' * (_aligned(HEADER.size + 12 * len(hashes)) - (HEADER.size + 12 * len(hashes))))
+                    f.write(seen.astype('<u8').tobytes())
+            except BaseException:
+                # Put the documents back so a later save writes them
+                with self._lock:
+                    for h, count in flushing_df.items():
+                        self._delta_df[h] = self._delta_df.get(h, 0) + count
+                    self._delta_seen |= flushing_seen
+                    self._flushing_df, self._flushing_seen = {}, set()
+                raise
+
+            with self._lock:
+                # Release the old mapping before replacing the file (required on Windows)
+                self._base_hashes, self._base_df, self._base_seen = hashes, df, seen
+                self._base_documents = documents
+                self._flushing_df, self._flushing_seen = {}, set()
+                os.replace(tmp_path, path)
+                self.path = path
+                self._map(path)
+        logger.info(f"Saved keyword index: {documents} documents, {len(hashes)} terms")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'documents': self.documents,
+            'saved_terms': len(self._base_hashes),
+            'pending_terms': len(self._delta_df) + len(self._flushing_df),
+            'pending_documents': self.pending
+        }
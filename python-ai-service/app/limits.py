@@ -0,0 +1,68 @@
+"""
+Request size limits
+
+BodySizeLimitMiddleware rejects request bodies larger than max_bytes with
+413 before the application parses them: a declared Content-Length over
+the limit is refused without reading the body, and a body without one is
+read only until it passes the limit. Everything the service accepts is
+JSON that FastAPI buffers in full anyway, so buffering here costs no
+extra memory.
+"""
+
+from typing import List
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    """413 for request bodies over max_bytes"""
+
+    def __init__(self, app: ASGIApp, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or scope['method'] in ('GET', 'HEAD', 'OPTIONS'):
+            await self.app(scope, receive, send)
+            return
+
+        declared = Headers(scope=scope).get('content-length')
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            await self.reject(scope, receive, send)
+            return
+
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] != 'http.request':
+                # Client went away; let the application see the disconnect
+                replay = [message]
+                break
+            body = message.get('body', b'')
+            size += len(body)
+            if size > self.max_bytes:
+                await self.reject(scope, receive, send)
+                return
+            chunks.append(body)
+            if not message.get('more_body', False):
+                replay = [{'type': 'http.request', 'body': b''.join(chunks), 'more_body': False}]
+                break
+        chunks = []  # only the joined body stays alive while the application runs
+
+        async def replay_receive() -> Message:
+            if replay:
+                return replay.pop(0)
+            return await receive()
+
+        await self.app(scope, replay_receive, send)
+
+    async def reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = JSONResponse(status_code=413, content={
+            'success': False,
+            'message': 'Request body too large',
+            'detail': f"Request body exceeds the limit of {self.max_bytes} bytes"
+        })
+        await response(scope, receive, send)
@@ -0,0 +1,154 @@
+"""
+Hot-path stage instrumentation with a Prometheus text exposition
+
+Wrap a pipeline stage in ``with metrics.stage('mindmap.extract_topics'):``
+to record its latency, call count, errors and (optionally) input size.
+When metrics are disabled stage() returns a shared no-op context manager,
+so instrumented code pays one attribute check per stage.
+
+Per-request breakdowns: start_request_timing() installs a dict in a
+context variable; every stage that runs in that context (including thread
+executor workers, which copy the caller's context) adds its duration to it.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from . import config
+
+# Upper bounds in seconds; the +Inf bucket is implicit
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds in bytes (or items, for suggestion requests)
+SIZE_BUCKETS = (100, 1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 10_000_000)
+
+_NULL_STAGE = nullcontext()
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('request_timings', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class _Stage:
+    __slots__ = ('registry', 'name', 'size', 'start')
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, size: Optional[int]):
+        self.registry = registry
+        self.name = name
+        self.size = size
+
+    def __enter__(self) -> '_Stage':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = time.perf_counter() - self.start
+        self.registry.observe(self.name, elapsed, self.size, failed=exc_type is not None)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[self.name] = timings.get(self.name, 0.0) + elapsed
+        return False
+
+
+class MetricsRegistry:
+    """Thread-safe per-stage latency histograms, input size histograms and error counters"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._latency: Dict[str, Histogram] = {}
+        self._sizes: Dict[str, Histogram] = {}
+        self._errors: Dict[str, int] = {}
+
+    def stage(self, name: str, size: Optional[int] = None):
+        """Context manager timing one stage; size records the stage's input size"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, size)
+
+    def observe(self, name: str, seconds: float, size: Optional[int] = None, failed: bool = False) -> None:
+        with self._lock:
+            histogram = self._latency.get(name)
+            if histogram is None:
+                histogram = self._latency[name] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+            if size is not None:
+                sizes = self._sizes.get(name)
+                if sizes is None:
+                    sizes = self._sizes[name] = Histogram(SIZE_BUCKETS)
+                sizes.observe(size)
+            if failed:
+                self._errors[name] = self._errors.get(name, 0) + 1
+
+    def render_prometheus(self) -> str:
+        """All stage metrics in the Prometheus text exposition format"""
+        with self._lock:
+            lines = [
+                '# HELP ai_stage_duration_seconds Latency of AI pipeline stages',
+                '# TYPE ai_stage_duration_seconds histogram'
+            ]
+            for name, histogram in sorted(self._latency.items()):
+                lines.extend(histogram.render('ai_stage_duration_seconds', f'stage="{name}"'))
+            lines += [
+                '# HELP ai_stage_input_size Input size seen by AI pipeline stages (characters or records)',
+                '# TYPE ai_stage_input_size histogram'
+            ]
+            for name, histogram in sorted(self._sizes.items()):
+                lines.extend(histogram.render('ai_stage_input_size', f'stage="{name}"'))
+            lines += [
+                '# HELP ai_stage_errors_total Stages that raised an exception',
+                '# TYPE ai_stage_errors_total counter'
+            ]
+            for name in sorted(self._latency):
+                lines.append(f'ai_stage_errors_total{{stage="{name}"}} {self._errors.get(name, 0)}')
+        return '\n'.join(lines) + '\n'
+
+
+def render_metric(name: str, metric_type: str, help_text: str, samples: Dict[str, float]) -> str:
+    """Render one extra metric family; samples maps a label string (may be empty) to its value"""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+    for labels, value in samples.items():
+        lines.append(f'{name}{{{labels}}} {value}' if labels else f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def start_request_timing() -> Dict[str, float]:
+    """Collect stage durations for the current request context into the returned dict"""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Format stage durations as a Server-Timing header value (milliseconds)"""
+    return ', '.join(f"{name.replace('.', '_')};dur={seconds * 1000:.2f}" for name, seconds in timings.items())
+
+
+metrics = MetricsRegistry(enabled=config.METRICS_ENABLED)
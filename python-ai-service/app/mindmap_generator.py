@@ -1,57 +1,92 @@
-import networkx as nx
-from typing import Dict, List, Any
-from .text_processor import TextProcessor
+import hashlib
+from collections import Counter
+from typing import Dict, List, Any, Iterator, Tuple
+from .metrics import metrics
+from .mindmap_tree import MindmapTree
+from .text_processor import TextProcessor, iter_clean_lines
+
+CENTRAL_NODE = "Course Overview"
+GRAPH_BACKENDS = ('native', 'networkx')
 
 class MindmapGenerator:
-    def __init__(self):
-        self.text_processor = TextProcessor()
+    def __init__(self, graph_backend: str = 'native', segmentation: str = 'fast', chunk_size: int = 1 << 20):
+        if graph_backend not in GRAPH_BACKENDS:
+            raise ValueError(f"Unknown graph backend: {graph_backend}")
+        self.text_processor = TextProcessor(segmentation=segmentation)
+        # 'native' builds a compact MindmapTree; 'networkx' keeps the DiGraph path for graph analytics
+        self.graph_backend = graph_backend
+        # Syllabi longer than this (in characters) are processed unit by unit, and unit text is
+        # tokenized in pieces of at most this size, so working memory stops growing with the input
+        self.chunk_size = chunk_size
     
-    def generate_mindmap(self, syllabus_text: str, days_remaining: int = None) -> Dict[str, Any]:
-        """Generate a mindmap structure from syllabus text"""
+    def generate_mindmap(self, syllabus_text: str, days_remaining: int = None,
+                         update_corpus: bool = False) -> Dict[str, Any]:
+        """Generate a mindmap structure from syllabus text; update_corpus counts it into the keyword index"""
         # TODO: Implement more sophisticated mindmap generation using graph algorithms
         
-        # Clean and process the text
-        cleaned_text = self.text_processor.clean_text(syllabus_text)
-        topics = self.text_processor.extract_topics(cleaned_text)
-        keywords = self.text_processor.extract_keywords(cleaned_text, 15)
+        with metrics.stage('mindmap.total', size=len(syllabus_text)):
+            if len(syllabus_text) > self.chunk_size:
+                return self._generate_mindmap_chunked(syllabus_text, days_remaining, update_corpus)
+            return self._generate_mindmap(syllabus_text, days_remaining, update_corpus)
+    
+    def _generate_mindmap_chunked(self, syllabus_text: str, days_remaining: int = None,
+                                  update_corpus: bool = False) -> Dict[str, Any]:
+        """generate_mindmap's result assembled from the unit-by-unit stream
         
-        # Add central node (course/subject)
-        G = nx.DiGraph() # Initialize the graph
-        central_node = "Course Overview"
-        G.add_node(central_node, type="central", level=0)
+        The whole-document views (cleaned copy, token lists) are never built;
+        beyond the input and the result, memory is bounded by chunk_size.
+        Complexity figures can differ slightly, as noted on generate_mindmap_stream.
+        """
+        nodes: List[Dict[str, Any]] = []
+        root_edges: List[Dict[str, str]] = []
+        unit_edges: List[Dict[str, str]] = []
+        summary: Dict[str, Any] = {}
+        for chunk in self._generate_mindmap_stream(syllabus_text, days_remaining, update_corpus):
+            if chunk['type'] == 'unit':
+                nodes.extend(chunk['nodes'])
+                # The root's edges come first, as in the single-tree layout
+                root_edges.append(chunk['edges'][0])
+                unit_edges.extend(chunk['edges'][1:])
+            elif chunk['type'] == 'root':
+                nodes.extend(chunk['nodes'])
+            else:
+                summary = chunk
+        return {
+            'mindmap': {
+                'nodes': nodes,
+                'edges': root_edges + unit_edges,
+                'metadata': summary['mindmap']['metadata']
+            },
+            'analysis': summary['analysis'],
+            'suggestions': summary['suggestions']
+        }
+    
+    def _generate_mindmap(self, syllabus_text: str, days_remaining: int = None,
+                          update_corpus: bool = False) -> Dict[str, Any]:
+        # Tokenize once and share the document across every analysis step
+        document = self.text_processor.build_document(syllabus_text)
+        with metrics.stage('mindmap.clean_text', size=len(syllabus_text)):
+            document.lines  # cleans every line once and caches the result
+        with metrics.stage('mindmap.extract_topics'):
+            topics = self.text_processor.extract_topics(document)
+        # Tokenization happens on first use, so it is attributed to keyword extraction
+        with metrics.stage('mindmap.extract_keywords'):
+            keywords = self.text_processor.extract_keywords(document, 15, update_corpus)
         
-        # Traverse topics (Units) and subtopics
-        for unit in topics:
-            unit_id = unit['id']
-            # Add Unit Node
-            G.add_node(unit_id, 
-                      title=unit['title'], 
-                      type='unit', 
-                      level=1,
-                      content=unit['content'])
-            
-            # Connect Unit to Central Node
-            G.add_edge(central_node, unit_id)
-            
-            # Connect Subtopics to Unit
-            for subtopic in unit.get('subtopics', []):
-                sub_id = subtopic['id']
-                G.add_node(sub_id, 
-                          title=subtopic['title'][:50], # Truncate long titles
-                          type='topic', 
-                          level=2,
-                          content=subtopic['content'])
-                G.add_edge(unit_id, sub_id)
-
-        # Removed random keyword linking logic to ensure clean hierarchy
+        # Build the course -> unit -> topic hierarchy
+        with metrics.stage('mindmap.build_graph'):
+            if self.graph_backend == 'networkx':
+                nodes, edges = self._build_networkx(topics)
+            else:
+                nodes, edges = self._build_tree(topics).to_frontend()
         
         # Calculate some basic statistics
-        complexity_analysis = self.text_processor.analyze_complexity(syllabus_text)
+        with metrics.stage('mindmap.analyze_complexity'):
+            complexity_analysis = self.text_processor.analyze_complexity(document)
+        
+        with metrics.stage('mindmap.study_suggestions'):
+            suggestions = self._generate_study_suggestions(topics, complexity_analysis, days_remaining)
         
-        # Convert graph to nodes and edges for frontend
-        nodes = [{"id": n, "label": G.nodes[n].get("title", n), "level": G.nodes[n].get("level", 0)} for n in G.nodes]
-        edges = [{"source": u, "target": v} for u, v in G.edges]
-
         return {
             'mindmap': {
                 'nodes': nodes,
@@ -68,21 +103,170 @@ class MindmapGenerator:
                 'topics': topics[:5],  # Return top 5 topics for preview
                 'keywords': keywords[:10]  # Return top 10 keywords
             },
-            'suggestions': self._generate_study_suggestions(topics, complexity_analysis, days_remaining)
+            'suggestions': suggestions
         }
     
 
 
-    # Better approach: I will rely on the fact that I am replacing the METHOD content. 
-    # But wait, the tool requires me to replace specific chunks or the whole file. 
-    # The previous file content I saw for mindmap_generator.py was cut off or had G.add_node which was not defined in the scope I saw.
-    # Actually, looking at the file provided in step 830, there was `G` usage but `G` wasn't defined in `generate_mindmap`.
-    # It must have been imported or I missed something. 
-    # Let's look closer at 830. `import networkx as nx`. 
-    # Logic in 830 lines 20+ uses `G`. `G` is NOT defined in `generate_mindmap`. This implies the code I saw earlier might be buggy or incomplete or I missed a line. 
-    # Ah, I see `G = nx.DiGraph()` is likely missing in the snippet I viewed or it was implicit? 
-    # No, step 830 shows `G` being used without definition. The user code might be broken or I should define it.
-    # However, my task is to update suggestions.
+    def generate_mindmap_stream(self, syllabus_text: str, days_remaining: int = None,
+                                update_corpus: bool = False) -> Iterator[Dict[str, Any]]:
+        """Generate the mindmap incrementally for very large syllabi
+        
+        Yields a 'root' chunk, then one 'unit' chunk with that unit's nodes
+        and edges as soon as the unit closes, then a 'summary' trailer with
+        the analysis and suggestions. Only the current unit, the keyword
+        counts and a five-unit preview are held in memory. Sentences are
+        segmented per unit, so complexity figures can differ slightly from
+        generate_mindmap on text whose sentences span unit boundaries.
+        """
+        # Timed as a whole (including time the consumer spends between chunks)
+        with metrics.stage('mindmap.stream_total', size=len(syllabus_text)):
+            yield from self._generate_mindmap_stream(syllabus_text, days_remaining, update_corpus)
+    
+    def _generate_mindmap_stream(self, syllabus_text: str, days_remaining: int = None,
+                                 update_corpus: bool = False) -> Iterator[Dict[str, Any]]:
+        yield {'type': 'root', 'nodes': [{"id": CENTRAL_NODE, "label": CENTRAL_NODE, "level": 0}], 'edges': []}
+        
+        keyword_freq = Counter()
+        # Same digest as text_processor.document_id, built as the lines go by
+        doc_digest = hashlib.sha256()
+        total_sentences = total_words = total_word_chars = 0
+        topics_preview = []
+        topic_types = set()
+        topics_count = 0
+        total_nodes = 1
+        total_edges = 0
+        
+        for unit, lines in self.text_processor.iter_topic_segments(iter_clean_lines(syllabus_text)):
+            tree = MindmapTree(CENTRAL_NODE)
+            self._add_unit(tree, unit)
+            nodes, edges = tree.to_frontend()
+            yield {'type': 'unit', 'unit_id': unit['id'], 'nodes': nodes[1:], 'edges': edges}
+            
+            # Fold this unit's text into the running keyword and complexity totals
+            for line in lines:
+                doc_digest.update(line.encode('utf-8'))
+                doc_digest.update(b'\n')
+            sentences, words, word_chars = self.unit_aggregates(lines, keyword_freq)
+            total_sentences += sentences
+            total_words += words
+            total_word_chars += word_chars
+            
+            topics_count += 1
+            total_nodes += len(nodes) - 1
+            total_edges += len(edges)
+            topic_types.add(unit['type'])
+            if len(topics_preview) < 5:
+                topics_preview.append(unit)
+        
+        keywords = self.text_processor.rank_keywords(
+            keyword_freq, 15, doc_digest.hexdigest() if update_corpus else None
+        )
+        complexity_analysis = self.text_processor.complexity_from_counts(total_sentences, total_words, total_word_chars)
+        yield {
+            'type': 'summary',
+            'mindmap': {
+                'metadata': {
+                    'total_nodes': total_nodes,
+                    'total_edges': total_edges,
+                    'topics_count': topics_count,
+                    'keywords_count': len(keywords)
+                }
+            },
+            'analysis': {
+                'complexity': complexity_analysis,
+                'topics': topics_preview,
+                'keywords': keywords[:10]
+            },
+            # Only topic types are consulted, so pass one stand-in per type instead of every unit
+            'suggestions': self._generate_study_suggestions(
+                [{'type': topic_type} for topic_type in topic_types], complexity_analysis, days_remaining
+            )
+        }
+    
+    def unit_aggregates(self, lines: List[str], keyword_freq: Counter) -> Tuple[int, int, int]:
+        """Tokenize one unit's lines, adding its keyword counts to keyword_freq
+        
+        Returns the unit's sentence, word and word-character counts, which
+        complexity_from_counts turns into complexity figures once summed.
+        """
+        total_sentences = total_words = total_word_chars = 0
+        for piece in self._text_pieces(lines):
+            for words in self.text_processor.segment(piece):
+                total_sentences += 1
+                total_words += len(words)
+                total_word_chars += sum(len(word) for word in words)
+                self.text_processor.keyword_counts((word.lower() for word in words), keyword_freq)
+        return total_sentences, total_words, total_word_chars
+    
+    def _text_pieces(self, lines: List[str]) -> Iterator[str]:
+        """Lines joined into texts of at most chunk_size characters (longer single lines stay whole)"""
+        batch: List[str] = []
+        size = 0
+        for line in lines:
+            if batch and size + len(line) > self.chunk_size:
+                yield ' '.join(batch)
+                batch = []
+                size = 0
+            batch.append(line)
+            size += len(line) + 1
+        if batch:
+            yield ' '.join(batch)
+    
+    def _add_unit(self, tree: MindmapTree, unit: Dict[str, Any]) -> None:
+        """Attach a unit below the tree root and each subtopic below its parent"""
+        unit_node = tree.add_child(tree.root, unit['id'], unit['title'], 1, 'unit', unit['content'])
+        parents = {unit['id']: unit_node}
+        for subtopic in unit.get('subtopics', []):
+            parent = parents.get(subtopic.get('parent'), unit_node)
+            parents[subtopic['id']] = tree.add_child(
+                parent, subtopic['id'], subtopic['title'][:50],  # Truncate long titles
+                subtopic.get('level', 2), 'topic', subtopic['content']
+            )
+    
+    def _build_tree(self, topics: List[Dict[str, Any]]) -> MindmapTree:
+        """Build the mindmap as a MindmapTree"""
+        tree = MindmapTree(CENTRAL_NODE)
+        for unit in topics:
+            self._add_unit(tree, unit)
+        return tree
+    
+    def build_graph(self, topics: List[Dict[str, Any]]):
+        """Build the mindmap as a networkx DiGraph (imports networkx on first use)"""
+        import networkx as nx
+        G = nx.DiGraph()
+        G.add_node(CENTRAL_NODE, type="central", level=0)
+        
+        # Traverse topics (Units) and subtopics
+        for unit in topics:
+            unit_id = unit['id']
+            # Add Unit Node
+            G.add_node(unit_id, 
+                      title=unit['title'], 
+                      type='unit', 
+                      level=1,
+                      content=unit['content'])
+            
+            # Connect Unit to Central Node
+            G.add_edge(CENTRAL_NODE, unit_id)
+            
+            # Connect Subtopics to their parent (the Unit or an enclosing subtopic)
+            for subtopic in unit.get('subtopics', []):
+                sub_id = subtopic['id']
+                G.add_node(sub_id, 
+                          title=subtopic['title'][:50], # Truncate long titles
+                          type='topic', 
+                          level=subtopic.get('level', 2),
+                          content=subtopic['content'])
+                G.add_edge(subtopic.get('parent', unit_id), sub_id)
+        return G
+    
+    def _build_networkx(self, topics: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        """Build the mindmap through networkx and flatten it for the frontend"""
+        G = self.build_graph(topics)
+        nodes = [{"id": n, "label": G.nodes[n].get("title", n), "level": G.nodes[n].get("level", 0)} for n in G.nodes]
+        edges = [{"source": u, "target": v} for u, v in G.edges]
+        return nodes, edges
     
     def _generate_study_suggestions(self, topics: List[Dict], complexity: Dict, days_remaining: int = None) -> List[str]:
         """Generate study suggestions based on content analysis and exam time"""
@@ -0,0 +1,48 @@
+from typing import Any, Dict, List, Tuple
+
+
+class MindmapNode:
+    """A single node of the mindmap tree"""
+    __slots__ = ('id', 'label', 'level', 'type', 'content', 'children')
+
+    def __init__(self, node_id: str, label: str, level: int, node_type: str, content: str = ''):
+        self.id = node_id
+        self.label = label
+        self.level = level
+        self.type = node_type
+        self.content = content
+        self.children: List['MindmapNode'] = []
+
+
+class MindmapTree:
+    """Compact tree for the strict course -> unit -> topic hierarchy
+
+    Emits the frontend node/edge lists directly, in the same order the
+    equivalent networkx DiGraph would produce (nodes in insertion order,
+    edges grouped by source node).
+    """
+    __slots__ = ('root', '_nodes')
+
+    def __init__(self, root_id: str, root_type: str = 'central'):
+        self.root = MindmapNode(root_id, root_id, 0, root_type)
+        self._nodes: List[MindmapNode] = [self.root]
+
+    def add_child(self, parent: MindmapNode, node_id: str, label: str, level: int,
+                  node_type: str, content: str = '') -> MindmapNode:
+        node = MindmapNode(node_id, label, level, node_type, content)
+        parent.children.append(node)
+        self._nodes.append(node)
+        return node
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def to_frontend(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        """Node and edge lists in the format the frontend renders"""
+        nodes = [{"id": node.id, "label": node.label, "level": node.level} for node in self._nodes]
+        edges = [
+            {"source": node.id, "target": child.id}
+            for node in self._nodes
+            for child in node.children
+        ]
+        return nodes, edges
@@ -0,0 +1,280 @@
+"""
+Incremental mindmap regeneration from syllabus edits
+
+Every generated version is stored as a list of unit records: the unit's
+content digest, its topic structure (with stable node ids) and its
+keyword, sentence and word aggregates. Given the id of a stored version
+and the edited text, only units whose lines changed are tokenized again;
+the rest reuse their stored aggregates, and the response carries a
+node/edge delta against the base version instead of the whole mindmap.
+
+Node ids stay stable across versions: an unchanged unit keeps its id, an
+edited unit keeps the id of the stored unit with the same header line, and
+new units get ids that were never used before in the version's lineage.
+Subtopics are matched by title within their unit the same way. Because
+the ids depend on the lineage, a version id covers the text and the base
+it was derived from: the same text generated from scratch, or from
+another base, is a different version and never replaces a stored one.
+"""
+
+import hashlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .cache import ResultCache
+from .metrics import metrics
+from .mindmap_generator import CENTRAL_NODE, MindmapGenerator
+from .mindmap_tree import MindmapTree
+from .text_processor import OVERVIEW_UNIT_ID, document_id, iter_clean_lines
+
+_VERSION_KEY_PREFIX = 'mindmap-version:'
+
+
+def segment_digest(lines: List[str]) -> str:
+    """Content hash of one unit's cleaned lines"""
+    digest = hashlib.sha256()
+    for line in lines:
+        digest.update(line.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def version_key(content_id: str, base_version_id: Optional[str]) -> str:
+    """Version id of a text (by its document_id) derived from base_version_id, or from scratch for None"""
+    if base_version_id is None:
+        return content_id
+    return hashlib.sha256(f"{base_version_id}:{content_id}".encode('utf-8')).hexdigest()
+
+
+def _id_index(node_id: str) -> int:
+    """Trailing number of a unit or subtopic id (unit_3 -> 3, unit_3_sub_2 -> 2)"""
+    return int(node_id.rsplit('_', 1)[1])
+
+
+class MindmapVersionStore:
+    """Stored versions keyed by version id, in a ResultCache (memory LRU plus optional SQLite tier)"""
+
+    def __init__(self, cache: ResultCache):
+        self.cache = cache
+
+    def get(self, version_id: str) -> Optional[Dict[str, Any]]:
+        return self.cache.get(_VERSION_KEY_PREFIX + version_id)
+
+    def put(self, version_id: str, record: Dict[str, Any]) -> None:
+        self.cache.set(_VERSION_KEY_PREFIX + version_id, record)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+class IncrementalMindmapGenerator:
+    """Regenerates mindmaps from a stored base version, reparsing only edited units"""
+
+    def __init__(self, generator: MindmapGenerator, store: MindmapVersionStore):
+        self.generator = generator
+        self.store = store
+
+    def generate(self, syllabus_text: str, base_version_id: Optional[str] = None,
+                 days_remaining: int = None, include_graph: bool = False,
+                 update_corpus: bool = False) -> Dict[str, Any]:
+        """Mindmap for syllabus_text as a delta against base_version_id
+
+        Falls back to a full mindmap ('mode': 'full') when no base is given
+        or the base version is no longer stored. With include_graph the
+        whole node and edge lists are returned instead of the delta.
+        update_corpus counts the text into the keyword index.
+        """
+        with metrics.stage('mindmap.incremental_total', size=len(syllabus_text)):
+            return self._generate(syllabus_text, base_version_id, days_remaining, include_graph, update_corpus)
+
+    def _generate(self, syllabus_text: str, base_version_id: Optional[str], days_remaining: int,
+                  include_graph: bool = False, update_corpus: bool = False) -> Dict[str, Any]:
+        base = self.store.get(base_version_id) if base_version_id else None
+        lines = list(iter_clean_lines(syllabus_text))
+        content_id = document_id(lines)
+        # A base that is no longer stored means a fresh lineage, so it does not count
+        version_id = version_key(content_id, base_version_id if base is not None else None)
+        segments = list(self.generator.text_processor.iter_topic_segments(lines))
+
+        units, next_unit, reparsed, removed = self._match_units(segments, base)
+        self.store.put(version_id, {'units': units, 'next_unit': next_unit})
+
+        # Keywords and complexity from the per-unit aggregates, stored or fresh
+        keyword_freq = Counter()
+        total_sentences = total_words = total_word_chars = 0
+        for record in units:
+            keyword_freq.update(record['keywords'])
+            total_sentences += record['sentences']
+            total_words += record['words']
+            total_word_chars += record['word_chars']
+        text_processor = self.generator.text_processor
+        keywords = text_processor.rank_keywords(keyword_freq, 15, content_id if update_corpus else None)
+        complexity_analysis = text_processor.complexity_from_counts(total_sentences, total_words, total_word_chars)
+
+        topics = [record['unit'] for record in units]
+        nodes, edges = self._frontend(topics)
+        mindmap: Dict[str, Any] = {
+            'metadata': {
+                'total_nodes': len(nodes),
+                'total_edges': len(edges),
+                'topics_count': len(topics),
+                'keywords_count': len(keywords)
+            }
+        }
+        result = {
+            'version_id': version_id,
+            'base_version_id': base_version_id,
+            'mode': 'delta' if base is not None else 'full',
+            'mindmap': mindmap,
+            'analysis': {
+                'complexity': complexity_analysis,
+                'topics': topics[:5],
+                'keywords': keywords[:10]
+            },
+            'suggestions': self.generator._generate_study_suggestions(topics, complexity_analysis, days_remaining),
+            'units': {
+                'total': len(units),
+                'reused': len(units) - reparsed,
+                'reparsed': reparsed,
+                'removed': removed
+            }
+        }
+        if base is None or include_graph:
+            mindmap['nodes'] = nodes
+            mindmap['edges'] = edges
+        else:
+            base_nodes, base_edges = self._frontend([record['unit'] for record in base['units']])
+            result['delta'] = self._delta(base_nodes, base_edges, nodes, edges)
+        return result
+
+    def record(self, syllabus_text: str) -> str:
+        """Store syllabus_text as a fresh version without building a mindmap; returns its version id"""
+        with metrics.stage('mindmap.incremental_record', size=len(syllabus_text)):
+            lines = list(iter_clean_lines(syllabus_text))
+            version_id = version_key(document_id(lines), None)
+            if self.store.get(version_id) is None:
+                segments = list(self.generator.text_processor.iter_topic_segments(lines))
+                units, next_unit, _, _ = self._match_units(segments, None)
+                self.store.put(version_id, {'units': units, 'next_unit': next_unit})
+            return version_id
+
+    def _match_units(self, segments: List[Tuple[Dict[str, Any], List[str]]],
+                     base: Optional[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int, int, int]:
+        """Unit records for the new segments, reusing base records where possible
+
+        Returns the records, the next free unit index, how many units had
+        to be tokenized again and how many base units were dropped.
+        """
+        digests = [segment_digest(lines) for _, lines in segments]
+        if base is None:
+            # First version: keep the ids extract_topics assigns
+            units = [self._build_record(unit, lines, digest) for (unit, lines), digest in zip(segments, digests)]
+            next_unit = max((_id_index(record['unit']['id']) for record in units), default=0) + 1
+            return units, next_unit, len(units), 0
+
+        base_units = base['units']
+        next_unit = base['next_unit']
+        matched: List[Optional[Dict[str, Any]]] = [None] * len(segments)
+        taken = set()
+
+        # Pass 1: units whose content is unchanged keep their record as is
+        by_digest: Dict[str, List[int]] = {}
+        for index, record in enumerate(base_units):
+            by_digest.setdefault(record['digest'], []).append(index)
+        for position, digest in enumerate(digests):
+            candidates = by_digest.get(digest)
+            if candidates:
+                index = candidates.pop(0)
+                matched[position] = base_units[index]
+                taken.add(index)
+        unused = [index for index in range(len(base_units)) if index not in taken]
+
+        # Pass 2: edited units keep the id of the stored unit with the same header
+        by_header: Dict[str, List[int]] = {}
+        for index in unused:
+            by_header.setdefault(self._header_key(base_units[index]['unit']), []).append(index)
+
+        units = []
+        reparsed = 0
+        for position, ((unit, lines), digest) in enumerate(zip(segments, digests)):
+            record = matched[position]
+            if record is None:
+                with metrics.stage('mindmap.incremental_reparse', size=sum(len(line) for line in lines)):
+                    candidates = by_header.get(self._header_key(unit))
+                    previous = base_units[candidates.pop(0)]['unit'] if candidates else None
+                    if previous is not None:
+                        unit_id = previous['id']
+                    elif unit['id'] == OVERVIEW_UNIT_ID:
+                        unit_id = OVERVIEW_UNIT_ID
+                    else:
+                        unit_id = f"unit_{next_unit}"
+                        next_unit += 1
+                    record = self._build_record(self._relabel(unit, unit_id, previous), lines, digest)
+                reparsed += 1
+            units.append(record)
+        removed = sum(len(candidates) for candidates in by_header.values())
+        return units, next_unit, reparsed, removed
+
+    def _build_record(self, unit: Dict[str, Any], lines: List[str], digest: str) -> Dict[str, Any]:
+        keyword_freq = Counter()
+        sentences, words, word_chars = self.generator.unit_aggregates(lines, keyword_freq)
+        # Plain dicts keep records JSON-serializable for the SQLite tier
+        return {
+            'digest': digest,
+            'unit': unit,
+            'keywords': dict(keyword_freq),
+            'sentences': sentences,
+            'words': words,
+            'word_chars': word_chars
+        }
+
+    @staticmethod
+    def _header_key(unit: Dict[str, Any]) -> str:
+        # The overview has no header line of its own, so it only ever matches itself
+        return OVERVIEW_UNIT_ID if unit['id'] == OVERVIEW_UNIT_ID else unit['title']
+
+    @staticmethod
+    def _relabel(unit: Dict[str, Any], unit_id: str, previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Copy of unit under unit_id, with subtopics keeping the ids of same-titled subtopics in previous"""
+        old_ids: Dict[str, List[str]] = {}
+        next_sub = 1
+        if previous is not None:
+            for subtopic in previous['subtopics']:
+                old_ids.setdefault(subtopic['title'], []).append(subtopic['id'])
+                next_sub = max(next_sub, _id_index(subtopic['id']) + 1)
+
+        # Parent references follow their nodes to the new ids
+        renamed = {unit['id']: unit_id}
+        subtopics = []
+        for subtopic in unit['subtopics']:
+            reusable = old_ids.get(subtopic['title'])
+            if reusable:
+                sub_id = reusable.pop(0)
+            else:
+                sub_id = f"{unit_id}_sub_{next_sub}"
+                next_sub += 1
+            renamed[subtopic['id']] = sub_id
+            subtopics.append({**subtopic, 'id': sub_id, 'parent': renamed[subtopic.get('parent', unit['id'])]})
+        return {**unit, 'id': unit_id, 'subtopics': subtopics}
+
+    def _frontend(self, topics: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        tree = MindmapTree(CENTRAL_NODE)
+        for unit in topics:
+            self.generator._add_unit(tree, unit)
+        return tree.to_frontend()
+
+    @staticmethod
+    def _delta(base_nodes: List[Dict[str, Any]], base_edges: List[Dict[str, str]],
+               nodes: List[Dict[str, Any]], edges: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Changes that turn the base node/edge lists into the new ones"""
+        old_nodes = {node['id']: node for node in base_nodes}
+        new_ids = {node['id'] for node in nodes}
+        old_edges = {(edge['source'], edge['target']) for edge in base_edges}
+        new_edges = {(edge['source'], edge['target']) for edge in edges}
+        return {
+            'added_nodes': [node for node in nodes if node['id'] not in old_nodes],
+            'updated_nodes': [node for node in nodes if node['id'] in old_nodes and old_nodes[node['id']] != node],
+            'removed_node_ids': [node['id'] for node in base_nodes if node['id'] not in new_ids],
+            'added_edges': [edge for edge in edges if (edge['source'], edge['target']) not in old_edges],
+            'removed_edges': [edge for edge in base_edges if (edge['source'], edge['target']) not in new_edges]
+        }
@@ -0,0 +1,139 @@
+"""
+Near-duplicate syllabus detection with MinHash and LSH
+
+Syllabi of different sections or years often differ only by whitespace,
+dates or a line or two, so their exact cache keys differ. Each indexed
+syllabus is reduced to a MinHash signature of its word shingles (lower
+case, digits masked so dates and years do not count as differences); the
+fraction of equal signature slots estimates the Jaccard similarity of the
+shingle sets. Signatures are split into bands and bucketed by band
+(locality-sensitive hashing), so a lookup only compares against syllabi
+that share at least one band rather than scanning the whole index.
+"""
+
+import re
+import string
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+_DIGITS = re.compile(r'\d+')
+# Multiplier combining word hashes into a shingle hash (odd, so no information is shifted out)
+_SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+# Shingles hashed per block, bounding the (num_perm x block) working array
+_BLOCK = 8192
+_EMPTY = np.iinfo(np.uint64).max
+
+
+class NearDuplicateIndex:
+    """Bounded, in-process MinHash/LSH index from syllabus signatures to their keys"""
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, shingle_size: int = 4,
+                 threshold: float = 0.8, capacity: int = 10000, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        # Lowest estimated similarity reported as a match
+        self.threshold = threshold
+        self.capacity = capacity
+        rng = np.random.default_rng(seed)
+        # h -> a * h + b (mod 2**64) with odd a is a permutation of 64-bit hashes
+        self._a = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._signatures: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = {}
+        self.queries = 0
+        self.matches = 0
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Distinct hashes of the text's word shingles"""
+        tokens = text.lower().split()
+        vocabulary: Dict[str, int] = {}
+        ids = np.fromiter((vocabulary.setdefault(t, len(vocabulary)) for t in tokens), dtype=np.int64, count=len(tokens))
+        # Punctuation and digits are normalized once per distinct token, not per occurrence
+        words = [_DIGITS.sub('0', token.strip(string.punctuation)) for token in vocabulary]
+        keep = np.fromiter((bool(word) for word in words), dtype=bool, count=len(words))[ids]
+        if not keep.any():
+            return np.zeros(0, dtype=np.uint64)
+        # hash() is salted per process, which is fine: signatures never leave the process that made them
+        word_hashes = np.fromiter((hash(word) for word in words), dtype=np.int64, count=len(words))
+        hashes = word_hashes.view(np.uint64)[ids[keep]]
+        size = min(self.shingle_size, len(hashes))
+        shingles = hashes[:len(hashes) - size + 1].copy()
+        with np.errstate(over='ignore'):
+            for offset in range(1, size):
+                shingles = shingles * _SHINGLE_MULTIPLIER + hashes[offset:len(hashes) - size + 1 + offset]
+        return np.unique(shingles)
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature (num_perm uint64 values) of a text"""
+        shingles = self.shingles(text)
+        signature = np.full(self.num_perm, _EMPTY, dtype=np.uint64)
+        buffer = np.empty((self.num_perm, min(_BLOCK, len(shingles))), dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for start in range(0, len(shingles), _BLOCK):
+                block = shingles[start:start + _BLOCK]
+                permuted = buffer[:, :len(block)]
+                np.multiply(self._a[:, None], block[None, :], out=permuted)
+                np.add(permuted, self._b[:, None], out=permuted)
+                np.minimum(signature, permuted.min(axis=1), out=signature)
+        return signature
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def query(self, signature: np.ndarray, exclude: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Most similar indexed key and its estimated similarity, if at least threshold"""
+        if (signature == _EMPTY).all():
+            return None  # no words, nothing to compare
+        with self._lock:
+            self.queries += 1
+            candidates: Set[str] = set()
+            for band_key in self._band_keys(signature):
+                candidates.update(self._buckets.get(band_key, ()))
+            candidates.discard(exclude)
+            best: Optional[Tuple[str, float]] = None
+            for key in candidates:
+                similarity = float(np.mean(self._signatures[key] == signature))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (key, similarity)
+            if best is not None:
+                self.matches += 1
+            return best
+
+    def add(self, key: str, signature: np.ndarray) -> None:
+        """Index a signature under key, evicting the oldest entries beyond capacity"""
+        if (signature == _EMPTY).all():
+            return
+        with self._lock:
+            if key in self._signatures:
+                self._signatures.move_to_end(key)
+                return
+            self._signatures[key] = signature
+            for band_key in self._band_keys(signature):
+                self._buckets.setdefault(band_key, set()).add(key)
+            while len(self._signatures) > self.capacity:
+                old_key, old_signature = self._signatures.popitem(last=False)
+                for band_key in self._band_keys(old_signature):
+                    bucket = self._buckets.get(band_key)
+                    if bucket is not None:
+                        bucket.discard(old_key)
+                        if not bucket:
+                            del self._buckets[band_key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'entries': len(self._signatures),
+                'queries': self.queries,
+                'matches': self.matches
+            }
@@ -0,0 +1,153 @@
+"""
+Lazy access to NLTK/TextBlob resources
+
+Importing nltk and textblob, checking for corpora and loading the punkt
+model and stopword list all happen on first use instead of at import time,
+so the service process starts quickly. warm_up() loads everything up front;
+call it at startup (or before forking/snapshotting) to take the cost once.
+Without a warm-up the resources count as ready once first use has checked
+the data on disk and loaded the stopword list, which every text path needs
+(punkt is only loaded for accurate segmentation).
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, FrozenSet, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# (resource path, download package) pairs the text pipeline needs
+REQUIRED_RESOURCES = [
+    ('tokenizers/punkt', 'punkt'),
+    ('tokenizers/punkt_tab', 'punkt_tab'),
+    ('corpora/stopwords', 'stopwords'),
+]
+
+_lock = threading.RLock()
+_resources_checked = False
+_stop_words: Optional[FrozenSet[str]] = None
+_abbreviations: Optional[FrozenSet[str]] = None
+_ready = False
+_warm_up_seconds: Optional[float] = None
+_warm_up_error: Optional[str] = None
+
+
+def ensure_resources() -> None:
+    """Make sure the NLTK data is on disk, downloading anything missing (once per process)
+
+    Raises LookupError when a resource can be neither found nor downloaded.
+    """
+    global _resources_checked
+    if _resources_checked:
+        return
+    with _lock:
+        if _resources_checked:
+            return
+        import nltk
+        for path, package in REQUIRED_RESOURCES:
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                logger.info(f"Downloading NLTK resource: {package}")
+                if not nltk.download(package, quiet=True):
+                    raise LookupError(f"NLTK resource {package} is missing and could not be downloaded")
+        _resources_checked = True
+
+
+def get_stop_words() -> FrozenSet[str]:
+    """English stopword set, loaded on first use"""
+    global _stop_words, _ready
+    if _stop_words is None:
+        with _lock:
+            if _stop_words is None:
+                ensure_resources()
+                import nltk
+                _stop_words = frozenset(nltk.corpus.stopwords.words('english'))
+                _ready = True
+    return _stop_words
+
+
+def get_abbreviations() -> FrozenSet[str]:
+    """Abbreviations of punkt's English model (lowercase, without the final period), read on first use
+
+    Only the model's word list is read; the fast segmentation uses it to
+    skip the same periods punkt does without loading the tokenizer. A
+    missing list raises LookupError rather than leaving the set empty, which
+    would end a sentence after every abbreviation.
+    """
+    global _abbreviations
+    if _abbreviations is None:
+        with _lock:
+            if _abbreviations is None:
+                ensure_resources()
+                import nltk
+                try:
+                    path = nltk.data.find('tokenizers/punkt_tab/english/abbrev_types.txt')
+                except LookupError as e:
+                    raise LookupError(f"punkt_tab abbreviation list not found (needs nltk>=3.9): {e}") from e
+                with open(path, encoding='utf-8') as f:
+                    _abbreviations = frozenset(line.strip() for line in f if line.strip())
+    return _abbreviations
+
+
+def sent_tokenize(text: str) -> List[str]:
+    """Punkt sentence segmentation, as used by TextBlob"""
+    ensure_resources()
+    from textblob.tokenizers import sent_tokenize as textblob_sent_tokenize
+    return list(textblob_sent_tokenize(text))
+
+
+def word_tokenize(sentence: str) -> List[str]:
+    """Word tokens of one already-segmented sentence, without punctuation (TextBlob semantics)"""
+    from nltk.tokenize import word_tokenize as nltk_word_tokenize
+    from textblob.utils import strip_punc
+    words = []
+    # preserve_line skips NLTK's own sentence split; the caller has done that already
+    for token in nltk_word_tokenize(sentence, preserve_line=True):
+        stripped = strip_punc(token, all=False)
+        if stripped:
+            words.append(token if token.startswith("'") else stripped)
+    return words
+
+
+def text_blob(text: str) -> Any:
+    """Build a TextBlob (imports textblob on first use)"""
+    ensure_resources()
+    from textblob import TextBlob
+    return TextBlob(text)
+
+
+def warm_up() -> float:
+    """Load every resource the hot path needs and return how long it took"""
+    global _ready, _warm_up_seconds, _warm_up_error
+    start = time.perf_counter()
+    try:
+        get_stop_words()
+        get_abbreviations()
+        # Tokenizing a sample loads and caches the punkt model
+        for sentence in sent_tokenize("Warm up the tokenizer. It loads the punkt model."):
+            word_tokenize(sentence)
+    except Exception as e:
+        # Loading the stopwords alone does not make a failed warm-up ready
+        _ready = False
+        _warm_up_error = str(e)
+        logger.error(f"NLP warm-up failed: {e}")
+        raise
+    _warm_up_seconds = time.perf_counter() - start
+    _warm_up_error = None
+    _ready = True
+    logger.info(f"NLP resources loaded in {_warm_up_seconds:.2f}s")
+    return _warm_up_seconds
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+def status() -> Dict[str, Any]:
+    return {
+        'ready': _ready,
+        'warm_up_seconds': round(_warm_up_seconds, 3) if _warm_up_seconds is not None else None,
+        'error': _warm_up_error
+    }
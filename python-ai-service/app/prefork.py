@@ -0,0 +1,173 @@
+"""
+Pre-fork process manager for production deployments
+
+The parent process imports the application, loads NLTK data, the keyword
+index mapping and the generator/engine singletons once, then forks the
+workers. Everything loaded before the fork is shared copy-on-write;
+gc.freeze() moves it out of the collector's reach so garbage collection
+in the workers does not touch (and privately copy) those pages.
+
+Workers are plain uvicorn servers on the inherited listening socket. The
+parent only supervises:
+
+- a worker that exits (crash, or recycling after its request limit) is
+  replaced, with a short back-off if workers keep dying right after start
+- SIGHUP gracefully recycles every worker, one at a time
+- SIGTERM / SIGINT stop all workers, waiting up to the graceful timeout
+  for in-flight requests before killing stragglers
+"""
+
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import time
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+
+logger = logging.getLogger(__name__)
+
+# A worker that dies sooner than this after starting counts as a crash loop
+_MIN_WORKER_LIFETIME = 1.0
+
+
+class PreforkServer:
+    """Forks and supervises uvicorn workers that share one listening socket"""
+
+    def __init__(self, app: Any, host: str = '0.0.0.0', port: int = 8000, workers: int = 2,
+                 max_requests: int = 0, max_requests_jitter: int = 0,
+                 graceful_timeout: float = 30.0, log_level: str = 'info'):
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("Pre-fork mode needs os.fork (not available on this platform)")
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self._socket: Optional[socket.socket] = None
+        self._children: Dict[int, float] = {}  # pid -> start time
+        self._stopping = False
+        self._recycle_pending: List[int] = []
+
+    def run(self) -> None:
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.host, self.port))
+        self._socket.listen(2048)
+        self._socket.set_inheritable(True)
+
+        # Objects created so far are shared with the workers; keep the GC from writing to them
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_recycle)
+
+        logger.info(f"Pre-fork server on {self.host}:{self.port} with {self.workers} workers (pid {os.getpid()})")
+        for _ in range(self.workers):
+            self._spawn()
+        try:
+            self._supervise()
+        finally:
+            self._socket.close()
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker()  # never returns
+        self._children[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+
+    def _run_worker(self) -> None:
+        exit_code = 0
+        try:
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, signal.SIG_DFL)  # uvicorn installs its own graceful handlers
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            limit = None
+            if self.max_requests:
+                # Jitter keeps workers from all recycling at the same moment
+                limit = self.max_requests + random.randint(0, self.max_requests_jitter)
+            config = uvicorn.Config(
+                self.app,
+                log_level=self.log_level,
+                limit_max_requests=limit,
+                timeout_graceful_shutdown=self.graceful_timeout
+            )
+            uvicorn.Server(config).run(sockets=[self._socket])
+        except BaseException:
+            logger.exception(f"Worker {os.getpid()} failed")
+            exit_code = 1
+        finally:
+            # Skip the parent's atexit handlers and buffered state
+            os._exit(exit_code)
+
+    def _handle_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _handle_recycle(self, signum, frame) -> None:
+        # Recycled one at a time in _supervise so capacity never drops by more than a worker
+        self._recycle_pending = list(self._children)
+
+    def _supervise(self) -> None:
+        recycling: Optional[int] = None
+        while not self._stopping:
+            if recycling is None and self._recycle_pending:
+                recycling = self._recycle_pending.pop(0)
+                if recycling in self._children:
+                    logger.info(f"Recycling worker {recycling}")
+                    os.kill(recycling, signal.SIGTERM)
+                else:
+                    recycling = None
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid == 0:
+                time.sleep(0.2)
+                continue
+
+            started = self._children.pop(pid, None)
+            if started is None:
+                continue
+            logger.info(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}")
+            if pid == recycling:
+                recycling = None
+            if not self._stopping:
+                if time.monotonic() - started < _MIN_WORKER_LIFETIME:
+                    time.sleep(_MIN_WORKER_LIFETIME)
+                self._spawn()
+        self._stop_workers()
+
+    def _stop_workers(self) -> None:
+        logger.info(f"Stopping {len(self._children)} workers")
+        for pid in self._children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self._children and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                time.sleep(0.1)
+            else:
+                self._children.pop(pid, None)
+        for pid in list(self._children):
+            logger.warning(f"Killing worker {pid} after the graceful timeout")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self._children.pop(pid, None)
@@ -0,0 +1,307 @@
+"""
+On-demand profiling of executor work and capture of slow requests
+
+Two capture modes, both applied around the function an executor runs:
+
+- 'cprofile': deterministic cProfile of the task's thread. Precise call
+  counts, but it slows the task down noticeably, so it only runs for the
+  sampled fraction of requests (sample_rate).
+- 'stacks': a background thread reads the task thread's stack every
+  sample interval and counts the distinct stacks. Cheap enough to run on
+  every request, so it backs slow-request capture: the stacks of a task
+  that ran for at least slow_threshold_ms are kept, the rest discarded.
+
+Captured profiles are served in formats flame-graph tools load directly:
+stack samples as folded stacks ("frame;frame;frame count" lines, read by
+flamegraph.pl, speedscope and inferno) and cProfile runs as a pstats
+file (snakeviz, flameprof, gprof2dot, pstats itself).
+
+Profiles are kept per worker process in a bounded list. Thread pool tasks
+record their capture when they finish, even if the request already timed
+out; work submitted to a process pool is profiled in the pool process and
+the capture travels back with the result, so a task that times out there
+is not captured.
+"""
+
+import cProfile
+import itertools
+import marshal
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from . import config
+
+PROFILE_MODES = ('cprofile', 'stacks')
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Background thread counting the stacks of registered threads"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._active: Dict[int, Counter] = {}
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+
+    def start(self, thread_id: int) -> Counter:
+        """Begin sampling a thread; returns the counter its folded stacks accumulate in"""
+        stacks: Counter = Counter()
+        with self._lock:
+            self._active[thread_id] = stacks
+            # A forked process inherits the object but not the thread
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return stacks
+
+    def stop(self, thread_id: int) -> None:
+        with self._lock:
+            self._active.pop(thread_id, None)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                idle = not self._active
+                if idle:
+                    self._wake.clear()
+            if idle:
+                self._wake.wait()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    labels = []
+                    # Stacks start at the profiled function, not the pool's thread plumbing
+                    while frame is not None and frame.f_code is not _ROOT_CODE:
+                        labels.append(_frame_label(frame.f_code))
+                        frame = frame.f_back
+                    if labels:
+                        stacks[';'.join(reversed(labels))] += 1
+
+
+def run_profiled(mode: str, interval: float, func: Callable[..., Any], *args: Any) -> Tuple[Any, Dict[str, Any]]:
+    """Run func(*args) under the given capture mode; returns (result, capture)
+
+    Module-level so it can be submitted to a process pool.
+    """
+    profile = None
+    if mode == 'cprofile':
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active (Python 3.12+ allows one at a time)
+            profile = None
+            mode = 'stacks'
+    if mode == 'stacks':
+        sampler = _sampler
+        sampler.interval = interval
+        thread_id = threading.get_ident()
+        stacks = sampler.start(thread_id)
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+    finally:
+        # A failed task still releases the profiler and the sampler slot
+        elapsed = time.perf_counter() - start
+        if profile is not None:
+            profile.disable()
+            profile.create_stats()
+            data: Any = profile.stats
+        else:
+            sampler.stop(thread_id)
+            data = dict(stacks)
+    return result, {'kind': mode, 'seconds': elapsed, 'data': data}
+
+
+def input_size(args: Tuple[Any, ...]) -> Optional[int]:
+    """Size of a task's first argument: characters of a text, records of a list (a dict is one record)"""
+    if not args:
+        return None
+    if isinstance(args[0], (str, list)):
+        return len(args[0])
+    return 1 if isinstance(args[0], dict) else None
+
+
+class Profiler:
+    """Decides which requests to profile and keeps the captured profiles"""
+
+    def __init__(self, enabled: bool, sample_rate: float = 0.0, mode: str = 'cprofile',
+                 slow_threshold_ms: float = 0.0, interval: float = 0.01, limit: int = 50):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.mode = mode
+        # 0 disables slow-request capture
+        self.slow_threshold_ms = slow_threshold_ms
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._profiles: Deque[Dict[str, Any]] = deque(maxlen=limit)
+        self.captured = Counter()
+        self._ids = itertools.count(1)
+
+    def configure(self, sample_rate: Optional[float] = None, mode: Optional[str] = None,
+                  slow_threshold_ms: Optional[float] = None) -> None:
+        if mode is not None and mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        if sample_rate is not None and not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if slow_threshold_ms is not None and slow_threshold_ms < 0:
+            raise ValueError("slow_threshold_ms must not be negative")
+        with self._lock:
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+            if mode is not None:
+                self.mode = mode
+            if slow_threshold_ms is not None:
+                self.slow_threshold_ms = slow_threshold_ms
+
+    def submission(self, func: Callable[..., Any], args: Tuple[Any, ...]) -> Optional['ProfiledTask']:
+        """A profiled callable to submit instead of func, or None when this request is not profiled"""
+        if not self.enabled:
+            return None
+        if self.sample_rate and random.random() < self.sample_rate:
+            return ProfiledTask(self, self.mode, func, input_size(args), sampled=True)
+        if self.slow_threshold_ms:
+            return ProfiledTask(self, 'stacks', func, input_size(args), sampled=False)
+        return None
+
+    def record(self, name: str, sampled: bool, size: Optional[int], capture: Dict[str, Any]) -> Optional[str]:
+        """Keep a capture if it was sampled or slow; returns its profile id"""
+        duration_ms = capture['seconds'] * 1000
+        slow = bool(self.slow_threshold_ms) and duration_ms >= self.slow_threshold_ms
+        if not (sampled or slow):
+            return None
+        reason = 'sampled' if sampled else 'slow'
+        profile_id = f"{next(self._ids)}-{uuid.uuid4().hex[:8]}"
+        entry = {
+            'id': profile_id,
+            'name': name,
+            'kind': capture['kind'],
+            'reason': reason,
+            'slow': slow,
+            'duration_ms': round(duration_ms, 2),
+            'input_size': size,
+            'captured_at': time.time(),
+            'data': capture['data']
+        }
+        with self._lock:
+            self._profiles.append(entry)
+            self.captured[reason] += 1
+        return profile_id
+
+    def profiles(self) -> List[Dict[str, Any]]:
+        """Captured profiles, newest first, without their data"""
+        with self._lock:
+            entries = list(self._profiles)
+        summaries = []
+        for entry in reversed(entries):
+            summary = {key: value for key, value in entry.items() if key != 'data'}
+            summary['samples'] = sum(entry['data'].values()) if entry['kind'] == 'stacks' else None
+            summaries.append(summary)
+        return summaries
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for entry in self._profiles:
+                if entry['id'] == profile_id:
+                    return entry
+        return None
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._profiles)
+            self._profiles.clear()
+        return count
+
+    def settings(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'mode': self.mode,
+            'slow_threshold_ms': self.slow_threshold_ms,
+            'sample_interval_ms': self.interval * 1000
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'stored': len(self._profiles),
+                'captured_sampled': self.captured['sampled'],
+                'captured_slow': self.captured['slow']
+            }
+
+
+class ProfiledTask:
+    """Callable running a task under run_profiled; returns (result, capture)
+
+    On a thread the capture is recorded right away and None returned in
+    its place; a task pickled into a pool process loses its profiler and
+    returns the capture for the submitting side to record().
+    """
+
+    def __init__(self, profiler: Profiler, mode: str, func: Callable[..., Any],
+                 size: Optional[int], sampled: bool):
+        self.profiler = profiler
+        self.mode = mode
+        self.interval = profiler.interval
+        self.func = func
+        self.name = getattr(func, '__name__', repr(func))
+        self.size = size
+        self.sampled = sampled
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The profiler (locks, stored profiles) stays in the submitting process
+        state = dict(self.__dict__)
+        state['profiler'] = None
+        return state
+
+    def __call__(self, *args: Any) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        result, capture = run_profiled(self.mode, self.interval, self.func, *args)
+        if self.profiler is not None:
+            self.profiler.record(self.name, self.sampled, self.size, capture)
+            return result, None
+        return result, capture
+
+    def record(self, capture: Optional[Dict[str, Any]]) -> None:
+        """Record a capture returned from a pool process"""
+        if capture is not None and self.profiler is not None:
+            self.profiler.record(self.name, self.sampled, self.size, capture)
+
+
+def folded_stacks(stacks: Dict[str, int]) -> str:
+    """Stack samples in the folded format, heaviest stacks first"""
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(stacks.items(), key=lambda item: -item[1]))
+
+
+def pstats_bytes(stats: Dict[Any, Any]) -> bytes:
+    """cProfile statistics in the file format written by pstats.Stats.dump_stats"""
+    return marshal.dumps(stats)
+
+
+_ROOT_CODE = run_profiled.__code__
+_sampler = StackSampler()
+
+profiler = Profiler(
+    enabled=bool(config.ADMIN_TOKEN),
+    sample_rate=config.PROFILE_SAMPLE_RATE,
+    mode=config.PROFILE_MODE,
+    slow_threshold_ms=config.PROFILE_SLOW_MS,
+    interval=config.PROFILE_SAMPLE_INTERVAL_MS / 1000,
+    limit=config.PROFILE_LIMIT
+)
@@ -0,0 +1,189 @@
+"""
+Response encoding: fast JSON, the compact mindmap format and compression
+
+FastJSONResponse encodes with orjson when it is installed (falling back to
+the standard json module). Endpoints that return large, already
+JSON-compatible dicts hand them to FastJSONResponse directly, which also
+skips FastAPI's jsonable_encoder walk over the result.
+
+CompressionMiddleware compresses complete responses with brotli (when the
+brotli package is installed) or gzip, whichever the client prefers among
+those it accepts. Streaming responses pass through untouched, so NDJSON
+chunks still reach the client as soon as they are produced. Bodies of at
+least offload_size bytes are compressed on a worker thread, so a large
+mindmap does not hold up the event loop.
+"""
+
+import gzip
+import json
+from typing import Any, Dict, List, Optional
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # optional: plain json is used instead
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip is offered
+    brotli = None
+
+RESPONSE_FORMATS = ('full', 'compact')
+
+# Only text-like bodies are worth compressing
+_COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/x-ndjson')
+
+
+def json_dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, via orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with json_dumps"""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+def compact_mindmap(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact form of a generate_mindmap result
+
+    Node ids appear once: nodes are columns (ids, labels, levels) and every
+    reference to a node (its parent, the analysis topic preview) is its
+    index in those columns. The topic preview, which repeats unit and
+    subtopic text already present in the node labels, becomes a list of
+    unit node indices. The mindmap is a tree rooted at index 0, so the
+    parent column replaces the edge list.
+    """
+    mindmap = data['mindmap']
+    nodes = mindmap['nodes']
+    index = {node['id']: position for position, node in enumerate(nodes)}
+    parents = [-1] * len(nodes)
+    for edge in mindmap['edges']:
+        parents[index[edge['target']]] = index[edge['source']]
+    analysis = data['analysis']
+    compact = {
+        'format': 'compact',
+        'mindmap': {
+            'ids': [node['id'] for node in nodes],
+            'labels': [node['label'] for node in nodes],
+            'levels': [node['level'] for node in nodes],
+            'parents': parents,
+            'metadata': mindmap['metadata']
+        },
+        'analysis': {
+            'complexity': analysis['complexity'],
+            'topics': [index[topic['id']] for topic in analysis['topics'] if topic['id'] in index],
+            'keywords': analysis['keywords']
+        },
+        'suggestions': data['suggestions']
+    }
+    if 'metadata' in data:
+        compact['metadata'] = data['metadata']
+    return compact
+
+
+def expand_mindmap(compact: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Node and edge lists of a compact mindmap (edges in tree order, as the native builder emits them)"""
+    mindmap = compact['mindmap']
+    ids = mindmap['ids']
+    nodes = [{'id': node_id, 'label': label, 'level': level}
+             for node_id, label, level in zip(ids, mindmap['labels'], mindmap['levels'])]
+    children: Dict[int, List[int]] = {}
+    for position, parent in enumerate(mindmap['parents']):
+        if parent >= 0:
+            children.setdefault(parent, []).append(position)
+    edges = [{'source': ids[parent], 'target': ids[child]}
+             for parent in range(len(ids)) for child in children.get(parent, [])]
+    return {'nodes': nodes, 'edges': edges}
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported content coding in an Accept-Encoding header ('br', 'gzip' or None)"""
+    offered = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        offered[coding.strip().lower()] = weight
+    supported = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    def quality(coding: str) -> float:
+        return offered.get(coding, offered.get('*', 0.0))
+
+    candidates = [coding for coding in supported if quality(coding) > 0]
+    # max() keeps the first of equally weighted codings, so brotli wins ties
+    return max(candidates, key=quality) if candidates else None
+
+
+class CompressionMiddleware:
+    """Brotli/gzip content negotiation for complete (non-streaming) responses"""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4,
+                 offload_size: int = 64 * 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+        # Smaller bodies compress faster than a thread hand-off takes
+        self.offload_size = offload_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message['type'] == 'http.response.start':
+                # Held back until the first body chunk shows whether the response is complete
+                start = message
+                return
+            if start is None or message['type'] != 'http.response.body':
+                await send(message)
+                return
+            held, start = start, None
+            headers = MutableHeaders(raw=held['headers'])
+            body = message.get('body', b'')
+            if (message.get('more_body', False) or len(body) < self.minimum_size
+                    or 'content-encoding' in headers
+                    or not headers.get('content-type', '').startswith(_COMPRESSIBLE_TYPES)):
+                await send(held)
+                await send(message)
+                return
+            if len(body) >= self.offload_size:
+                body = await anyio.to_thread.run_sync(self.compress, body, encoding)
+            else:
+                body = self.compress(body, encoding)
+            headers['Content-Encoding'] = encoding
+            headers['Content-Length'] = str(len(body))
+            headers.add_vary_header('Accept-Encoding')
+            held['headers'] = headers.raw
+            await send(held)
+            await send({'type': 'http.response.body', 'body': body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
@@ -0,0 +1,95 @@
+"""
+Regex sentence and word segmentation (the 'fast' text segmentation mode)
+
+The 'accurate' mode runs the punkt sentence splitter and NLTK's Treebank
+word tokenizer, exactly as TextBlob does. On cleaned syllabus text
+(clean_text keeps only word characters, whitespace and .,;:!?-) both
+reduce to a few rules that a handful of regular expressions apply in a
+single pass, without loading punkt or building token lists:
+
+- words: Treebank splits at whitespace, ; ! ? ... and --, and at , or :
+  unless a digit follows; TextBlob then strips leading and trailing
+  punctuation and drops tokens that are punctuation only. The fast word
+  counts are identical to the accurate ones.
+- sentences: a run of . ! ? followed by whitespace ends a sentence,
+  except after an ellipsis, a single-letter initial or an abbreviation
+  from punkt's English model (the same list punkt reads, so the fast
+  path follows whichever model is installed). punkt additionally weighs
+  learned collocations and sentence starters around those periods, so
+  counts may still differ slightly on text full of abbreviations.
+"""
+
+import re
+import string
+from typing import FrozenSet, Iterator, List, Tuple
+
+from . import nlp_resources
+
+SEGMENTATION_MODES = ('fast', 'accurate')
+
+# Where Treebank (as used by TextBlob) puts a token boundary in cleaned text
+_WORD_BOUNDARY = re.compile(r'[\s;!?]+|\.\.\.|--|[,:](?!\d)')
+_PUNCTUATION = string.punctuation
+
+# Candidate sentence ends: terminal punctuation followed by whitespace and more text
+_SENTENCE_END = re.compile(r'([.!?]+)\s+(?=\S)')
+
+
+def iter_words(text: str) -> Iterator[str]:
+    """Word tokens of cleaned text, without punctuation (same tokens as TextBlob(text).words)"""
+    for token in _WORD_BOUNDARY.split(text):
+        word = token.strip(_PUNCTUATION)
+        if word:
+            yield word
+
+
+def split_words(text: str) -> List[str]:
+    return list(iter_words(text))
+
+
+def _continues_sentence(text: str, match: 're.Match', abbreviations: FrozenSet[str]) -> bool:
+    """Whether the terminal punctuation in match is not a sentence end"""
+    punctuation = match.group(1)
+    if punctuation == '...':
+        return True
+    if punctuation != '.':
+        return False
+    start = match.start(1)
+    word_start = text.rfind(' ', 0, start) + 1
+    word = text[word_start:start].lstrip(_PUNCTUATION).lower()
+    # Single letters are initials ("J. K. Rowling", "Appendix A. b")
+    return (len(word) == 1 and word.isalpha()) or word in abbreviations
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of cleaned text, following punkt's English model"""
+    abbreviations = nlp_resources.get_abbreviations()
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        if _continues_sentence(text, match, abbreviations):
+            continue
+        sentences.append(text[start:match.end(1)].strip())
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def count_text(text: str) -> Tuple[int, int, int]:
+    """Sentence, word and word-character counts of cleaned text, without building token lists"""
+    abbreviations = nlp_resources.get_abbreviations()
+    sentences = 0
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        if not _continues_sentence(text, match, abbreviations):
+            sentences += 1
+            start = match.end()
+    if text[start:].strip():
+        sentences += 1
+    words = word_chars = 0
+    for word in iter_words(text):
+        words += 1
+        word_chars += len(word)
+    return sentences, words, word_chars
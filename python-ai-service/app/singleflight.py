@@ -0,0 +1,53 @@
+"""
+Single-flight coalescing of identical concurrent computations
+
+When many requests ask for the same result at once (a whole class opening
+the same course mindmap), only the first one computes it; the others wait
+on that computation and share its result or its exception. A key is
+in flight only while it is being computed, so this complements the
+result caches rather than replacing them.
+
+The computation runs as its own task: a caller that goes away (client
+disconnect, request timeout) stops waiting without cancelling the work
+the other callers are waiting on. Coalescing is per worker process.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[str, asyncio.Task] = {}
+        self.computed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Result of compute() for key, shared with concurrent callers; returns (result, shared)"""
+        task = self._flights.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.computed += 1
+            task = asyncio.ensure_future(compute())
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        if not task.cancelled():
+            # Retrieved here so a failure nobody waits for any more is not reported as unretrieved
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'in_flight': len(self._flights),
+            'computed': self.computed,
+            'coalesced': self.coalesced
+        }
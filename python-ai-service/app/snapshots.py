@@ -0,0 +1,65 @@
+"""
+Per-student suggestion snapshots
+
+The last suggestion result for each student is kept together with a
+fingerprint of the payload it was computed from. A dashboard reload with
+the same grades, attendance and exams gets the stored result; any change
+to the payload changes the fingerprint and triggers a recompute, so
+snapshots never need to be dropped explicitly.
+
+Snapshots live in a single-tier store (SQLite when the cache backend is
+configured, so every worker sees the same snapshots).
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional
+
+from .cache import CacheStore
+
+_KEY_PREFIX = 'suggestion-snapshot:'
+
+
+def payload_fingerprint(student_data: Dict[str, Any]) -> str:
+    """Stable hash of a suggestion payload (key order does not matter)"""
+    canonical = json.dumps(student_data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class SuggestionSnapshotStore:
+    """Latest suggestion result per student_id, valid while the payload fingerprint matches"""
+
+    def __init__(self, store: CacheStore):
+        self.store = store
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def get(self, student_id: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Stored result for this exact payload, or None"""
+        snapshot = self.store.get(_KEY_PREFIX + student_id)
+        with self._lock:
+            if snapshot is None:
+                self.misses += 1
+                return None
+            if snapshot['fingerprint'] != fingerprint:
+                # The student's data changed since the snapshot was taken
+                self.stale += 1
+                return None
+            self.hits += 1
+        return snapshot['result']
+
+    def put(self, student_id: str, fingerprint: str, result: Dict[str, Any]) -> None:
+        self.store.set(_KEY_PREFIX + student_id, {'fingerprint': fingerprint, 'result': result})
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.stale
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'store': self.store.stats()
+        }
@@ -1,10 +1,30 @@
 import numpy as np
-from typing import Dict, List, Any
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional
 import json
 import random
+from .cohort_analytics import CohortAnalytics, nearest_exams_first
+from .course_recommender import CourseRecommender, parse_grade
+from .metrics import metrics
+
+# 'seeded' derives tip selection and order from recommendation_seed(), so identical
+# inputs on the same day give identical output; 'random' varies on every call
+ORDERINGS = ('seeded', 'random')
+
+
+def recommendation_seed(student_id: str, day: Optional[str] = None) -> str:
+    """Seed for a student's recommendations: their id plus the (UTC) date, so tips rotate daily"""
+    day = day or datetime.now(timezone.utc).date().isoformat()
+    return f"{student_id}:{day}"
+
 
 class SuggestionEngine:
-    def __init__(self):
+    def __init__(self, ordering: str = 'seeded', course_recommender: Optional[CourseRecommender] = None):
+        if ordering not in ORDERINGS:
+            raise ValueError(f"Unknown recommendation ordering: {ordering}")
+        self.ordering = ordering
+        # Item-item neighbour table for course recommendations; heuristics only when None
+        self.course_recommender = course_recommender
         # Simple grade mapping
         self.grade_points = {
             'A+': 10, 'A': 9, 'B+': 8, 'B': 7, 'C+': 6, 'C': 5, 'D': 4, 'F': 0
@@ -22,25 +42,67 @@ class SuggestionEngine:
             "Eat healthy snacks like nuts or fruit for brain energy.",
             "Set specific, achievable goals for each study session."
         ]
+        
+        self.cohort_analytics = CohortAnalytics(self.grade_points)
     
-    def generate_suggestions(self, student_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate academic suggestions based on student performance data"""
+    def generate_suggestions(self, student_data: Dict[str, Any], *,
+                             performance_analysis: Optional[Dict[str, Any]] = None,
+                             seed: Optional[str] = None) -> Dict[str, Any]:
+        """Generate academic suggestions based on student performance data
+        
+        In 'seeded' ordering the tips depend only on the inputs and seed
+        (default: recommendation_seed for the student and today).
+        """
         # TODO: Implement more sophisticated ML-based recommendation system
         
-        # Extract performance metrics
-        performance_analysis = self._analyze_performance(student_data)
-        study_recommendations = self._generate_study_recommendations(performance_analysis)
-        course_recommendations = self._generate_course_recommendations(student_data, performance_analysis)
-        improvement_areas = self._identify_improvement_areas(performance_analysis)
+        if self.ordering == 'seeded':
+            rng = random.Random(seed or recommendation_seed(str(student_data.get('student_id', ''))))
+        else:
+            rng = random.Random()
+        
+        records = len(student_data.get('grades', [])) + len(student_data.get('exam_scores', []))
+        with metrics.stage('suggestions.total', size=records):
+            # Extract performance metrics (batch callers pass them in precomputed)
+            if performance_analysis is None:
+                with metrics.stage('suggestions.analyze_performance'):
+                    performance_analysis = self._analyze_performance(student_data)
+            with metrics.stage('suggestions.study_recommendations'):
+                study_recommendations = self._generate_study_recommendations(performance_analysis, rng)
+            with metrics.stage('suggestions.course_recommendations'):
+                course_recommendations = self._generate_course_recommendations(student_data, performance_analysis)
+            with metrics.stage('suggestions.improvement_areas'):
+                improvement_areas = self._identify_improvement_areas(performance_analysis)
+            with metrics.stage('suggestions.overall_suggestion'):
+                overall_suggestion = self._generate_overall_suggestion(performance_analysis)
         
         return {
             'performance_analysis': performance_analysis,
             'study_recommendations': study_recommendations,
             'course_recommendations': course_recommendations,
             'improvement_areas': improvement_areas,
-            'overall_suggestion': self._generate_overall_suggestion(performance_analysis)
+            'overall_suggestion': overall_suggestion
         }
     
+    def generate_suggestions_batch(self, students: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Generate suggestions for many students, with per-item errors, in input order
+        
+        Each student gets their own default seed, so batch and single results match.
+        """
+        with metrics.stage('suggestions.batch_analyze_performance', size=len(students)):
+            analyses, errors = self.cohort_analytics.analyze(students)
+        
+        results = []
+        for index, student_data in enumerate(students):
+            if index in errors:
+                results.append({'success': False, 'error': errors[index]})
+                continue
+            try:
+                suggestions = self.generate_suggestions(student_data, performance_analysis=analyses[index])
+                results.append({'success': True, 'data': suggestions})
+            except Exception as e:
+                results.append({'success': False, 'error': str(e)})
+        return results
+    
     def _analyze_performance(self, student_data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze student performance metrics"""
         grades = student_data.get('grades', [])
@@ -109,12 +171,12 @@ class SuggestionEngine:
             'weaknesses': weaknesses,
             'total_courses': len(grades),
             'days_remaining': student_data.get('days_remaining'),
-            'upcoming_exams': student_data.get('upcoming_exams', []),
+            'upcoming_exams': nearest_exams_first(student_data.get('upcoming_exams', [])),
             'syllabus_focus_areas': student_data.get('syllabus_focus_areas', [])
         }
     
     
-    def _generate_study_recommendations(self, performance: Dict[str, Any]) -> List[str]:
+    def _generate_study_recommendations(self, performance: Dict[str, Any], rng: random.Random) -> List[str]:
         """Generate study recommendations based on performance and exam context"""
         recommendations = []
         
@@ -137,13 +199,12 @@ class SuggestionEngine:
              })
 
         if upcoming_exams:
-            # Sort by nearest date
-            upcoming_exams.sort(key=lambda x: x.get('days_remaining', 999))
-            nearest_exam = upcoming_exams[0]
+            # Nearest exam (first of equals); min rather than [0], as a caller's analysis may be unsorted
+            nearest_exam = min(upcoming_exams, key=lambda x: x.get('days_remaining', 999))
             days = nearest_exam.get('days_remaining')
             course = nearest_exam.get('course', 'Exam')
             
-            # Find syllabus context for this exam
+            # Find syllabus context for this exam (the first focus area listed for its course)
             syllabus_ctx = next((s for s in syllabus_focus if s['course'] == course), None)
             
             if days is not None:
@@ -191,7 +252,7 @@ class SuggestionEngine:
             recommendations.append("Focus on your weakest subjects first.")
 
         # VARIETY BOOSTER: Add 2 random generic tips to every response
-        generic_picks = random.sample(self.generic_tips, 2)
+        generic_picks = rng.sample(self.generic_tips, 2)
         
         # LOGIC: 
         # 1. 'urgent_recs' = Directly related to Upcoming Exams (High Priority)
@@ -206,7 +267,7 @@ class SuggestionEngine:
         
         # Combine base + generic
         mixed_recs = base_recs + generic_picks
-        random.shuffle(mixed_recs) 
+        rng.shuffle(mixed_recs)
 
         # FINAL ORDER: Urgent -> Syllabus -> shuffled(Base + Generic)
         final_recommendations = urgent_recs + syllabus_recs + mixed_recs
@@ -216,12 +277,11 @@ class SuggestionEngine:
     
     def _generate_course_recommendations(self, student_data: Dict, performance: Dict) -> List[str]:
         """Generate course recommendations"""
-        recommendations = []
+        # Courses that students with similar grades did well in come first
+        recommendations = self._neighbour_course_recommendations(student_data)
         current_semester = student_data.get('current_semester', 1)
         department = student_data.get('department', '')
         
-        # TODO: Implement more sophisticated course recommendation based on performance patterns
-        
         if performance['performance_level'] in ['excellent', 'good']:
             recommendations.extend([
                 "Consider taking advanced electives in your area of interest",
@@ -243,6 +303,25 @@ class SuggestionEngine:
         
         return recommendations[:4]  # Return top 4 recommendations
     
+    def _neighbour_course_recommendations(self, student_data: Dict, limit: int = 3) -> List[str]:
+        """Untaken courses predicted from the neighbour table, best predicted grade first"""
+        if self.course_recommender is None:
+            return []
+        grades = {}
+        for grade in student_data.get('grades', []):
+            points = parse_grade(grade.get('grade', ''), self.grade_points)
+            if grade.get('course') and points is not None:
+                grades[grade['course']] = points
+        recommendations = []
+        for course, predicted in self.course_recommender.recommend(grades, limit):
+            letter = self._letter_grade(predicted)
+            recommendations.append(f"Consider {course}: students with grades like yours typically earn {letter} in it")
+        return recommendations
+    
+    def _letter_grade(self, points: float) -> str:
+        """Closest letter grade to a number of grade points"""
+        return min(self.grade_points, key=lambda letter: abs(self.grade_points[letter] - points))
+    
     def _identify_improvement_areas(self, performance: Dict) -> List[Dict[str, Any]]:
         """Identify specific areas for improvement"""
         areas = []
@@ -0,0 +1,208 @@
+"""
+Entry points for work submitted to the executors
+
+These are plain module-level functions so they can be pickled into a
+process pool. Each worker process builds its own generator/engine once
+and reuses it for every task it runs.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional
+
+import numpy as np
+
+from . import config
+from .cache import create_result_cache
+from .course_recommender import CourseRecommender
+from .keyword_index import CorpusIndex
+from .mindmap_generator import MindmapGenerator
+from .mindmap_versions import IncrementalMindmapGenerator, MindmapVersionStore
+from .near_duplicates import NearDuplicateIndex
+from .responses import json_dumps
+from .suggestion_engine import SuggestionEngine
+
+_mindmap_generator: Optional[MindmapGenerator] = None
+_keyword_index: Optional[CorpusIndex] = None
+_suggestion_engine: Optional[SuggestionEngine] = None
+_incremental_generator: Optional[IncrementalMindmapGenerator] = None
+_near_duplicate_index: Optional[NearDuplicateIndex] = None
+# Syllabi are indexed for near-duplicate reuse off the request path, with at most this many waiting
+_VERSION_RECORD_BACKLOG = 4
+_version_recorder: Optional[ThreadPoolExecutor] = None
+_version_record_slots = threading.BoundedSemaphore(_VERSION_RECORD_BACKLOG)
+
+
+def get_keyword_index() -> Optional[CorpusIndex]:
+    """Corpus index for TF-IDF keywords, memory-mapped from disk; None when disabled"""
+    global _keyword_index
+    if _keyword_index is None and config.KEYWORD_INDEX_PATH:
+        _keyword_index = CorpusIndex(config.KEYWORD_INDEX_PATH, autosave_every=config.KEYWORD_INDEX_SAVE_EVERY)
+    return _keyword_index
+
+
+def get_mindmap_generator() -> MindmapGenerator:
+    global _mindmap_generator
+    if _mindmap_generator is None:
+        _mindmap_generator = MindmapGenerator(
+            graph_backend=config.MINDMAP_GRAPH_BACKEND,
+            segmentation=config.TEXT_SEGMENTATION,
+            chunk_size=config.MINDMAP_CHUNK_SIZE
+        )
+        _mindmap_generator.text_processor.keyword_index = get_keyword_index()
+    return _mindmap_generator
+
+
+def get_incremental_generator() -> IncrementalMindmapGenerator:
+    """Incremental generator over this worker's version store
+
+    With the SQLite cache backend every worker process sees every stored
+    version; with memory only, a process pool worker may miss a version
+    another worker stored and fall back to a full mindmap.
+    """
+    global _incremental_generator
+    if _incremental_generator is None:
+        store = MindmapVersionStore(create_result_cache(
+            config.MINDMAP_VERSION_STORE_SIZE,
+            config.MINDMAP_CACHE_TTL,
+            config.MINDMAP_CACHE_BACKEND,
+            config.MINDMAP_CACHE_PATH
+        ))
+        _incremental_generator = IncrementalMindmapGenerator(get_mindmap_generator(), store)
+    return _incremental_generator
+
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    """This worker's index of recently generated syllabi, keyed by stored version id"""
+    global _near_duplicate_index
+    if _near_duplicate_index is None:
+        # Entries beyond the version store's size would mostly point at evicted versions
+        _near_duplicate_index = NearDuplicateIndex(
+            threshold=config.NEAR_DUPLICATE_THRESHOLD,
+            capacity=config.MINDMAP_VERSION_STORE_SIZE
+        )
+    return _near_duplicate_index
+
+
+def save_keyword_index() -> None:
+    """Persist documents counted since the last save"""
+    if _keyword_index is not None and _keyword_index.pending:
+        _keyword_index.save()
+
+
+def get_suggestion_engine() -> SuggestionEngine:
+    global _suggestion_engine
+    if _suggestion_engine is None:
+        recommender = CourseRecommender(config.COURSE_NEIGHBOURS_PATH) if config.COURSE_NEIGHBOURS_PATH else None
+        _suggestion_engine = SuggestionEngine(ordering=config.SUGGESTION_ORDERING, course_recommender=recommender)
+    return _suggestion_engine
+
+
+def generate_mindmap(syllabus_text: str, days_remaining: Optional[int] = None,
+                     update_corpus: bool = False) -> Dict[str, Any]:
+    """Generate a mindmap with this worker's MindmapGenerator"""
+    return get_mindmap_generator().generate_mindmap(syllabus_text, days_remaining, update_corpus)
+
+
+def _record_version(syllabus_text: str, signature: Optional[np.ndarray]) -> None:
+    try:
+        version_id = get_incremental_generator().record(syllabus_text)
+        index = get_near_duplicate_index()
+        index.add(version_id, signature if signature is not None else index.signature(syllabus_text))
+    finally:
+        _version_record_slots.release()
+
+
+def _record_version_later(syllabus_text: str, signature: Optional[np.ndarray]) -> None:
+    """Store the text's unit records and index it, on a background thread; skipped while the backlog is full
+
+    Without a signature (none was needed to query an empty index) it is computed on that thread.
+    """
+    global _version_recorder
+    if not _version_record_slots.acquire(blocking=False):
+        return
+    if _version_recorder is None:
+        _version_recorder = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mindmap-versions')
+    _version_recorder.submit(_record_version, syllabus_text, signature)
+
+
+def generate_mindmap_deduplicated(syllabus_text: str, days_remaining: Optional[int] = None,
+                                  update_corpus: bool = False) -> Dict[str, Any]:
+    """Generate a mindmap, reusing the units of a near-duplicate syllabus seen before
+
+    The result has the same shape as generate_mindmap plus 'near_duplicate':
+    None, or the matched version id, its estimated similarity and how many
+    units were reused and reparsed. Without a match the mindmap comes from
+    the regular generator, and the syllabus is recorded as a version for
+    later matches in the background. A match is rebuilt by the incremental
+    generator: reused units keep the matched syllabus's node ids and
+    sentences are counted per unit, as in the chunked path. Texts larger
+    than one chunk always take that path.
+    """
+    if not config.MINDMAP_NEAR_DUPLICATES or len(syllabus_text) > config.MINDMAP_CHUNK_SIZE:
+        result = generate_mindmap(syllabus_text, days_remaining, update_corpus)
+        result['near_duplicate'] = None
+        return result
+    index = get_near_duplicate_index()
+    # An empty index cannot match, so the signature is left to the background recorder
+    signature = index.signature(syllabus_text) if len(index) else None
+    match = index.query(signature) if signature is not None else None
+    incremental = get_incremental_generator()
+    if match is None or incremental.store.get(match[0]) is None:
+        result = generate_mindmap(syllabus_text, days_remaining, update_corpus)
+        result['near_duplicate'] = None
+        _record_version_later(syllabus_text, signature)
+        return result
+
+    generated = incremental.generate(syllabus_text, match[0], days_remaining, include_graph=True,
+                                     update_corpus=update_corpus)
+    index.add(generated['version_id'], signature)
+    return {
+        'mindmap': generated['mindmap'],
+        'analysis': generated['analysis'],
+        'suggestions': generated['suggestions'],
+        'near_duplicate': {
+            'matched_version_id': match[0],
+            'similarity': round(match[1], 3),
+            'reused_units': generated['units']['reused'],
+            'reparsed_units': generated['units']['reparsed']
+        }
+    }
+
+
+def generate_mindmap_incremental(syllabus_text: str, base_version_id: Optional[str] = None,
+                                 days_remaining: Optional[int] = None,
+                                 update_corpus: bool = False) -> Dict[str, Any]:
+    """Regenerate a mindmap as a delta against a stored version"""
+    return get_incremental_generator().generate(
+        syllabus_text, base_version_id, days_remaining, update_corpus=update_corpus
+    )
+
+
+def generate_mindmap_ndjson(syllabus_text: str, days_remaining: Optional[int] = None,
+                            metadata: Optional[Dict[str, Any]] = None,
+                            update_corpus: bool = False) -> Iterator[bytes]:
+    """Stream a mindmap as NDJSON lines; request metadata is attached to the summary trailer"""
+    try:
+        for chunk in get_mindmap_generator().generate_mindmap_stream(syllabus_text, days_remaining, update_corpus):
+            if chunk['type'] == 'summary' and metadata is not None:
+                chunk['metadata'] = metadata
+            yield json_dumps(chunk) + b'\n'
+    except Exception as e:
+        # Headers are already sent, so report failures in-band
+        yield json_dumps({'type': 'error', 'message': f"Error generating mindmap: {str(e)}"}) + b'\n'
+
+
+def generate_suggestions(student_data: Dict[str, Any], seed: Optional[str] = None) -> Dict[str, Any]:
+    """Generate suggestions with this worker's SuggestionEngine"""
+    return get_suggestion_engine().generate_suggestions(student_data, seed=seed)
+
+
+def generate_suggestions_batch(students: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Generate suggestions for a cohort with this worker's SuggestionEngine"""
+    return get_suggestion_engine().generate_suggestions_batch(students)
+
+
+def analyze_cohort(students: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Columnar cohort analytics with this worker's SuggestionEngine"""
+    return get_suggestion_engine().cohort_analytics.analyze_cohort(students)
@@ -1,117 +1,275 @@
+import hashlib
 import re
-import nltk
-from textblob import TextBlob
-from typing import List, Dict, Any
+from collections import Counter
+from functools import cached_property
+from typing import List, Dict, Any, FrozenSet, Iterable, Iterator, Optional, Tuple, Union
 
-# Download required NLTK data (run once)
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+# NLTK/TextBlob are imported and their data loaded on first use (see nlp_resources.warm_up)
+from . import nlp_resources, segmentation
+from .keyword_index import CorpusIndex
+from .segmentation import SEGMENTATION_MODES
+
+# Compiled once and shared by every document
+SPECIAL_CHARS_PATTERN = re.compile(r'[^\w\s.,;:!?-]')
+# Structural role of a cleaned syllabus line, decided by one match: a unit
+# header, a numbered item (1. / 2.3 / 2.3.1) or a bullet ('-'; other bullet
+# glyphs are removed by clean_text)
+STRUCTURE_PATTERN = re.compile(
+    r'(?P<unit>(?:unit|module|chapter|section)\s+\d+[:.]?\s*)'
+    r'|(?P<number>\d+(?:\.\d+)+\.?|\d+\.)\s'
+    r'|(?P<bullet>-+)\s*',
+    re.IGNORECASE
+)
+OVERVIEW_UNIT_ID = 'unit_0'
+
+
+def clean_text(text: str) -> str:
+    """Clean and preprocess text"""
+    # Remove extra whitespace and newlines (str.split() treats exactly the
+    # characters regex \s matches as whitespace, and is much faster than re.sub)
+    text = ' '.join(text.split())
+    # Remove special characters but keep basic punctuation
+    text = SPECIAL_CHARS_PATTERN.sub('', text)
+    return text.strip()
+
+
+def iter_clean_lines(text: str) -> Iterator[str]:
+    """Yield each line of text cleaned, skipping blank lines, without splitting the whole text up front"""
+    start = 0
+    while start <= len(text):
+        end = text.find('\n', start)
+        if end == -1:
+            end = len(text)
+        line = clean_text(text[start:end])
+        if line:
+            yield line
+        start = end + 1
+
+
+def document_id(lines: Iterable[str]) -> str:
+    """Content hash of a syllabus's cleaned lines, used to count each document once in the corpus index"""
+    digest = hashlib.sha256()
+    for line in lines:
+        digest.update(line.encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+class SyllabusDocument:
+    """Syllabus text tokenized once and shared across TextProcessor methods
+
+    Every view is computed lazily on first access and cached, so a
+    document handed to extract_topics, extract_keywords and
+    analyze_complexity is segmented exactly once. segmentation selects the
+    regex fast path ('fast') or punkt and Treebank ('accurate').
+    """
+
+    def __init__(self, text: str, segmentation: str = 'fast'):
+        self.raw_text = text
+        self.segmentation = segmentation
+
+    @cached_property
+    def cleaned_text(self) -> str:
+        """Whole document with whitespace collapsed and special characters removed"""
+        return clean_text(self.raw_text)
+
+    @cached_property
+    def lines(self) -> List[str]:
+        """Original line structure, each line cleaned, blank lines dropped"""
+        return list(iter_clean_lines(self.raw_text))
+
+    @cached_property
+    def sentences(self) -> List[str]:
+        """Sentences of the cleaned text (single punkt pass in accurate mode)"""
+        if self.segmentation == 'fast':
+            return segmentation.split_sentences(self.cleaned_text)
+        return nlp_resources.sent_tokenize(self.cleaned_text)
+
+    @cached_property
+    def words(self) -> List[str]:
+        """Word tokens without punctuation, identical to TextBlob(text).words"""
+        if self.segmentation == 'fast':
+            # Word boundaries do not depend on sentence boundaries, so no split is needed
+            return segmentation.split_words(self.cleaned_text)
+        words = []
+        for sentence in self.sentences:
+            words.extend(nlp_resources.word_tokenize(sentence))
+        return words
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """Lowercased word tokens"""
+        return [word.lower() for word in self.words]
 
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords')
 
 class TextProcessor:
-    def __init__(self):
-        self.stop_words = set(nltk.corpus.stopwords.words('english'))
+    def __init__(self, keyword_index: Optional[CorpusIndex] = None, segmentation: str = 'fast'):
+        if segmentation not in SEGMENTATION_MODES:
+            raise ValueError(f"Unknown text segmentation mode: {segmentation}")
+        # With a corpus index keywords are ranked by TF-IDF, otherwise by raw frequency
+        self.keyword_index = keyword_index
+        # 'fast' segments with regular expressions; 'accurate' uses punkt and Treebank like TextBlob
+        self.segmentation = segmentation
+    
+    @property
+    def stop_words(self) -> FrozenSet[str]:
+        return nlp_resources.get_stop_words()
     
     def clean_text(self, text: str) -> str:
         """Clean and preprocess text"""
-        # Remove extra whitespace and newlines
-        text = re.sub(r'\s+', ' ', text)
-        # Remove special characters but keep basic punctuation
-        text = re.sub(r'[^\w\s.,;:!?-]', '', text)
-        return text.strip()
+        return clean_text(text)
+
+    def build_document(self, text: str) -> SyllabusDocument:
+        """Wrap raw syllabus text so it is only tokenized once"""
+        return SyllabusDocument(text, self.segmentation)
+
+    def _as_document(self, text: Union[str, SyllabusDocument]) -> SyllabusDocument:
+        if isinstance(text, SyllabusDocument):
+            return text
+        return SyllabusDocument(text, self.segmentation)
     
     def extract_sentences(self, text: str) -> List[str]:
         """Extract sentences from text"""
-        blob = TextBlob(text)
-        return [str(sentence).strip() for sentence in blob.sentences if len(str(sentence).strip()) > 10]
+        if self.segmentation == 'fast':
+            sentences = segmentation.split_sentences(text)
+        else:
+            sentences = [str(sentence) for sentence in nlp_resources.text_blob(text).sentences]
+        return [sentence.strip() for sentence in sentences if len(sentence.strip()) > 10]
     
-    def extract_keywords(self, text: str, max_keywords: int = 10) -> List[str]:
-        """Extract keywords from text using simple frequency analysis"""
-        # TODO: Implement more sophisticated keyword extraction using TF-IDF or other NLP techniques
-        blob = TextBlob(text.lower())
-        words = [word for word in blob.words if word not in self.stop_words and len(word) > 3]
-        
-        # Simple frequency count
-        word_freq = {}
-        for word in words:
-            word_freq[word] = word_freq.get(word, 0) + 1
+    def segment(self, text: str) -> Iterator[List[str]]:
+        """Word tokens of each sentence of cleaned text, in the configured segmentation mode"""
+        if self.segmentation == 'fast':
+            for sentence in segmentation.split_sentences(text):
+                yield segmentation.split_words(sentence)
+        else:
+            for sentence in nlp_resources.sent_tokenize(text):
+                yield nlp_resources.word_tokenize(sentence)
+    
+    def extract_keywords(self, text: Union[str, SyllabusDocument], max_keywords: int = 10,
+                         update_corpus: bool = False) -> List[str]:
+        """Extract keywords from text, by TF-IDF against the corpus index when one is configured
         
-        # Sort by frequency and return top keywords
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        return [word for word, freq in sorted_words[:max_keywords]]
+        Only with update_corpus is the text counted into the corpus index.
+        """
+        doc = self._as_document(text)
+        word_freq = self.keyword_counts(doc.tokens)
+        doc_id = document_id(doc.lines) if update_corpus and self.keyword_index is not None else None
+        return self.rank_keywords(word_freq, max_keywords, doc_id)
+    
+    def rank_keywords(self, word_freq: Counter, max_keywords: int, doc_id: Optional[str] = None) -> List[str]:
+        """Top keywords from term counts; doc_id (see document_id) adds the document to the corpus index"""
+        if self.keyword_index is None:
+            # most_common keeps first-seen order for ties like a stable sort
+            return [word for word, freq in word_freq.most_common(max_keywords)]
+        if doc_id is not None:
+            self.keyword_index.add_document(doc_id, word_freq)
+        return self.keyword_index.top_keywords(word_freq, max_keywords)
     
-    def extract_topics(self, text: str) -> List[Dict[str, Any]]:
+    def keyword_counts(self, tokens: Iterable[str], counts: Optional[Counter] = None) -> Counter:
+        """Count keyword candidates (non-stopwords longer than 3 characters) among lowercased tokens"""
+        counts = Counter() if counts is None else counts
+        stop_words = self.stop_words
+        counts.update(word for word in tokens if word not in stop_words and len(word) > 3)
+        return counts
+    
+    def extract_topics(self, text: Union[str, SyllabusDocument]) -> List[Dict[str, Any]]:
         """Extract hierarchically structured topics from syllabus text"""
-        lines = text.split('\n')
-        topics = []
-        current_unit = None
+        return [unit for unit, lines in self.iter_topic_segments(self._as_document(text).lines)]
+    
+    def iter_topic_segments(self, lines: Iterable[str]) -> Iterator[Tuple[Dict[str, Any], List[str]]]:
+        """Yield each unit, with the cleaned lines it was built from, as soon as the unit closes
         
-        # Regex patterns for structural elements
-        unit_pattern = re.compile(r'^(unit|module|chapter|section)\s+\d+[:.]?\s*', re.IGNORECASE)
+        Each line is classified by a single STRUCTURE_PATTERN match. Subtopics
+        stay in one flat list per unit, but carry a 'level' and the id of
+        their 'parent': numbered items nest by their number depth (1. -> 2,
+        1.1 -> 3) and bullets nest below the preceding plain or numbered line.
+        """
+        unit = None
+        unit_id = ''
+        units_started = 0
+        segment: List[str] = []
+        subtopics: List[Dict[str, Any]] = []
+        # Open subtopics as (depth, id, is_bullet), innermost last
+        stack: List[Tuple[int, str, bool]] = []
+        next_sub = 1
+        # Real units only take substantial lines as subtopics; the overview takes every line
+        min_length = 0
+        match_structure = STRUCTURE_PATTERN.match
         
         for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            # Check for Unit header
-            unit_match = unit_pattern.match(line)
-            if unit_match:
-                # Start new unit
-                current_unit = {
-                    'id': f"unit_{len(topics) + 1}",
+            match = match_structure(line)
+            kind = match.lastgroup if match else None
+            if kind == 'unit':
+                # Close the previous unit (or the overview) before starting a new one
+                if unit is not None:
+                    yield unit, segment
+                    segment = []
+                units_started += 1
+                unit_id = f"unit_{units_started}"
+                subtopics = []
+                unit = {
+                    'id': unit_id,
                     'title': line,
                     'type': 'unit',
                     'content': line,
-                    'subtopics': []
+                    'subtopics': subtopics
                 }
-                topics.append(current_unit)
-            elif current_unit:
-                # Add content as subtopic to current unit if it's substantial
-                if len(line) > 5 and not unit_pattern.match(line):
-                     subtopic = {
-                        'id': f"{current_unit['id']}_sub_{len(current_unit['subtopics']) + 1}",
-                        'title': line, # Use full line as title for subtopics
-                        'type': 'topic',
-                        'content': line
-                     }
-                     current_unit['subtopics'].append(subtopic)
+                stack = []
+                next_sub = 1
+                min_length = 6
             else:
-                # Content before any unit (Introduction or Course Info)
-                # Group them into a generic "Overview" unit if not already present
-                if not topics or topics[0]['title'] != "Course Overview":
-                     topics.insert(0, {
-                        'id': "unit_0",
+                if unit is None:
+                    # Content before any unit (Introduction or Course Info) goes into
+                    # a generic "Overview" unit, which always comes first
+                    units_started += 1
+                    unit_id = OVERVIEW_UNIT_ID
+                    unit = {
+                        'id': unit_id,
                         'title': "Course Overview",
                         'type': 'unit',
                         'content': "General course information",
-                        'subtopics': []
-                     })
-                
-                topics[0]['subtopics'].append({
-                    'id': f"unit_0_sub_{len(topics[0]['subtopics']) + 1}",
-                    'title': line,
-                    'type': 'topic',
-                    'content': line
-                })
+                        'subtopics': subtopics
+                    }
+                if len(line) >= min_length:
+                    if kind == 'bullet':
+                        # Sibling of a preceding bullet, child of a preceding plain or numbered line
+                        depth = stack[-1][0] + (not stack[-1][2]) if stack else 1
+                    elif kind == 'number':
+                        depth = match.group('number').rstrip('.').count('.') + 1
+                    else:
+                        depth = 1
+                    while stack and stack[-1][0] >= depth:
+                        stack.pop()
+                    sub_id = f"{unit_id}_sub_{next_sub}"
+                    next_sub += 1
+                    subtopics.append({
+                        'id': sub_id,
+                        'title': line,  # Use full line as title for subtopics
+                        'type': 'topic',
+                        'content': line,
+                        'level': depth + 1,
+                        'parent': stack[-1][1] if stack else unit_id
+                    })
+                    stack.append((depth, sub_id, kind == 'bullet'))
+            segment.append(line)
         
-        return topics
+        if unit is not None:
+            yield unit, segment
     
-    def analyze_complexity(self, text: str) -> Dict[str, Any]:
+    def analyze_complexity(self, text: Union[str, SyllabusDocument]) -> Dict[str, Any]:
         """Analyze text complexity"""
-        blob = TextBlob(text)
-        sentences = blob.sentences
-        words = blob.words
-        
+        doc = self._as_document(text)
+        if doc.segmentation == 'fast' and 'words' not in doc.__dict__:
+            # Nothing has tokenized the document yet: count without building token lists
+            return self.complexity_from_counts(*segmentation.count_text(doc.cleaned_text))
+        words = doc.words
+        return self.complexity_from_counts(len(doc.sentences), len(words), sum(len(word) for word in words))
+    
+    def complexity_from_counts(self, total_sentences: int, total_words: int, total_word_chars: int) -> Dict[str, Any]:
+        """Complexity metrics from running totals, so callers can accumulate them incrementally"""
         # Basic complexity metrics
-        avg_sentence_length = len(words) / len(sentences) if sentences else 0
-        avg_word_length = sum(len(word) for word in words) / len(words) if words else 0
+        avg_sentence_length = total_words / total_sentences if total_sentences else 0
+        avg_word_length = total_word_chars / total_words if total_words else 0
         
         # Determine complexity level
         if avg_sentence_length > 20 and avg_word_length > 6:
@@ -125,6 +283,6 @@ class TextProcessor:
             'complexity_level': complexity,
             'avg_sentence_length': round(avg_sentence_length, 2),
             'avg_word_length': round(avg_word_length, 2),
-            'total_sentences': len(sentences),
-            'total_words': len(words)
+            'total_sentences': total_sentences,
+            'total_words': total_words
         }
\ No newline at end of file
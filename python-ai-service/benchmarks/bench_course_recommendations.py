@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark item-item course recommendations
+
+Builds the course neighbour table for a synthetic grade export, refreshes
+it after grades are released for a few courses (checking the result
+against a full rebuild), and times one recommendation as a table lookup
+against computing the same similarities at request time.
+
+Usage: python benchmarks/bench_course_recommendations.py [--students N] [--courses N] [--repeat N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVICE_DIR)
+
+import numpy as np
+import synthetic
+from app.course_recommender import GradeMatrix, build_neighbour_table, refresh_neighbour_table, _top_k
+
+
+def time_best(func, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def scan_recommend(matrix: GradeMatrix, grades, k: int, min_overlap: int, limit: int):
+    """The request-time alternative: similarities of the taken courses computed on the spot"""
+    weighted = np.zeros(len(matrix.courses))
+    weights = np.zeros(len(matrix.courses))
+    candidates = np.arange(len(matrix.courses))
+    taken = [matrix.course_index[course] for course in grades]
+    for course, points in zip(taken, grades.values()):
+        neighbours, sims = _top_k(candidates, matrix.similarities(course, min_overlap), k)
+        valid = neighbours >= 0
+        np.add.at(weighted, neighbours[valid], sims[valid] * points)
+        np.add.at(weights, neighbours[valid], sims[valid])
+    weights[taken] = 0
+    predicted = np.divide(weighted, weights, out=np.zeros_like(weights), where=weights > 0)
+    return [matrix.courses[n] for n in np.argsort(-predicted)[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--students', type=int, default=40000)
+    parser.add_argument('--courses', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    points = synthetic.GRADE_POINTS
+    records = [(s, c, points[g]) for s, c, g in synthetic.generate_grade_records(1234, args.students, args.courses, 40)]
+    matrix = GradeMatrix(records)
+    print(f"{matrix.grades} grades, {len(matrix.students)} students, {len(matrix.courses)} courses")
+
+    build_s, table = time_best(lambda: build_neighbour_table(matrix), args.repeat)
+    print(f"full build       {build_s * 1000:>9.1f} ms")
+
+    # Grades released for three courses
+    rng = random.Random(1234)
+    released = [(student, course, rng.choice(list(points.values())))
+                for course in matrix.courses[:3] for student in rng.sample(matrix.students, 300)]
+    updated = GradeMatrix(records + released)
+    refresh_s, (refreshed, recomputed) = time_best(lambda: refresh_neighbour_table(table, updated), args.repeat)
+    rebuilt = build_neighbour_table(updated)
+    same = (refreshed.neighbours == rebuilt.neighbours).all() and (refreshed.sims == rebuilt.sims).all()
+    print(f"refresh          {refresh_s * 1000:>9.1f} ms  ({recomputed} of {len(matrix.courses)} courses recomputed, "
+          f"{'matches' if same else 'DIFFERS FROM'} full rebuild)")
+
+    student = matrix.students[0]
+    grades = {course: value for s, course, value in records if s == student}
+    lookup_s, _ = time_best(lambda: rebuilt.recommend(grades, 3), args.repeat * 10)
+    scan_s, _ = time_best(lambda: scan_recommend(updated, grades, rebuilt.k, rebuilt.min_overlap, 3), args.repeat)
+    print(f"recommend lookup {lookup_s * 1000:>9.3f} ms  ({len(grades)} courses taken)")
+    print(f"recommend scan   {scan_s * 1000:>9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
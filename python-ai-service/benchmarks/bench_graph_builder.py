@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark the native MindmapTree builder against the networkx DiGraph path
+
+Only the graph stage is timed: topics are extracted once per syllabus and
+both backends turn them into the frontend node/edge lists.
+
+Usage: python benchmarks/bench_graph_builder.py [--repeat N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVICE_DIR)
+
+from app.mindmap_generator import MindmapGenerator
+
+
+def build_syllabus(lines: int, subtopics_per_unit: int = 9) -> str:
+    """Synthetic syllabus with the given number of lines"""
+    out = []
+    unit = 0
+    while len(out) < lines:
+        unit += 1
+        out.append(f"Unit {unit}: Topic area {unit}")
+        for sub in range(1, subtopics_per_unit + 1):
+            out.append(f"- Subtopic {unit}.{sub} covering definitions, examples and practice problems")
+    return "\n".join(out[:lines])
+
+
+def time_best(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def networkx_import_ms() -> float:
+    snippet = "import time; t = time.perf_counter(); import networkx; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, '-c', snippet], capture_output=True, text=True, check=True).stdout
+    return float(output.strip()) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    native = MindmapGenerator(graph_backend='native')
+    networkx = MindmapGenerator(graph_backend='networkx')
+
+    print(f"networkx import: {networkx_import_ms():.0f} ms (avoided entirely by the native backend)\n")
+    print(f"{'lines':>8} {'nodes':>7} {'networkx ms':>12} {'native ms':>10} {'speedup':>8}")
+    for lines in (1000, 5000, 20000):
+        topics = native.text_processor.extract_topics(build_syllabus(lines))
+        assert networkx._build_networkx(topics) == native._build_tree(topics).to_frontend()
+
+        graph_time = time_best(lambda: networkx._build_networkx(topics), args.repeat)
+        tree_time = time_best(lambda: native._build_tree(topics).to_frontend(), args.repeat)
+        nodes = len(native._build_tree(topics))
+        print(f"{lines:>8} {nodes:>7} {graph_time * 1000:>12.2f} {tree_time * 1000:>10.2f} {graph_time / tree_time:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
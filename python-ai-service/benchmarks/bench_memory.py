@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark peak memory of mindmap generation for large syllabi
+
+Measures the Python heap high-water mark (tracemalloc) of one
+generate_mindmap call above the input text and the result, for the
+whole-document path and for the chunked path taken when a syllabus is
+longer than the generator's chunk_size.
+
+Usage: python benchmarks/bench_memory.py [--sizes MB ...] [--chunk-size KB]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVICE_DIR)
+
+import synthetic
+from app.mindmap_generator import MindmapGenerator
+
+
+def measure(func):
+    """(peak MB above the starting heap, result size MB, seconds)"""
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (peak - base) / 1e6, (current - base) / 1e6, elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1, 4, 16], help='syllabus sizes in MB')
+    parser.add_argument('--chunk-size', type=int, default=1024, help='chunk size in KB')
+    args = parser.parse_args()
+
+    generator = MindmapGenerator(chunk_size=args.chunk_size * 1024)
+    print(f"{'MB':>6} {'path':<10} {'peak MB':>9} {'result MB':>10} {'seconds':>8}")
+    for size in args.sizes:
+        text = synthetic.generate_sized_syllabus(1234, int(size * 1024 * 1024))
+        paths = {
+            'whole': lambda: generator._generate_mindmap(text),
+            'chunked': lambda: generator._generate_mindmap_chunked(text)
+        }
+        for name, path in paths.items():
+            peak, kept, elapsed, result = measure(path)
+            del result
+            print(f"{size:>6.2f} {name:<10} {peak:>9.1f} {kept:>10.1f} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark mindmap response size and encoding time
+
+For syllabi of several sizes, compares the response as FastAPI used to
+produce it (jsonable_encoder + json.dumps) with the fast encoder, the
+compact format and gzip/brotli compression: bytes on the wire and the
+time to turn the result dict into those bytes. The last columns time a
+cached /api/generate-mindmap request end to end (in-process ASGI call),
+so they include routing and request parsing but not the mindmap itself.
+
+Usage: python benchmarks/bench_payload.py [--repeat N] [--sizes KB ...]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVICE_DIR)
+
+from run_suite import ASGIClient  # also makes the service hermetic (no index or cache files)
+import synthetic
+from fastapi.encoders import jsonable_encoder
+from app.responses import brotli, compact_mindmap, json_dumps
+
+
+def time_best(func, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def default_encoding(content):
+    """What FastAPI did for a returned dict before FastJSONResponse"""
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[16, 256, 1024], help='syllabus sizes in KB')
+    args = parser.parse_args()
+
+    import main as service
+    client = ASGIClient(service.app)
+
+    print(f"{'KB':>5} {'variant':<22} {'bytes':>10} {'encode ms':>10} {'request ms':>11}")
+    try:
+        for size in args.sizes:
+            text = synthetic.generate_sized_syllabus(1234, size * 1024)
+            payload = {'syllabus_text': text}
+            status, _ = client.request('POST', '/api/generate-mindmap', payload)  # fills the result cache
+            assert status == 200
+            result = service.mindmap_cache.get(service.mindmap_cache_key(text))
+            full = {'success': True, 'cached': True, 'data': result, 'message': ''}
+            compact = {**full, 'data': compact_mindmap(result)}
+
+            variants = [
+                ('default json (before)', lambda: default_encoding(full), None),
+                ('fast json', lambda: json_dumps(full), '/api/generate-mindmap'),
+                ('compact', lambda: json_dumps({**full, 'data': compact_mindmap(result)}), '/api/generate-mindmap?format=compact'),
+                ('compact + gzip', lambda: gzip.compress(json_dumps(compact), compresslevel=6), None),
+            ]
+            if brotli is not None:
+                variants.append(('compact + brotli', lambda: brotli.compress(json_dumps(compact), quality=4), None))
+                variants.append(('full + brotli', lambda: brotli.compress(json_dumps(full), quality=4), None))
+            for name, encode, path in variants:
+                encode_ms, body = time_best(encode, args.repeat)
+                request_ms = ''
+                if path is not None:
+                    elapsed, (status, _) = time_best(lambda: client.request('POST', path, payload), args.repeat)
+                    assert status == 200, f"{path} returned {status}"
+                    request_ms = f"{elapsed:.2f}"
+                print(f"{size:>5} {name:<22} {len(body):>10} {encode_ms:>10.2f} {request_ms:>11}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark sentence/word segmentation throughput (MB of syllabus per second)
+
+Compares the 'accurate' segmentation (punkt sentences, Treebank words, as
+TextBlob does) with the regex 'fast' path for analyze_complexity on its
+own, for the tokens keyword extraction needs, and for a whole
+generate_mindmap call. Each row also reports whether both modes produced
+the same complexity figures.
+
+Usage: python benchmarks/bench_segmentation.py [--repeat N] [--sizes MB ...]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVICE_DIR)
+
+import synthetic
+from app import nlp_resources
+from app.mindmap_generator import MindmapGenerator
+from app.text_processor import TextProcessor
+
+
+def time_best(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--sizes', type=float, nargs='+', default=[0.25, 1, 4], help='syllabus sizes in MB')
+    args = parser.parse_args()
+
+    nlp_resources.warm_up()
+    processors = {mode: TextProcessor(segmentation=mode) for mode in ('accurate', 'fast')}
+    generators = {mode: MindmapGenerator(segmentation=mode) for mode in ('accurate', 'fast')}
+
+    print(f"{'MB':>6} {'step':<20} {'accurate MB/s':>14} {'fast MB/s':>10} {'speedup':>8} {'same':>5}")
+    for size in args.sizes:
+        text = synthetic.generate_sized_syllabus(1234, int(size * 1024 * 1024))
+        mb = len(text.encode('utf-8')) / 1e6
+        same = processors['accurate'].analyze_complexity(text) == processors['fast'].analyze_complexity(text)
+        steps = {
+            'analyze_complexity': lambda mode: processors[mode].analyze_complexity(text),
+            'tokens': lambda mode: processors[mode].build_document(text).tokens,
+            'generate_mindmap': lambda mode: generators[mode].generate_mindmap(text)
+        }
+        for name, step in steps.items():
+            accurate = time_best(lambda: step('accurate'), args.repeat)
+            fast = time_best(lambda: step('fast'), args.repeat)
+            print(f"{mb:>6.2f} {name:<20} {mb / accurate:>14.2f} {mb / fast:>10.2f} {accurate / fast:>7.1f}x {'yes' if same else 'no':>5}")
+
+
+if __name__ == "__main__":
+    main()
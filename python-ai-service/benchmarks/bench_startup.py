@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark service cold start: import time, time to /health, /ready and first mindmap
+
+Every measurement runs in a fresh interpreter so nothing is already warm.
+
+Usage: python benchmarks/bench_startup.py [--repeat N]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+SAMPLE_SYLLABUS = """Unit 1: Programming Fundamentals
+- Variables and data types
+- Control structures
+Unit 2: Data Structures
+- Arrays and lists
+- Trees and graphs
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(preload: str) -> float:
+    env = dict(os.environ, AI_NLP_PRELOAD=preload)
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_SNIPPET],
+        cwd=SERVICE_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def wait_for(url: str, deadline: float) -> None:
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} did not become available")
+
+
+def measure_first_request(preload: str, timeout: float = 60.0) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(os.environ, AI_NLP_PRELOAD=preload)
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=SERVICE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = start + timeout
+        wait_for(f"{base}/health", deadline)
+        health = time.perf_counter() - start
+        if preload != 'lazy':
+            # Lazy mode only becomes ready when something calls warm_up
+            wait_for(f"{base}/ready", deadline)
+        ready = time.perf_counter() - start
+
+        body = json.dumps({'syllabus_text': SAMPLE_SYLLABUS}).encode('utf-8')
+        request = urllib.request.Request(
+            f"{base}/api/generate-mindmap", data=body, headers={'Content-Type': 'application/json'}
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+        first_request = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait()
+    return {'health': health, 'ready': ready, 'first_request': first_request}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'preload':>10} {'import ms':>10} {'health ms':>10} {'ready ms':>10} {'1st req ms':>11}")
+    for preload in ('lazy', 'background', 'import'):
+        imports = [measure_import(preload) for _ in range(args.repeat)]
+        runs = [measure_first_request(preload) for _ in range(args.repeat)]
+        print(
+            f"{preload:>10} "
+            f"{statistics.median(imports) * 1000:>10.0f} "
+            f"{statistics.median(r['health'] for r in runs) * 1000:>10.0f} "
+            f"{statistics.median(r['ready'] for r in runs) * 1000:>10.0f} "
+            f"{statistics.median(r['first_request'] for r in runs) * 1000:>11.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
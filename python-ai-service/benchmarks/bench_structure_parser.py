@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark structural parsing throughput (MB of syllabus per second)
+
+Compares the original extract_topics (pattern compiled per call, two
+matches per unit line, overview inserted at the front) with the current
+single-pass STRUCTURE_PATTERN parser, on bulleted and numbered outlines.
+"parse only" times iter_topic_segments over lines that are already
+cleaned; "extract_topics" includes line cleaning, as in the service.
+
+Usage: python benchmarks/bench_structure_parser.py [--repeat N] [--sizes MB ...]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVICE_DIR)
+
+import synthetic
+from app.text_processor import TextProcessor, iter_clean_lines
+
+
+def legacy_extract_topics(text: str):
+    """extract_topics as it was before the single-pass parser"""
+    lines = text.split('\n')
+    topics = []
+    current_unit = None
+    unit_pattern = re.compile(r'^(unit|module|chapter|section)\s+\d+[:.]?\s*', re.IGNORECASE)
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        unit_match = unit_pattern.match(line)
+        if unit_match:
+            current_unit = {'id': f"unit_{len(topics) + 1}", 'title': line, 'type': 'unit',
+                            'content': line, 'subtopics': []}
+            topics.append(current_unit)
+        elif current_unit:
+            if len(line) > 5 and not unit_pattern.match(line):
+                current_unit['subtopics'].append({
+                    'id': f"{current_unit['id']}_sub_{len(current_unit['subtopics']) + 1}",
+                    'title': line, 'type': 'topic', 'content': line
+                })
+        else:
+            if not topics or topics[0]['title'] != "Course Overview":
+                topics.insert(0, {'id': "unit_0", 'title': "Course Overview", 'type': 'unit',
+                                  'content': "General course information", 'subtopics': []})
+            topics[0]['subtopics'].append({
+                'id': f"unit_0_sub_{len(topics[0]['subtopics']) + 1}",
+                'title': line, 'type': 'topic', 'content': line
+            })
+    return topics
+
+
+def time_best(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1, 4, 16], help='syllabus sizes in MB')
+    args = parser.parse_args()
+
+    processor = TextProcessor()
+    print(f"{'outline':<10} {'MB':>6} {'nodes':>8} {'legacy MB/s':>12} {'parse only MB/s':>16} {'extract_topics MB/s':>20}")
+    for numbered in (False, True):
+        for size in args.sizes:
+            text = synthetic.generate_sized_syllabus(1234, int(size * 1024 * 1024), numbered=numbered)
+            mb = len(text.encode('utf-8')) / 1e6
+            lines = list(iter_clean_lines(text))
+            topics = processor.extract_topics(text)
+            nodes = len(topics) + sum(len(unit['subtopics']) for unit in topics)
+
+            legacy = time_best(lambda: legacy_extract_topics(text), args.repeat)
+            parse_only = time_best(lambda: list(processor.iter_topic_segments(lines)), args.repeat)
+            full = time_best(lambda: processor.extract_topics(text), args.repeat)
+            print(f"{'numbered' if numbered else 'bulleted':<10} {mb:>6.1f} {nodes:>8} {mb / legacy:>12.1f} "
+                  f"{mb / parse_only:>16.1f} {mb / full:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
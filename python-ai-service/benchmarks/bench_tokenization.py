@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark the tokenize-once SyllabusDocument against the old three-parse path
+
+Usage: python benchmarks/bench_tokenization.py [--repeat N]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textblob import TextBlob
+from app.text_processor import TextProcessor
+
+UNIT_TEMPLATE = """
+Unit {n}: Topic area number {n}
+   - Introduction to the concepts covered in unit {n}, including definitions and notation.
+   - Worked examples of algorithms, data structures and their complexity analysis.
+   - Practical sessions: implementing, testing and debugging programs (lab {n}).
+   - Assessment: quizzes, assignments (10%) and a mid-term review of unit {n}.
+"""
+
+
+def build_syllabus(target_kb: int) -> str:
+    """Build a synthetic syllabus of roughly target_kb kilobytes"""
+    parts = ["Course description: fundamentals of computer science and software engineering."]
+    n = 1
+    while sum(len(p) for p in parts) < target_kb * 1024:
+        parts.append(UNIT_TEMPLATE.format(n=n))
+        n += 1
+    return "\n".join(parts)
+
+
+def legacy_pipeline(processor: TextProcessor, text: str):
+    """The pre-SyllabusDocument path: clean twice, then parse with TextBlob twice"""
+    cleaned = re.sub(r'\s+', ' ', text)
+    cleaned = re.sub(r'[^\w\s.,;:!?-]', '', cleaned).strip()
+
+    blob = TextBlob(cleaned.lower())
+    words = [w for w in blob.words if w not in processor.stop_words and len(w) > 3]
+    word_freq = {}
+    for word in words:
+        word_freq[word] = word_freq.get(word, 0) + 1
+    sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:15]
+
+    blob = TextBlob(text)
+    len(blob.sentences)
+    len(blob.words)
+
+
+def document_pipeline(processor: TextProcessor, text: str):
+    """Current path: one SyllabusDocument shared by every step"""
+    document = processor.build_document(text)
+    processor.extract_topics(document)
+    processor.extract_keywords(document, 15)
+    processor.analyze_complexity(document)
+
+
+def time_best(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    processor = TextProcessor()
+    print(f"{'size':>8} {'legacy ms':>12} {'document ms':>12} {'speedup':>8}")
+    for size_kb in (5, 20, 50):
+        text = build_syllabus(size_kb)
+        legacy = time_best(lambda: legacy_pipeline(processor, text), args.repeat)
+        document = time_best(lambda: document_pipeline(processor, text), args.repeat)
+        print(f"{size_kb:>6}KB {legacy * 1000:>12.1f} {document * 1000:>12.1f} {legacy / document:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Reproducible benchmark suite for the AI service hot paths
+
+Runs MindmapGenerator.generate_mindmap, SuggestionEngine.generate_suggestions
+and the FastAPI endpoints (called in-process through the ASGI interface, no
+server or HTTP client needed) over seeded synthetic inputs. For each case it
+records throughput, p50/p99 latency and peak traced memory, writes everything
+to a JSON file and optionally compares it with an earlier run.
+
+Usage:
+    python benchmarks/run_suite.py [--quick] [--output FILE] [--compare BASELINE.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVICE_DIR)
+
+# Keep runs hermetic: no keyword index or cache files, NLP loaded before timing starts
+os.environ['AI_KEYWORD_INDEX_PATH'] = ''
+os.environ['AI_MINDMAP_CACHE_BACKEND'] = ''
+os.environ['AI_NLP_PRELOAD'] = 'import'
+
+import synthetic
+
+SEED = 1234
+# Regressions above this fraction of the baseline p50 are flagged by --compare
+REGRESSION_THRESHOLD = 0.10
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def measure(func: Callable[[int], Any], iterations: int, warmup: int = 1) -> Dict[str, float]:
+    """Latency distribution over timed calls, then peak memory from one traced call
+
+    func receives the iteration number so callers can vary inputs (e.g. to
+    defeat a result cache). Memory is traced in a separate call because
+    tracemalloc slows allocation-heavy code and would skew the timings.
+    The code under test prints debug output, which is discarded.
+    """
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return _measure(func, iterations, warmup)
+
+
+def _measure(func: Callable[[int], Any], iterations: int, warmup: int) -> Dict[str, float]:
+    for i in range(warmup):
+        func(-1 - i)
+
+    gc.collect()
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(i)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    gc.collect()
+    tracemalloc.start()
+    func(iterations)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    return {
+        'iterations': iterations,
+        'throughput_per_s': round(iterations / total, 3) if total else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(total / iterations * 1000, 3),
+        'peak_memory_kb': round(peak / 1024, 1)
+    }
+
+
+class ASGIClient:
+    """Minimal in-process client: builds an ASGI scope and collects the response"""
+
+    def __init__(self, app):
+        self.app = app
+        self.loop = asyncio.new_event_loop()
+
+    def request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Tuple[int, bytes]:
+        return self.loop.run_until_complete(self._request(method, path, payload))
+
+    async def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]]) -> Tuple[int, bytes]:
+        body = json.dumps(payload).encode() if payload is not None else b''
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': query.encode(), 'root_path': '',
+            'headers': [(b'host', b'bench'), (b'content-type', b'application/json'),
+                        (b'content-length', str(len(body)).encode())],
+            'client': ('127.0.0.1', 0), 'server': ('bench', 80)
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        status = 0
+        chunks = []
+        finished = asyncio.Event()
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            # Streaming responses watch for a disconnect; only report one once the response is complete
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body', False):
+                    finished.set()
+
+        await self.app(scope, receive, send)
+        return status, b''.join(chunks)
+
+    def close(self) -> None:
+        self.loop.close()
+
+
+def syllabus_cases(quick: bool) -> List[Tuple[str, str]]:
+    cases = []
+    for size_kb in ((4, 64) if quick else (4, 64, 512)):
+        cases.append((f"sized_{size_kb}kb", synthetic.generate_sized_syllabus(SEED, size_kb * 1024)))
+    for shape, params in synthetic.SHAPES.items():
+        cases.append((shape, synthetic.generate_syllabus(SEED, **params)))
+    return cases
+
+
+def iterations_for(text: str, quick: bool) -> int:
+    budget = 5 if quick else 20
+    return max(3, min(budget, budget * 32 * 1024 // max(len(text), 1)))
+
+
+def bench_mindmap(results: Dict[str, Any], quick: bool) -> None:
+    from app.mindmap_generator import MindmapGenerator
+
+    generator = MindmapGenerator()
+    for name, text in syllabus_cases(quick):
+        stats = measure(lambda i: generator.generate_mindmap(text), iterations_for(text, quick))
+        stats['input_bytes'] = len(text.encode('utf-8'))
+        stats['mb_per_s'] = round(stats['input_bytes'] / (stats['p50_ms'] / 1000) / 1e6, 3)
+        results[f"mindmap.{name}"] = stats
+        report(f"mindmap.{name}", stats)
+
+
+def bench_suggestions(results: Dict[str, Any], quick: bool) -> None:
+    from app.suggestion_engine import SuggestionEngine
+
+    engine = SuggestionEngine()
+    cohort = synthetic.generate_cohort(SEED, 200)
+    stats = measure(lambda i: engine.generate_suggestions(cohort[i % len(cohort)]), 50 if quick else 200)
+    results['suggestions.single'] = stats
+    report('suggestions.single', stats)
+
+    for size in ((100,) if quick else (100, 1000)):
+        students = synthetic.generate_cohort(SEED + size, size)
+        stats = measure(lambda i: engine.generate_suggestions_batch(students), 3 if quick else 10)
+        stats['students'] = size
+        results[f"suggestions.batch_{size}"] = stats
+        report(f"suggestions.batch_{size}", stats)
+
+
+def bench_endpoints(results: Dict[str, Any], quick: bool) -> None:
+    import main
+
+    client = ASGIClient(main.app)
+    text = synthetic.generate_sized_syllabus(SEED, 16 * 1024)
+    student = synthetic.generate_cohort(SEED, 1)[0]
+    students = synthetic.generate_cohort(SEED, 100)
+
+    def post(path: str, payload: Dict[str, Any]) -> None:
+        status, body = client.request('POST', path, payload)
+        if status != 200:
+            raise RuntimeError(f"{path} returned {status}: {body[:200]!r}")
+
+    iterations = 10 if quick else 50
+    cases = {
+        # A distinct first line per call so every request misses the result cache
+        'endpoint.mindmap_cold': lambda i: post('/api/generate-mindmap', {'syllabus_text': f"Run {i}\n{text}"}),
+        'endpoint.mindmap_cached': lambda i: post('/api/generate-mindmap', {'syllabus_text': text}),
+        'endpoint.mindmap_stream': lambda i: post('/api/generate-mindmap/stream', {'syllabus_text': text}),
+        'endpoint.suggestions': lambda i: post('/api/get-suggestions', student),
+        'endpoint.suggestions_batch_100': lambda i: post('/api/get-suggestions/batch', {'students': students}),
+        'endpoint.cohort_analytics_100': lambda i: post('/api/cohort-analytics', {'students': students}),
+    }
+    try:
+        for name, func in cases.items():
+            stats = measure(func, iterations)
+            results[name] = stats
+            report(name, stats)
+    finally:
+        client.close()
+        main.mindmap_executor.shutdown()
+        main.suggestion_executor.shutdown()
+
+
+def report(name: str, stats: Dict[str, Any]) -> None:
+    print(f"{name:<34} {stats['throughput_per_s']:>10.2f}/s {stats['p50_ms']:>10.2f} {stats['p99_ms']:>10.2f} "
+          f"{stats['peak_memory_kb']:>12.1f}")
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVICE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit,
+        'seed': SEED
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> int:
+    """Print p50/p99/memory changes against a baseline; returns the number of regressions"""
+    regressions = 0
+    print(f"\n{'case':<34} {'p50 change':>11} {'p99 change':>11} {'memory change':>14}")
+    for name, stats in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            print(f"{name:<34} {'new':>11}")
+            continue
+
+        def change(key: str) -> float:
+            return (stats[key] - before[key]) / before[key] if before[key] else 0.0
+
+        p50 = change('p50_ms')
+        flag = ''
+        if p50 > REGRESSION_THRESHOLD:
+            regressions += 1
+            flag = '  REGRESSION'
+        print(f"{name:<34} {p50:>+10.1%} {change('p99_ms'):>+10.1%} {change('peak_memory_kb'):>+13.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--quick', action='store_true', help='smaller inputs and fewer iterations')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', metavar='BASELINE', help='earlier results file to compare against')
+    parser.add_argument('--only', choices=['mindmap', 'suggestions', 'endpoints'], action='append',
+                        help='run only these groups (repeatable)')
+    args = parser.parse_args()
+
+    groups = {'mindmap': bench_mindmap, 'suggestions': bench_suggestions, 'endpoints': bench_endpoints}
+    selected = args.only or list(groups)
+
+    # Importing the app package before timing keeps one-off import costs out of the results
+    from app import nlp_resources
+    nlp_resources.warm_up()
+
+    results: Dict[str, Any] = {}
+    print(f"{'case':<34} {'throughput':>12} {'p50 ms':>10} {'p99 ms':>10} {'peak mem KB':>12}")
+    for group in selected:
+        groups[group](results, args.quick)
+
+    run = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'quick': args.quick,
+        'environment': environment(),
+        'results': results
+    }
+    output = args.output or os.path.join(SERVICE_DIR, 'benchmarks', 'results',
+                                         f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(run, json.load(f))
+        if regressions:
+            print(f"\n{regressions} case(s) slower than baseline by more than {REGRESSION_THRESHOLD:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
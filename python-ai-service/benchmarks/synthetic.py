@@ -0,0 +1,112 @@
+"""
+Seeded generators for synthetic syllabi and student cohorts
+
+Every generator takes an explicit seed so benchmark inputs are identical
+between runs and machines.
+"""
+
+import random
+from typing import Any, Dict, List, Tuple
+
+WORDS = (
+    "algorithm analysis array binary complexity data database design distributed "
+    "dynamic encryption function graph hashing heap inheritance interface kernel "
+    "linked machine memory network object optimization parallel pointer probability "
+    "process protocol queue recursion regression scheduling search security sorting "
+    "stack statistics structure system testing thread tree variable vector"
+).split()
+
+GRADES = ['A+', 'A', 'B+', 'B', 'C+', 'C', 'D', 'F']
+GRADE_POINTS = {'A+': 10, 'A': 9, 'B+': 8, 'B': 7, 'C+': 6, 'C': 5, 'D': 4, 'F': 0}
+COURSES = [
+    'Mathematics', 'Physics', 'Chemistry', 'Computer Science', 'Data Structures',
+    'Operating Systems', 'Databases', 'Networks', 'Statistics', 'Software Engineering'
+]
+UNIT_KEYWORDS = ['Unit', 'Module', 'Chapter', 'Section']
+
+# Named shapes exercising different parts of the parser
+SHAPES = {
+    # many short units
+    'many_units': {'units': 200, 'subtopics': 3, 'words_per_line': 8},
+    # few units with long subtopic lists
+    'deep_subtopics': {'units': 10, 'subtopics': 80, 'words_per_line': 10},
+    # few lines, each very long
+    'long_lines': {'units': 20, 'subtopics': 5, 'words_per_line': 120},
+    # numbered items (1.1, 1.2, ...) each with nested bullets
+    'numbered_outline': {'units': 20, 'subtopics': 10, 'words_per_line': 8, 'numbered': True},
+}
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def generate_syllabus(seed: int, units: int, subtopics: int, words_per_line: int,
+                      intro_lines: int = 3, numbered: bool = False) -> str:
+    """A syllabus with an overview, then units of bulleted (or numbered, with nested bullets) subtopics"""
+    rng = random.Random(seed)
+    lines = [_sentence(rng, words_per_line) for _ in range(intro_lines)]
+    for unit in range(1, units + 1):
+        lines.append(f"{rng.choice(UNIT_KEYWORDS)} {unit}: {_sentence(rng, 4)}")
+        for item in range(1, subtopics + 1):
+            if numbered:
+                lines.append(f"{unit}.{item} {_sentence(rng, words_per_line)}")
+                lines.extend(f"   - {_sentence(rng, words_per_line)}" for _ in range(2))
+            else:
+                lines.append(f"- {_sentence(rng, words_per_line)}")
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def generate_sized_syllabus(seed: int, target_bytes: int, numbered: bool = False) -> str:
+    """A syllabus of roughly target_bytes, with ten subtopics per unit"""
+    # One unit of 10 subtopic lines at 10 words is roughly 920 bytes (three times that when numbered)
+    units = max(1, target_bytes // (2760 if numbered else 920))
+    return generate_syllabus(seed, units=units, subtopics=10, words_per_line=10, numbered=numbered)
+
+
+def generate_student(rng: random.Random, student_id: str) -> Dict[str, Any]:
+    courses = rng.sample(COURSES, rng.randint(3, 8))
+    return {
+        'student_id': student_id,
+        'grades': [{'course': course, 'grade': rng.choice(GRADES)} for course in courses],
+        'attendance': {course: round(rng.uniform(50, 100), 1) for course in courses},
+        'exam_scores': [{'exam': f"{course} Midterm", 'score': rng.randint(30, 100)} for course in courses],
+        'current_semester': rng.randint(1, 8),
+        'department': rng.choice(['Computer Science', 'Business', 'Physics']),
+        'upcoming_exams': [
+            {'course': course, 'days_remaining': rng.randint(1, 40), 'total_marks': 100}
+            for course in rng.sample(courses, 2)
+        ],
+        'syllabus_focus_areas': []
+    }
+
+
+def generate_cohort(seed: int, size: int) -> List[Dict[str, Any]]:
+    """A cohort of students with realistic-looking grades, attendance and exams"""
+    rng = random.Random(seed)
+    return [generate_student(rng, f"STU{index:05d}") for index in range(size)]
+
+
+def generate_grade_records(seed: int, students: int, courses: int, per_student: int = 30) -> List[Tuple[str, str, str]]:
+    """(student_id, course, grade) rows of an exported grade file
+
+    Courses belong to a few tracks and each student has an aptitude per
+    track, so grades in courses of the same track are correlated.
+    """
+    rng = random.Random(seed)
+    tracks = 8
+    course_names = [f"C{index:04d}" for index in range(courses)]
+    records = []
+    for student in range(students):
+        aptitude = [rng.gauss(0, 1.5) for _ in range(tracks)]
+        home = rng.randrange(tracks)
+        # Most courses come from the student's own track
+        taken = {rng.randrange(home, courses, tracks) if rng.random() < 0.7 else rng.randrange(courses)
+                 for _ in range(per_student)}
+        for course in sorted(taken):
+            points = 7 + aptitude[course % tracks] + rng.gauss(0, 1)
+            grade = next((letter for letter in GRADES[:-1] if points >= GRADE_POINTS[letter] - 0.5), 'F')
+            records.append((f"STU{student:06d}", course_names[course], grade))
+    return records
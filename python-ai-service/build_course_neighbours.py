@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Precompute the course neighbour table from an exported grade file
+
+Reads a CSV with student_id, course and grade columns (letter grades or
+grade points) and writes the top-k similar courses of every course to
+the table file the service memory-maps for course recommendations.
+
+When the table already exists it is refreshed: only courses whose grades
+changed since the last run are recomputed, so rerunning this after new
+grades are exported is cheap. --full rebuilds from scratch (also done
+automatically when --k or --min-overlap differ from the existing table).
+Running workers pick up the new file within a minute.
+
+Usage: python build_course_neighbours.py GRADES_CSV [--output PATH] [--k N] [--min-overlap N] [--full]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+from app import config
+from app.course_recommender import GradeMatrix, NeighbourTable, build_neighbour_table, refresh_neighbour_table
+from app.suggestion_engine import SuggestionEngine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('grades', help='exported grade CSV (student_id, course, grade)')
+    parser.add_argument('--output', default=config.COURSE_NEIGHBOURS_PATH)
+    parser.add_argument('--k', type=int, default=config.COURSE_NEIGHBOURS_K)
+    parser.add_argument('--min-overlap', type=int, default=config.COURSE_MIN_OVERLAP)
+    parser.add_argument('--full', action='store_true', help='rebuild instead of refreshing')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if not args.output:
+        sys.exit("No output path (set --output or AI_COURSE_NEIGHBOURS_PATH)")
+
+    start = time.perf_counter()
+    matrix = GradeMatrix.from_csv(args.grades, SuggestionEngine().grade_points)
+    print(f"Loaded {matrix.grades} grades: {len(matrix.students)} students, {len(matrix.courses)} courses")
+
+    table = None
+    if not args.full and os.path.exists(args.output):
+        table = NeighbourTable.load(args.output)
+        if table.k != args.k or table.min_overlap != args.min_overlap:
+            print(f"Existing table uses k={table.k}, min overlap={table.min_overlap}; rebuilding")
+            table = None
+
+    if table is None:
+        table = build_neighbour_table(matrix, args.k, args.min_overlap)
+        recomputed = len(matrix.courses)
+    else:
+        table, recomputed = refresh_neighbour_table(table, matrix)
+    table.save(args.output)
+    print(f"Wrote {args.output}: {recomputed} of {len(table.courses)} courses computed "
+          f"in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
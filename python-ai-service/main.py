@@ -1,7 +1,11 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+from typing import Dict, Any, List, Optional, Union
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
 import uvicorn
 import logging
 import sys
@@ -9,18 +13,82 @@ import sys
 # Add current directory to path for imports
 sys.path.append('.')
 
-from app.mindmap_generator import MindmapGenerator
-from app.suggestion_engine import SuggestionEngine
+from app import config, nlp_resources, tasks
+from app.executor import WorkExecutor, ExecutorSaturatedError, ExecutorTimeoutError
+from app.cache import SQLiteCacheStore, create_cache_store, create_result_cache, mindmap_cache_key
+from app.course_calendar import CalendarNotRegisteredError, CourseCalendar
+from app.jobs import JobRunner, JobStore
+from app.limits import BodySizeLimitMiddleware
+from app.responses import RESPONSE_FORMATS, CompressionMiddleware, FastJSONResponse, compact_mindmap
+from app.singleflight import SingleFlight
+from app.snapshots import SuggestionSnapshotStore, payload_fingerprint
+from app.suggestion_engine import recommendation_seed
+from app.metrics import metrics, render_metric, start_request_timing, server_timing_header
+from app.profiling import folded_stacks, profiler, pstats_bytes
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Load NLP resources now so forked workers and snapshots start warm
+if config.NLP_PRELOAD == 'import':
+    nlp_resources.warm_up()
+
+async def warm_up_in_background():
+    try:
+        await asyncio.to_thread(nlp_resources.warm_up)
+    except Exception:
+        # Already logged; /ready keeps reporting the error
+        pass
+
+def sqlite_cache_stores() -> List[SQLiteCacheStore]:
+    """One store per SQLite cache file this process uses (stores sharing a path share its table)"""
+    stores = {}
+    for store in (mindmap_cache.backend, suggestion_snapshots.store, course_calendar.store):
+        if isinstance(store, SQLiteCacheStore):
+            stores.setdefault(store.path, store)
+    return list(stores.values())
+
+async def purge_caches_periodically(stores: List[SQLiteCacheStore]):
+    """Drop expired rows and enforce the row cap, at startup and then every purge interval"""
+    while True:
+        for store in stores:
+            try:
+                removed = await asyncio.to_thread(store.purge_expired, config.CACHE_MAX_ROWS)
+            except Exception as e:
+                logger.warning(f"Purging cache {store.path} failed: {e}")
+            else:
+                if removed:
+                    logger.info(f"Purged {removed} rows from cache {store.path}")
+        await asyncio.sleep(config.CACHE_PURGE_INTERVAL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.NLP_PRELOAD == 'background':
+        app.state.warm_up_task = asyncio.create_task(warm_up_in_background())
+    background_tasks = [asyncio.create_task(mindmap_job_runner.run())]
+    stores = sqlite_cache_stores()
+    if stores:
+        background_tasks.append(asyncio.create_task(purge_caches_periodically(stores)))
+    yield
+    for task in background_tasks:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    tasks.save_keyword_index()
+    mindmap_executor.shutdown()
+    suggestion_executor.shutdown()
+    mindmap_job_executor.shutdown()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Academic AI Service",
     description="AI-powered academic assistance for mindmap generation and student suggestions",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Configure CORS
@@ -31,10 +99,111 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=config.COMPRESSION_MIN_SIZE,
+    gzip_level=config.GZIP_LEVEL,
+    brotli_quality=config.BROTLI_QUALITY
+)
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=config.MAX_REQUEST_BYTES)
 
 # Initialize AI components
-mindmap_generator = MindmapGenerator()
-suggestion_engine = SuggestionEngine()
+mindmap_generator = tasks.get_mindmap_generator()
+suggestion_engine = tasks.get_suggestion_engine()
+
+# CPU-bound work runs on these pools so the event loop stays responsive
+mindmap_executor = WorkExecutor(
+    'mindmap',
+    kind=config.MINDMAP_EXECUTOR,
+    max_workers=config.MINDMAP_WORKERS,
+    queue_size=config.EXECUTOR_QUEUE_SIZE,
+    timeout=config.REQUEST_TIMEOUT
+)
+suggestion_executor = WorkExecutor(
+    'suggestions',
+    kind=config.SUGGESTION_EXECUTOR,
+    max_workers=config.SUGGESTION_WORKERS,
+    queue_size=config.EXECUTOR_QUEUE_SIZE,
+    timeout=config.REQUEST_TIMEOUT
+)
+# Bulk mindmap jobs get their own pool so a department-wide job never delays interactive requests
+mindmap_job_executor = WorkExecutor(
+    'mindmap-jobs',
+    kind=config.MINDMAP_EXECUTOR,
+    max_workers=config.MINDMAP_JOB_WORKERS,
+    queue_size=config.MINDMAP_JOB_WORKERS,
+    timeout=config.MINDMAP_JOB_ITEM_TIMEOUT
+)
+
+# Mindmap results keyed on the normalized syllabus text and days remaining
+mindmap_cache = create_result_cache(
+    config.MINDMAP_CACHE_SIZE,
+    config.MINDMAP_CACHE_TTL,
+    backend=config.MINDMAP_CACHE_BACKEND,
+    path=config.MINDMAP_CACHE_PATH
+)
+suggestion_snapshots = SuggestionSnapshotStore(create_cache_store(
+    config.SUGGESTION_SNAPSHOT_SIZE,
+    config.SUGGESTION_SNAPSHOT_TTL,
+    backend=config.SUGGESTION_SNAPSHOT_BACKEND,
+    path=config.SUGGESTION_SNAPSHOT_PATH
+))
+course_calendar = CourseCalendar(create_cache_store(
+    config.COURSE_CALENDAR_SIZE,
+    config.COURSE_CALENDAR_TTL,
+    backend=config.COURSE_CALENDAR_BACKEND,
+    path=config.COURSE_CALENDAR_PATH
+))
+
+# Concurrent identical requests wait on one computation (keyed like the caches above)
+mindmap_flights = SingleFlight('mindmap')
+suggestion_flights = SingleFlight('suggestions')
+
+# Clients send this header to get a Server-Timing breakdown of the pipeline stages
+TIMING_REQUEST_HEADER = 'x-request-timing'
+
+def wants_timing(http_request: Request) -> bool:
+    return metrics.enabled and http_request.headers.get(TIMING_REQUEST_HEADER, '').lower() in ('1', 'true')
+
+def check_syllabus_size(text: str, label: str = "Syllabus text"):
+    """413 for syllabi over the configured character limit"""
+    if len(text) > config.MAX_SYLLABUS_CHARS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{label} has {len(text)} characters, over the limit of {config.MAX_SYLLABUS_CHARS}"
+        )
+
+# Admin endpoints authenticate with this header (value: AI_ADMIN_TOKEN)
+ADMIN_TOKEN_HEADER = 'x-admin-token'
+
+def check_admin(http_request: Request):
+    """404 while no admin token is configured, 403 for a missing or wrong token"""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    token = http_request.headers.get(ADMIN_TOKEN_HEADER, '')
+    if not hmac.compare_digest(token.encode(), config.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+async def run_in_executor(executor: WorkExecutor, func, *args):
+    """Run blocking work on an executor, mapping overload to 503 and timeouts to 504"""
+    try:
+        # Sampled or slow-capture requests run under the profiler
+        task = profiler.submission(func, args)
+        if task is None:
+            return await executor.run(func, *args)
+        result, capture = await executor.run(task, *args)
+        task.record(capture)
+        return result
+    except ExecutorSaturatedError as e:
+        logger.warning(str(e))
+        raise HTTPException(
+            status_code=503,
+            detail="Service is busy, please retry shortly",
+            headers={'Retry-After': '1'}
+        )
+    except ExecutorTimeoutError as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=504, detail="Request timed out while processing")
 
 # Pydantic models for request/response
 class MindmapRequest(BaseModel):
@@ -44,6 +213,13 @@ class MindmapRequest(BaseModel):
     days_remaining: Optional[int] = None
     exam_date: Optional[str] = None
 
+class IncrementalMindmapRequest(MindmapRequest):
+    # version_id from a previous incremental response; omit for the first version
+    base_version_id: Optional[str] = None
+
+class MindmapJobRequest(BaseModel):
+    syllabi: List[MindmapRequest]
+
 class SuggestionRequest(BaseModel):
     student_id: str
     grades: List[Dict[str, Any]] = []
@@ -54,6 +230,138 @@ class SuggestionRequest(BaseModel):
     days_remaining: Optional[int] = None
     upcoming_exams: List[Dict[str, Any]] = []
     syllabus_focus_areas: List[Dict[str, Any]] = []
+    # Courses in the department's registered calendar; their exams and focus areas are added server-side
+    course_ids: List[str] = []
+
+class CalendarExam(BaseModel):
+    date: str  # ISO date or date-time (UTC unless an offset is given), e.g. 2025-05-14T09:00:00Z
+    total_marks: Optional[int] = None
+
+class CalendarCourse(BaseModel):
+    course_id: str
+    course: str
+    exams: List[CalendarExam] = []
+    topics: List[str] = []
+    content_summary: Optional[str] = None
+
+class CourseCalendarRequest(BaseModel):
+    department: str
+    courses: List[CalendarCourse]
+
+class ProfilingSettingsRequest(BaseModel):
+    # Omitted fields keep their current value
+    sample_rate: Optional[float] = None
+    mode: Optional[str] = None
+    slow_threshold_ms: Optional[float] = None
+
+class BatchSuggestionRequest(BaseModel):
+    # Validated one by one (as SuggestionRequest) so a malformed student becomes that item's error
+    students: List[Any]
+
+class CohortAnalyticsRequest(BaseModel):
+    students: List[SuggestionRequest]
+
+# Mindmap response models (full format)
+class MindmapNode(BaseModel):
+    id: str
+    label: str
+    level: int
+
+class MindmapEdge(BaseModel):
+    source: str
+    target: str
+
+class MindmapGraphMetadata(BaseModel):
+    total_nodes: int
+    total_edges: int
+    topics_count: int
+    keywords_count: int
+
+class MindmapGraph(BaseModel):
+    nodes: List[MindmapNode]
+    edges: List[MindmapEdge]
+    metadata: MindmapGraphMetadata
+
+class ComplexityAnalysis(BaseModel):
+    complexity_level: str
+    avg_sentence_length: float
+    avg_word_length: float
+    total_sentences: int
+    total_words: int
+
+class Subtopic(BaseModel):
+    id: str
+    title: str
+    type: str
+    content: str
+    level: Optional[int] = None
+    parent: Optional[str] = None
+
+class Topic(BaseModel):
+    id: str
+    title: str
+    type: str
+    content: str
+    subtopics: List[Subtopic]
+
+class MindmapAnalysis(BaseModel):
+    complexity: ComplexityAnalysis
+    topics: List[Topic]
+    keywords: List[str]
+
+class NearDuplicateMatch(BaseModel):
+    matched_version_id: str
+    similarity: float
+    reused_units: int
+    reparsed_units: int
+
+class MindmapRequestMetadata(BaseModel):
+    course_name: Optional[str] = None
+    department: Optional[str] = None
+    days_remaining: Optional[int] = None
+    text_length: int
+    processing_status: str
+    cache_hit: bool
+    coalesced: bool = False
+    near_duplicate: Optional[NearDuplicateMatch] = None
+
+class MindmapData(BaseModel):
+    mindmap: MindmapGraph
+    analysis: MindmapAnalysis
+    suggestions: List[str]
+    metadata: MindmapRequestMetadata
+
+class MindmapResponse(BaseModel):
+    success: bool
+    cached: bool
+    data: MindmapData
+    message: str
+
+# Compact format: node columns, nodes referenced by index (see app.responses.compact_mindmap)
+class CompactMindmapGraph(BaseModel):
+    ids: List[str]
+    labels: List[str]
+    levels: List[int]
+    parents: List[int]  # index of each node's parent, -1 for the root
+    metadata: MindmapGraphMetadata
+
+class CompactMindmapAnalysis(BaseModel):
+    complexity: ComplexityAnalysis
+    topics: List[int]  # node indices of the previewed units
+    keywords: List[str]
+
+class CompactMindmapData(BaseModel):
+    format: str
+    mindmap: CompactMindmapGraph
+    analysis: CompactMindmapAnalysis
+    suggestions: List[str]
+    metadata: MindmapRequestMetadata
+
+class CompactMindmapResponse(BaseModel):
+    success: bool
+    cached: bool
+    data: CompactMindmapData
+    message: str
 
 class HealthResponse(BaseModel):
     status: str
@@ -70,14 +378,70 @@ async def health_check():
         version="1.0.0"
     )
 
+# Readiness endpoint
+@app.get("/ready")
+async def readiness_check():
+    """Readiness check: 200 once NLP resources are loaded, 503 until then
+
+    With AI_NLP_PRELOAD=lazy nothing loads until a request needs it, so the
+    service is ready from the start; 'ready' in the body turns true once the
+    first requests have loaded the resources.
+    """
+    status = nlp_resources.status()
+    if not status['ready'] and config.NLP_PRELOAD != 'lazy':
+        return JSONResponse(status_code=503, content={'status': 'warming_up', **status})
+    return {'status': 'ready', **status}
+
+async def build_mindmap(request: MindmapRequest, executor: WorkExecutor, update_corpus: bool = False):
+    """Mindmap for a request, from the cache or computed on executor; returns (data, cache_hit)
+    
+    Only syllabi submitted interactively (update_corpus) are counted into the keyword index.
+    """
+    # Serve repeated syllabi from the cache
+    cache_key = mindmap_cache_key(request.syllabus_text, request.days_remaining)
+    cached = await mindmap_cache.get_async(cache_key)
+    coalesced = False
+    if cached is None:
+        async def compute():
+            result = await run_in_executor(
+                executor, tasks.generate_mindmap_deduplicated,
+                request.syllabus_text, request.days_remaining, update_corpus
+            )
+            await mindmap_cache.set_async(cache_key, result)
+            return result
+        
+        # Identical requests arriving while this one computes share its result
+        cached, coalesced = await mindmap_flights.do(cache_key, compute)
+        cache_hit = False
+    else:
+        cache_hit = True
+    
+    # Add request metadata to response (shallow copy so the cached entry stays untouched)
+    result = dict(cached)
+    near_duplicate = result.pop('near_duplicate', None)
+    result['metadata'] = {
+        'course_name': request.course_name,
+        'department': request.department,
+        'days_remaining': request.days_remaining,
+        'text_length': len(request.syllabus_text),
+        'processing_status': 'success',
+        'cache_hit': cache_hit,
+        'coalesced': coalesced,
+        # How the (possibly cached) result was built from a near-duplicate syllabus
+        'near_duplicate': near_duplicate
+    }
+    return result, cache_hit
+
 # Mindmap generation endpoint
-@app.post("/api/generate-mindmap")
-async def generate_mindmap(request: MindmapRequest):
+@app.post("/api/generate-mindmap", response_model=Union[MindmapResponse, CompactMindmapResponse])
+async def generate_mindmap(request: MindmapRequest, http_request: Request, format: str = 'full'):
     """
     Generate a mindmap from syllabus text
     
     This endpoint accepts syllabus content and returns a structured mindmap
     with nodes, edges, and analysis data that can be visualized on the frontend.
+    Pass ?format=compact for node columns referenced by index, without the
+    duplicated topic preview.
     """
     try:
         logger.info(f"Generating mindmap for course: {request.course_name}")
@@ -87,11 +451,93 @@ async def generate_mindmap(request: MindmapRequest):
                 status_code=400, 
                 detail="Syllabus text must be at least 10 characters long"
             )
+        check_syllabus_size(request.syllabus_text)
+        if format not in RESPONSE_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unknown response format: {format}")
+        
+        timings = start_request_timing() if wants_timing(http_request) else None
+        
+        result, cache_hit = await build_mindmap(request, mindmap_executor, update_corpus=True)
+        if format == 'compact':
+            result = compact_mindmap(result)
+        
+        headers = {}
+        if timings is not None:
+            headers['Server-Timing'] = server_timing_header(timings)
+        
+        logger.info("Mindmap generated successfully")
+        # Returned as a response so FastAPI skips re-validating and re-encoding the (large) result
+        return FastJSONResponse({
+            'success': True,
+            'cached': cache_hit,
+            'data': result,
+            'message': 'Mindmap generated successfully'
+        }, headers=headers)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating mindmap: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating mindmap: {str(e)}")
+
+# Streaming mindmap generation endpoint
+@app.post("/api/generate-mindmap/stream")
+async def generate_mindmap_stream(request: MindmapRequest):
+    """
+    Generate a mindmap as NDJSON chunks
+    
+    Emits a root chunk, one chunk per unit as soon as the unit is parsed,
+    and a final summary chunk with analysis and suggestions. Intended for
+    very large syllabi where the full response would take long to build.
+    """
+    logger.info(f"Streaming mindmap for course: {request.course_name}")
+    
+    if not request.syllabus_text or len(request.syllabus_text.strip()) < 10:
+        raise HTTPException(
+            status_code=400, 
+            detail="Syllabus text must be at least 10 characters long"
+        )
+    check_syllabus_size(request.syllabus_text)
+    
+    metadata = {
+        'course_name': request.course_name,
+        'department': request.department,
+        'days_remaining': request.days_remaining,
+        'text_length': len(request.syllabus_text),
+        'processing_status': 'success'
+    }
+    # Starlette iterates sync generators in its threadpool, so parsing stays off the event loop
+    return StreamingResponse(
+        tasks.generate_mindmap_ndjson(request.syllabus_text, request.days_remaining, metadata, True),
+        media_type='application/x-ndjson'
+    )
+
+# Incremental mindmap endpoint
+@app.post("/api/generate-mindmap/incremental")
+async def generate_mindmap_incremental(request: IncrementalMindmapRequest):
+    """
+    Regenerate a mindmap after a syllabus edit
+    
+    Send the version_id of a previous response as base_version_id together
+    with the edited text. Only units whose text changed are analyzed again,
+    and the response carries a node/edge delta with stable node ids. When
+    the base version is unknown (or omitted) the full mindmap is returned
+    with mode 'full'.
+    """
+    try:
+        logger.info(f"Incremental mindmap for course: {request.course_name} (base {request.base_version_id})")
         
-        # Generate mindmap
-        result = mindmap_generator.generate_mindmap(request.syllabus_text, request.days_remaining)
+        if not request.syllabus_text or len(request.syllabus_text.strip()) < 10:
+            raise HTTPException(
+                status_code=400, 
+                detail="Syllabus text must be at least 10 characters long"
+            )
+        check_syllabus_size(request.syllabus_text)
         
-        # Add request metadata to response
+        result = await run_in_executor(
+            mindmap_executor, tasks.generate_mindmap_incremental,
+            request.syllabus_text, request.base_version_id, request.days_remaining, True
+        )
         result['metadata'] = {
             'course_name': request.course_name,
             'department': request.department,
@@ -99,21 +545,179 @@ async def generate_mindmap(request: MindmapRequest):
             'text_length': len(request.syllabus_text),
             'processing_status': 'success'
         }
-        
-        logger.info("Mindmap generated successfully")
         return {
             'success': True,
             'data': result,
-            'message': 'Mindmap generated successfully'
+            'message': 'Mindmap regenerated successfully'
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error generating mindmap: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error generating mindmap: {str(e)}")
+        logger.error(f"Error regenerating mindmap: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error regenerating mindmap: {str(e)}")
+
+# Bulk mindmap jobs
+mindmap_jobs = JobStore(config.MINDMAP_JOB_PATH, lease=config.MINDMAP_JOB_LEASE)
+
+async def process_mindmap_job_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    result, _ = await build_mindmap(MindmapRequest(**item), mindmap_job_executor)
+    return result
+
+mindmap_job_runner = JobRunner(
+    mindmap_jobs,
+    process_mindmap_job_item,
+    batch_size=config.MINDMAP_JOB_WORKERS,
+    retention=config.MINDMAP_JOB_RETENTION
+)
+
+@app.post("/api/generate-mindmap/jobs", status_code=202)
+async def submit_mindmap_job(request: MindmapJobRequest):
+    """
+    Queue mindmap generation for many syllabi
+    
+    Returns a job id immediately. Poll /api/generate-mindmap/jobs/{job_id}
+    for progress and fetch the mindmaps from .../results. Jobs are stored
+    on disk and resume after a restart.
+    """
+    try:
+        count = len(request.syllabi)
+        logger.info(f"Queueing mindmap job for {count} syllabi")
+        
+        if count == 0:
+            raise HTTPException(status_code=400, detail="A job needs at least one syllabus")
+        if count > config.MINDMAP_JOB_LIMIT:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Job size {count} exceeds the limit of {config.MINDMAP_JOB_LIMIT} syllabi"
+            )
+        for index, syllabus in enumerate(request.syllabi):
+            if not syllabus.syllabus_text or len(syllabus.syllabus_text.strip()) < 10:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Syllabus {index}: syllabus text must be at least 10 characters long"
+                )
+            check_syllabus_size(syllabus.syllabus_text, f"Syllabus {index}")
+        
+        job_id = await asyncio.to_thread(mindmap_jobs.create, [syllabus.model_dump() for syllabus in request.syllabi])
+        mindmap_job_runner.notify()
+        return {
+            'success': True,
+            'data': await asyncio.to_thread(mindmap_jobs.status, job_id),
+            'message': 'Mindmap job queued'
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queueing mindmap job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error queueing mindmap job: {str(e)}")
+
+@app.get("/api/generate-mindmap/jobs/{job_id}")
+async def get_mindmap_job(job_id: str):
+    """Progress of a mindmap job"""
+    status = await asyncio.to_thread(mindmap_jobs.status, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return {'success': True, 'data': status}
+
+@app.get("/api/generate-mindmap/jobs/{job_id}/results")
+async def get_mindmap_job_results(job_id: str, offset: int = 0, limit: int = 100):
+    """
+    Mindmaps of a job in submission order, a page at a time
+    
+    Finished items carry 'data' (same shape as /api/generate-mindmap) or
+    'error'; unfinished ones only their status.
+    """
+    status = await asyncio.to_thread(mindmap_jobs.status, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    limit = max(1, min(limit, 500))
+    items = await asyncio.to_thread(mindmap_jobs.results, job_id, max(0, offset), limit)
+    return {
+        'success': True,
+        'data': items,
+        'job': status,
+        'offset': offset,
+        'limit': limit
+    }
+
+def validation_summary(error: ValidationError) -> str:
+    """One-line description of a pydantic validation error"""
+    return '; '.join(f"{'.'.join(str(part) for part in item['loc']) or 'record'}: {item['msg']}" for item in error.errors())
+
+def build_student_data(request: SuggestionRequest, resolve_courses: bool = True) -> Dict[str, Any]:
+    """Convert a SuggestionRequest into the dict SuggestionEngine expects
+
+    With resolve_courses, course_ids add the exams and focus areas of the
+    department's calendar; CalendarNotRegisteredError is raised when the
+    department has none.
+    """
+    upcoming_exams = request.upcoming_exams
+    syllabus_focus_areas = request.syllabus_focus_areas
+    if request.course_ids and resolve_courses:
+        resolved = course_calendar.resolve(request.department or '', request.course_ids)
+        if resolved is None:
+            raise CalendarNotRegisteredError(f"No course calendar registered for department: {request.department}")
+        # Exams sent in the request come first, then the calendar's (nearest first)
+        upcoming_exams = upcoming_exams + resolved[0]
+        syllabus_focus_areas = syllabus_focus_areas + resolved[1]
+    return {
+        'student_id': request.student_id,
+        'grades': request.grades,
+        'attendance': request.attendance,
+        'exam_scores': request.exam_scores,
+        'current_semester': request.current_semester,
+        'department': request.department,
+        'days_remaining': request.days_remaining,
+        'upcoming_exams': upcoming_exams,
+        'syllabus_focus_areas': syllabus_focus_areas
+    }
+
+def prepare_batch_students(items: List[Any]):
+    """Validate batch records and build their student data; returns (results, positions, students)
+
+    results holds an error entry at the position of each record that failed
+    validation or course resolution and None elsewhere; positions lists the
+    remaining records' positions, in the order of students.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    positions = []
+    students = []
+    for position, item in enumerate(items):
+        try:
+            student = SuggestionRequest.model_validate(item)
+        except ValidationError as e:
+            results[position] = {
+                'success': False,
+                'error': f"Invalid student record: {validation_summary(e)}",
+                'student_id': item.get('student_id') if isinstance(item, dict) else None
+            }
+            continue
+        try:
+            student_data = build_student_data(student)
+        except CalendarNotRegisteredError as e:
+            results[position] = {'success': False, 'error': str(e), 'student_id': student.student_id}
+            continue
+        positions.append(position)
+        students.append(student_data)
+    return results, positions, students
+
+def course_table_version() -> Optional[str]:
+    """Version of the course neighbour table; a refreshed table changes suggestion fingerprints"""
+    recommender = suggestion_engine.course_recommender
+    return recommender.version if recommender is not None else None
+
+# Clients may reuse a stored response but must revalidate it (If-None-Match) on every use
+SUGGESTION_CACHE_CONTROL = 'private, no-cache'
+
+def parse_if_none_match(header: str) -> List[str]:
+    """Opaque entity tags listed in an If-None-Match header, without any W/ prefix (weak comparison)"""
+    return [tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip() for tag in header.split(',') if tag.strip()]
 
 # Academic suggestions endpoint
 @app.post("/api/get-suggestions")
-async def get_suggestions(request: SuggestionRequest):
+async def get_suggestions(request: SuggestionRequest, http_request: Request, response: Response):
     """
     Generate academic suggestions based on student performance data
     
@@ -123,50 +727,345 @@ async def get_suggestions(request: SuggestionRequest):
     try:
         logger.info(f"Generating suggestions for student: {request.student_id}")
         
-        # Prepare student data
-        student_data = {
-            'student_id': request.student_id,
-            'grades': request.grades,
-            'attendance': request.attendance,
-            'exam_scores': request.exam_scores,
-            'current_semester': request.current_semester,
-            'department': request.department,
-            'days_remaining': request.days_remaining,
-            'upcoming_exams': request.upcoming_exams,
-            'syllabus_focus_areas': request.syllabus_focus_areas
-        }
-
+        timings = start_request_timing() if wants_timing(http_request) else None
+        
+        # Prepare student data (resolving course ids may read the SQLite calendar store)
+        try:
+            student_data = await asyncio.to_thread(build_student_data, request)
+        except CalendarNotRegisteredError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        
+        seed = None
+        if config.SUGGESTION_ORDERING == 'seeded':
+            # Seeded output depends only on the payload, the day and the service version,
+            # so it can be validated with an ETag
+            seed = recommendation_seed(request.student_id)
+            fingerprint = payload_fingerprint({'student': student_data, 'seed': seed, 'version': app.version,
+                                               'courses': course_table_version()})
+            # Weak: the body differs in 'cached' (and encoding) while the suggestions are the same
+            opaque_tag = f'"{fingerprint[:32]}"'
+            etag = f'W/{opaque_tag}'
+            client_tags = parse_if_none_match(http_request.headers.get('if-none-match', ''))
+            if opaque_tag in client_tags or '*' in client_tags:
+                return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': SUGGESTION_CACHE_CONTROL})
+            response.headers['ETag'] = etag
+            response.headers['Cache-Control'] = SUGGESTION_CACHE_CONTROL
+        else:
+            fingerprint = payload_fingerprint({'student': student_data, 'courses': course_table_version()})
         
-        # Generate suggestions
-        result = suggestion_engine.generate_suggestions(student_data)
+        # Reuse the student's snapshot while their data is unchanged
+        result = await asyncio.to_thread(suggestion_snapshots.get, request.student_id, fingerprint)
+        cached = result is not None
+        if not cached:
+            async def compute():
+                computed = await run_in_executor(suggestion_executor, tasks.generate_suggestions, student_data, seed)
+                await asyncio.to_thread(suggestion_snapshots.put, request.student_id, fingerprint, computed)
+                return computed
+            
+            result, _ = await suggestion_flights.do(fingerprint, compute)
+        
+        if timings is not None:
+            response.headers['Server-Timing'] = server_timing_header(timings)
         
         logger.info("Suggestions generated successfully")
         return {
             'success': True,
+            'cached': cached,
             'data': result,
             'message': 'Academic suggestions generated successfully'
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating suggestions: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating suggestions: {str(e)}")
 
+# Course calendar registration endpoint
+@app.post("/api/course-calendar")
+async def register_course_calendar(request: CourseCalendarRequest):
+    """
+    Register a department's exam calendar and syllabus focus
+    
+    Replaces the department's previous calendar. Suggestion requests can
+    then send course_ids instead of upcoming_exams and syllabus_focus_areas.
+    """
+    try:
+        logger.info(f"Registering course calendar for {request.department} ({len(request.courses)} courses)")
+        
+        if not request.department:
+            raise HTTPException(status_code=400, detail="Department is required")
+        try:
+            version = await asyncio.to_thread(
+                course_calendar.register, request.department, [course.model_dump() for course in request.courses]
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid exam date: {str(e)}")
+        
+        return {
+            'success': True,
+            'data': {'department': request.department, 'courses': len(request.courses), 'version': version},
+            'message': 'Course calendar registered'
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error registering course calendar: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error registering course calendar: {str(e)}")
+
+@app.get("/api/course-calendar/{department}")
+async def get_course_calendar(department: str):
+    """The calendar registered for a department"""
+    calendar = await asyncio.to_thread(course_calendar.get, department)
+    if calendar is None:
+        raise HTTPException(status_code=404, detail=f"No course calendar registered for department: {department}")
+    return {
+        'success': True,
+        'data': {'department': department, **calendar},
+        'message': ''
+    }
+
+# Batch academic suggestions endpoint
+@app.post("/api/get-suggestions/batch")
+async def get_suggestions_batch(request: BatchSuggestionRequest):
+    """
+    Generate academic suggestions for many students in one call
+    
+    Performance metrics for the whole batch are computed together. Results
+    are returned in request order; a student whose data cannot be processed
+    gets an error entry instead of failing the batch.
+    """
+    try:
+        count = len(request.students)
+        logger.info(f"Generating batch suggestions for {count} students")
+        
+        if count > config.SUGGESTION_BATCH_LIMIT:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch size {count} exceeds the limit of {config.SUGGESTION_BATCH_LIMIT} students"
+            )
+        
+        # Resolving course ids may read the SQLite calendar store, so records are prepared off the loop
+        results, positions, students = await asyncio.to_thread(prepare_batch_students, request.students)
+        
+        if students:
+            computed = await run_in_executor(suggestion_executor, tasks.generate_suggestions_batch, students)
+            for position, student, result in zip(positions, students, computed):
+                result['student_id'] = student['student_id']
+                results[position] = result
+        failed = sum(1 for result in results if not result['success'])
+        
+        logger.info(f"Batch suggestions generated ({failed} failed)")
+        return {
+            'success': True,
+            'data': results,
+            'total': count,
+            'failed': failed,
+            'message': 'Batch academic suggestions generated successfully'
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating batch suggestions: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error generating batch suggestions: {str(e)}")
+
+# Cohort analytics endpoint
+@app.post("/api/cohort-analytics")
+async def cohort_analytics(request: CohortAnalyticsRequest):
+    """
+    Analyze a whole cohort's performance in one columnar pass
+    
+    Returns each student's metrics with their percentile rank and z-score
+    within the cohort, plus cohort-wide distribution statistics.
+    """
+    try:
+        count = len(request.students)
+        logger.info(f"Analyzing cohort of {count} students")
+        
+        if count > config.SUGGESTION_BATCH_LIMIT:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Cohort size {count} exceeds the limit of {config.SUGGESTION_BATCH_LIMIT} students"
+            )
+        
+        # Cohort analytics ignores exam context, so course ids are not resolved (and cannot fail)
+        students = [build_student_data(student, resolve_courses=False) for student in request.students]
+        result = await run_in_executor(suggestion_executor, tasks.analyze_cohort, students)
+        
+        logger.info("Cohort analytics generated successfully")
+        return {
+            'success': True,
+            'data': result,
+            'message': 'Cohort analytics generated successfully'
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error analyzing cohort: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error analyzing cohort: {str(e)}")
+
+# Metrics endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Stage latencies, input sizes, errors, cache and executor counters in Prometheus text format"""
+    executors = {'mindmap': mindmap_executor, 'suggestions': suggestion_executor, 'mindmap_jobs': mindmap_job_executor}
+    # Store statistics query SQLite files, so they are gathered off the loop
+    job_stats, cache_stats, snapshot_stats = await asyncio.to_thread(
+        lambda: (mindmap_jobs.stats(), mindmap_cache.stats(), suggestion_snapshots.stats())
+    )
+    job_items = job_stats['items']
+    flights = {'mindmap': mindmap_flights, 'suggestions': suggestion_flights}
+    profile_stats = profiler.stats()
+    return PlainTextResponse(
+        metrics.render_prometheus()
+        + render_metric('ai_cache_hits_total', 'counter', 'Result cache hits',
+                        {'cache="mindmap"': cache_stats['hits'], 'cache="suggestions"': snapshot_stats['hits']})
+        + render_metric('ai_cache_misses_total', 'counter', 'Result cache misses (stale snapshots included)',
+                        {'cache="mindmap"': cache_stats['misses'],
+                         'cache="suggestions"': snapshot_stats['misses'] + snapshot_stats['stale']})
+        + render_metric('ai_coalesced_requests_total', 'counter',
+                        'Requests served by an identical in-flight computation (computations saved)',
+                        {f'flight="{name}"': flight.coalesced for name, flight in flights.items()})
+        + render_metric('ai_in_flight_computations', 'gauge', 'Distinct computations currently in flight',
+                        {f'flight="{name}"': flight.stats()['in_flight'] for name, flight in flights.items()})
+        + render_metric('ai_profiles_captured_total', 'counter', 'Profiles captured by reason (sampled or slow)',
+                        {'reason="sampled"': profile_stats['captured_sampled'], 'reason="slow"': profile_stats['captured_slow']})
+        + render_metric('ai_executor_pending', 'gauge', 'Tasks running or waiting on an executor',
+                        {f'executor="{name}"': ex.stats()['pending'] for name, ex in executors.items()})
+        + render_metric('ai_executor_rejected_total', 'counter', 'Tasks rejected with 503 because the executor was full',
+                        {f'executor="{name}"': ex.stats()['rejected'] for name, ex in executors.items()})
+        + render_metric('ai_executor_timeouts_total', 'counter', 'Tasks that exceeded the request timeout',
+                        {f'executor="{name}"': ex.stats()['timed_out'] for name, ex in executors.items()})
+        + render_metric('ai_mindmap_job_items', 'gauge', 'Stored bulk mindmap job items by state',
+                        {f'state="{state}"': count for state, count in job_items.items()}),
+        media_type='text/plain; version=0.0.4'
+    )
+
+# Cache statistics endpoint
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters and sizes of the result caches"""
+    mindmap_stats, snapshot_stats = await asyncio.to_thread(
+        lambda: (mindmap_cache.stats(), suggestion_snapshots.stats())
+    )
+    return {
+        'mindmap': mindmap_stats,
+        'suggestions': snapshot_stats
+    }
+
+# Profiling endpoints (admin only)
+@app.get("/api/admin/profiling")
+async def get_profiling(http_request: Request):
+    """Profiler settings, counters and the captured profiles (newest first)"""
+    check_admin(http_request)
+    return {
+        'settings': profiler.settings(),
+        'stats': profiler.stats(),
+        'profiles': profiler.profiles()
+    }
+
+@app.put("/api/admin/profiling")
+async def configure_profiling(request: ProfilingSettingsRequest, http_request: Request):
+    """
+    Change the sampled fraction, its mode or the slow-request threshold
+    
+    Settings apply to the worker process that serves the call; with several
+    workers, repeat it until each has been reached or use the AI_PROFILE_*
+    environment variables.
+    """
+    check_admin(http_request)
+    try:
+        profiler.configure(request.sample_rate, request.mode, request.slow_threshold_ms)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {'settings': profiler.settings()}
+
+@app.get("/api/admin/profiling/profiles/{profile_id}")
+async def download_profile(profile_id: str, http_request: Request):
+    """
+    One captured profile in a flame-graph tool format
+    
+    Stack samples come as folded stacks (text/plain: flamegraph.pl,
+    speedscope, inferno); cProfile runs as a pstats file (snakeviz,
+    flameprof, gprof2dot).
+    """
+    check_admin(http_request)
+    entry = profiler.get(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown profile: {profile_id}")
+    if entry['kind'] == 'stacks':
+        return Response(
+            content=folded_stacks(entry['data']),
+            media_type='text/plain',
+            headers={'Content-Disposition': f'attachment; filename="{profile_id}.folded"'}
+        )
+    return Response(
+        content=pstats_bytes(entry['data']),
+        media_type='application/octet-stream',
+        headers={'Content-Disposition': f'attachment; filename="{profile_id}.prof"'}
+    )
+
+@app.delete("/api/admin/profiling/profiles")
+async def clear_profiles(http_request: Request):
+    """Drop all captured profiles"""
+    check_admin(http_request)
+    return {'cleared': profiler.clear()}
+
 # Additional utility endpoints
 @app.get("/api/status")
 async def get_service_status():
     """Get detailed service status"""
+    # Job and cache statistics query SQLite files, so the report is built off the loop
+    return await asyncio.to_thread(service_status)
+
+def service_status() -> Dict[str, Any]:
+    """Executor, job, cache and index statistics for /api/status (blocking: reads SQLite stores)"""
     return {
         'service': 'Academic AI Service',
         'status': 'running',
+        'executors': {
+            'mindmap': mindmap_executor.stats(),
+            'suggestions': suggestion_executor.stats(),
+            'mindmap_jobs': mindmap_job_executor.stats()
+        },
+        'mindmap_jobs': mindmap_job_runner.stats(),
+        'course_calendar': course_calendar.stats(),
+        'coalescing': {
+            'mindmap': mindmap_flights.stats(),
+            'suggestions': suggestion_flights.stats()
+        },
+        'cache': {
+            'mindmap': mindmap_cache.stats(),
+            'suggestions': suggestion_snapshots.stats(),
+            'mindmap_versions': tasks.get_incremental_generator().store.stats()
+        },
+        'keyword_index': tasks.get_keyword_index().stats() if tasks.get_keyword_index() else None,
+        'near_duplicates': tasks.get_near_duplicate_index().stats(),
+        'profiling': profiler.stats(),
+        'course_neighbours': suggestion_engine.course_recommender.stats() if suggestion_engine.course_recommender else None,
         'endpoints': {
             'mindmap': '/api/generate-mindmap',
+            'mindmap_stream': '/api/generate-mindmap/stream',
+            'mindmap_incremental': '/api/generate-mindmap/incremental',
+            'mindmap_jobs': '/api/generate-mindmap/jobs',
             'suggestions': '/api/get-suggestions',
-            'health': '/health'
+            'suggestions_batch': '/api/get-suggestions/batch',
+            'course_calendar': '/api/course-calendar',
+            'cohort_analytics': '/api/cohort-analytics',
+            'cache_stats': '/api/cache/stats',
+            'health': '/health',
+            'ready': '/ready',
+            'metrics': '/metrics',
+            'admin_profiling': '/api/admin/profiling'
         },
         'features': [
             'Syllabus mindmap generation',
             'Academic performance analysis',
             'Personalized study recommendations',
+            'Cohort percentiles and z-scores',
             'Course suggestions'
         ]
     }
@@ -174,16 +1073,29 @@ async def get_service_status():
 # Error handlers
 @app.exception_handler(404)
 async def not_found_handler(request, exc):
-    return {
+    detail = getattr(exc, 'detail', None)
+    if detail and detail != 'Not Found':
+        # Raised by an endpoint (e.g. an unknown job id) rather than by routing
+        return JSONResponse(status_code=404, content={'success': False, 'message': detail, 'detail': detail})
+    return JSONResponse(status_code=404, content={
         'success': False,
         'message': 'Endpoint not found',
         'available_endpoints': [
             '/health',
+            '/ready',
+            '/metrics',
             '/api/generate-mindmap',
+            '/api/generate-mindmap/stream',
+            '/api/generate-mindmap/incremental',
+            '/api/generate-mindmap/jobs',
             '/api/get-suggestions',
+            '/api/get-suggestions/batch',
+            '/api/course-calendar',
+            '/api/cohort-analytics',
+            '/api/cache/stats',
             '/api/status'
         ]
-    }
+    })
 
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
@@ -194,7 +1106,7 @@ async def internal_error_handler(request, exc):
         'detail': 'Please check the logs for more information'
     }
 
-# Main execution
+# Main execution (development server with auto-reload; production uses serve.py)
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Production launcher: pre-forked uvicorn workers sharing warm state
+
+Loads NLTK data, the keyword index and the AI singletons once in the
+parent, then forks the workers (see app/prefork.py). Result caches default
+to the SQLite backend so every worker shares one mindmap cache and version
+store. Settings come from AI_* environment variables (see app/config.py);
+the flags below override them.
+
+Usage: python serve.py [--workers N] [--host HOST] [--port PORT]
+       kill -HUP <parent pid>   # gracefully recycle every worker
+
+Development keeps using `python main.py` (single process, auto-reload).
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Must be set before app.config is imported
+os.environ.setdefault('AI_NLP_PRELOAD', 'import')
+os.environ.setdefault('AI_MINDMAP_CACHE_BACKEND', 'sqlite')
+
+from app import config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=config.WORKERS)
+    parser.add_argument('--host', default=os.getenv('AI_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('AI_PORT', '8000')))
+    parser.add_argument('--max-requests', type=int, default=config.WORKER_MAX_REQUESTS)
+    parser.add_argument('--max-requests-jitter', type=int, default=config.WORKER_MAX_REQUESTS_JITTER)
+    parser.add_argument('--graceful-timeout', type=float, default=config.WORKER_GRACEFUL_TIMEOUT)
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args()
+
+    # Importing main builds the app and loads every shared resource in this process
+    import main as service
+
+    if args.workers <= 1 or not hasattr(os, 'fork'):
+        if args.workers > 1:
+            logging.getLogger(__name__).warning("os.fork is unavailable; running a single worker")
+        import uvicorn
+        uvicorn.run(service.app, host=args.host, port=args.port, log_level=args.log_level,
+                    timeout_graceful_shutdown=args.graceful_timeout)
+        return
+
+    from app.prefork import PreforkServer
+    PreforkServer(
+        service.app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+        log_level=args.log_level
+    ).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
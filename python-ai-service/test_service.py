@@ -5,10 +5,81 @@ Simple test script to verify the AI service functionality
 
 import sys
 import os
+import asyncio
+import pickle
+import pstats
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# Keep runs hermetic: no keyword index, and the job store in a directory removed at exit
+TEST_STATE_DIR = tempfile.TemporaryDirectory()
+os.environ['AI_KEYWORD_INDEX_PATH'] = ''
+os.environ['AI_MINDMAP_JOB_PATH'] = os.path.join(TEST_STATE_DIR.name, 'mindmap_jobs.sqlite3')
+
 from app.mindmap_generator import MindmapGenerator
-from app.suggestion_engine import SuggestionEngine
+from app.suggestion_engine import SuggestionEngine, recommendation_seed
+from app.text_processor import TextProcessor
+from app.cache import CacheStore, LRUCache, ResultCache, SQLiteCacheStore, mindmap_cache_key
+from app.keyword_index import CorpusIndex
+from app.snapshots import SuggestionSnapshotStore, payload_fingerprint
+from app.mindmap_versions import IncrementalMindmapGenerator, MindmapVersionStore
+from app.jobs import JobRunner, JobStore
+from app.responses import compact_mindmap, expand_mindmap, negotiate_encoding
+from app.singleflight import SingleFlight
+from app.metrics import MetricsRegistry
+from app.limits import BodySizeLimitMiddleware
+from app.executor import ExecutorSaturatedError, ExecutorTimeoutError, WorkExecutor
+from app.course_calendar import CourseCalendar
+from app.near_duplicates import NearDuplicateIndex
+from app import config, nlp_resources, tasks
+from app.profiling import Profiler, folded_stacks, pstats_bytes
+from app.course_recommender import CourseRecommender, GradeMatrix, build_neighbour_table, refresh_neighbour_table
+
+def call_service(method, path, payload=None, headers=None):
+    """Call the FastAPI app in-process through ASGI; returns (status, headers, body)"""
+    import json
+    import main
+    
+    async def request():
+        body = json.dumps(payload).encode() if payload is not None else b''
+        route, _, query = path.partition('?')
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method, 'scheme': 'http', 'path': route, 'raw_path': route.encode(),
+            'query_string': query.encode(), 'root_path': '',
+            'headers': [(b'host', b'test'), (b'content-type', b'application/json'),
+                        (b'content-length', str(len(body)).encode())]
+                       + [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+            'client': ('127.0.0.1', 0), 'server': ('test', 80)
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        response = {'status': 0, 'headers': {}, 'chunks': []}
+        finished = asyncio.Event()
+        
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+        
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                response['headers'] = {name.decode().lower(): value.decode() for name, value in message.get('headers', [])}
+            elif message['type'] == 'http.response.body':
+                response['chunks'].append(message.get('body', b''))
+                if not message.get('more_body', False):
+                    finished.set()
+        
+        await main.app(scope, receive, send)
+        return response['status'], response['headers'], b''.join(response['chunks'])
+    
+    return asyncio.run(request())
 
 def test_mindmap_generation():
     """Test mindmap generation"""
@@ -49,15 +120,27 @@ def test_mindmap_generation():
     
     try:
         result = generator.generate_mindmap(sample_syllabus)
+        # Bullets nest below the numbered item they follow
+        levels = {node['label']: node['level'] for node in result['mindmap']['nodes']}
+        assert levels['1. Programming Fundamentals'] == 2
+        assert levels['- Variables and data types'] == 3
+        assert {'source': 'unit_0_sub_3', 'target': 'unit_0_sub_4'} in result['mindmap']['edges']
+        # The compact format carries the same graph, with topics as node indices
+        compact = compact_mindmap(result)
+        assert expand_mindmap(compact) == {'nodes': result['mindmap']['nodes'], 'edges': result['mindmap']['edges']}
+        assert [compact['mindmap']['ids'][i] for i in compact['analysis']['topics']] == [t['id'] for t in result['analysis']['topics']]
+        # Syllabi over chunk_size are processed unit by unit with the same result
+        chunked = MindmapGenerator(chunk_size=64).generate_mindmap(sample_syllabus)
+        assert chunked['mindmap'] == result['mindmap']
+        assert chunked['analysis']['keywords'] == result['analysis']['keywords']
         print("SUCCESS: Mindmap generation successful!")
         print(f"   - Generated {len(result['mindmap']['nodes'])} nodes")
         print(f"   - Generated {len(result['mindmap']['edges'])} edges")
         print(f"   - Identified {len(result['analysis']['topics'])} topics")
         print(f"   - Extracted {len(result['analysis']['keywords'])} keywords")
-        return True
     except Exception as e:
         print(f"FAILED: Mindmap generation failed: {e}")
-        return False
+        raise
 
 def test_suggestion_engine():
     """Test suggestion engine"""
@@ -95,23 +178,1053 @@ def test_suggestion_engine():
         print(f"   - GPA: {result['performance_analysis']['gpa']}")
         print(f"   - Generated {len(result['study_recommendations'])} study recommendations")
         print(f"   - Generated {len(result['course_recommendations'])} course recommendations")
-        return True
+        
+        # Seeded ordering: same inputs and seed give the same tips, other days rotate them
+        seed = recommendation_seed('STU001', '2024-03-01')
+        first = engine.generate_suggestions(sample_student_data, seed=seed)['study_recommendations']
+        assert first == engine.generate_suggestions(sample_student_data, seed=seed)['study_recommendations']
+        other_days = [engine.generate_suggestions(sample_student_data, seed=recommendation_seed('STU001', f'2024-03-{day:02d}'))
+                      ['study_recommendations'] for day in range(2, 10)]
+        assert any(recs != first for recs in other_days)
+        
+        # Exams are reported nearest first, single and batch, without reordering the caller's list
+        exams = [{'course': 'Physics', 'days_remaining': 9}, {'course': 'Chemistry', 'days_remaining': 2}]
+        student = dict(sample_student_data, upcoming_exams=exams)
+        single = engine.generate_suggestions(student)['performance_analysis']['upcoming_exams']
+        batch = engine.generate_suggestions_batch([student])[0]['data']['performance_analysis']['upcoming_exams']
+        assert [exam['days_remaining'] for exam in single] == [2, 9]
+        assert batch == single
+        assert [exam['days_remaining'] for exam in exams] == [9, 2]
+    except AssertionError as e:
+        print(f"FAILED: Seeded recommendations are not deterministic: {e}")
+        raise
     except Exception as e:
         print(f"FAILED: Suggestion generation failed: {e}")
+        raise
+
+def test_result_cache():
+    """Test mindmap cache keys and LRU eviction"""
+    print("\nTesting Result Cache...")
+    
+    try:
+        # Whitespace-only differences share a key, days_remaining does not
+        assert mindmap_cache_key("Unit 1: Intro\n  - Basics ") == mindmap_cache_key("Unit 1:  Intro\n\n- Basics")
+        assert mindmap_cache_key("Unit 1: Intro", 5) != mindmap_cache_key("Unit 1: Intro", 6)
+        
+        cache = ResultCache(LRUCache(max_entries=2, ttl=60))
+        cache.set('a', {'value': 1})
+        cache.set('b', {'value': 2})
+        cache.get('a')
+        cache.set('c', {'value': 3})  # evicts 'b', the least recently used
+        assert cache.get('b') is None
+        assert cache.get('a') == {'value': 1}
+        assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+        
+        # A SQLite store opened before a fork is shared with the forked worker
+        if hasattr(os, 'fork'):
+            with tempfile.TemporaryDirectory() as tmp:
+                store = SQLiteCacheStore(os.path.join(tmp, 'cache.sqlite3'))
+                store.set('parent', 1)
+                pid = os.fork()
+                if pid == 0:
+                    store.set('child', store.get('parent') + 1)
+                    os._exit(0)
+                os.waitpid(pid, 0)
+                assert store.get('child') == 2
+        
+        # Purging drops expired rows, then the rows expiring soonest beyond the cap
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.sqlite3')
+            SQLiteCacheStore(path, ttl=-1).set('expired', 0)
+            store = SQLiteCacheStore(path, ttl=60)
+            for key in ('first', 'second', 'third'):
+                store.set(key, key)
+            assert store.purge_expired(max_rows=2) == 2
+            assert store.get('first') is None and store.get('third') == 'third'
+            assert store.stats()['entries'] == 2
+            
+            # The async accessors reach the SQLite tier from a worker thread
+            tiered = ResultCache(LRUCache(), store)
+            asyncio.run(tiered.set_async('fourth', 4))
+            assert ResultCache(LRUCache(), store).get('fourth') == 4
+            assert asyncio.run(ResultCache(LRUCache(), store).get_async('third')) == 'third'
+        
+        # A store missing part of the interface fails when it is created
+        class ReadOnlyStore(CacheStore):
+            def get(self, key):
+                return None
+        try:
+            ReadOnlyStore()
+            raise AssertionError("an incomplete CacheStore was instantiated")
+        except TypeError:
+            pass
+        print("SUCCESS: Result cache behaves as expected!")
+    except AssertionError as e:
+        print(f"FAILED: Result cache check failed: {e}")
+        raise
+
+def test_suggestion_snapshots():
+    """Test snapshot reuse and fingerprint changes"""
+    print("\nTesting Suggestion Snapshots...")
+    
+    try:
+        payload = {'student_id': 'STU1', 'grades': [{'course': 'Math', 'grade': 'A'}], 'attendance': 90}
+        fingerprint = payload_fingerprint(payload)
+        assert fingerprint == payload_fingerprint(dict(reversed(list(payload.items()))))
+        
+        snapshots = SuggestionSnapshotStore(LRUCache())
+        assert snapshots.get('STU1', fingerprint) is None
+        snapshots.put('STU1', fingerprint, {'overall_suggestion': 'Keep going'})
+        assert snapshots.get('STU1', fingerprint) == {'overall_suggestion': 'Keep going'}
+        
+        # New attendance means a new fingerprint, so the snapshot is not used
+        assert snapshots.get('STU1', payload_fingerprint({**payload, 'attendance': 70})) is None
+        assert snapshots.stats()['hits'] == 1 and snapshots.stats()['stale'] == 1
+        
+        # The ETag is weak: a computed and a snapshot response differ only in 'cached'
+        import json
+        student = {'student_id': 'ETAG01', 'grades': [{'course': 'Math', 'grade': 'B'}], 'attendance': 80}
+        status, headers, body = call_service('POST', '/api/get-suggestions', student)
+        etag = headers['etag']
+        assert status == 200 and etag.startswith('W/"')
+        status, headers, body = call_service('POST', '/api/get-suggestions', student)
+        assert headers['etag'] == etag and json.loads(body)['cached'] is True
+        for tag in (etag, etag[2:]):
+            status, headers, body = call_service('POST', '/api/get-suggestions', student, {'If-None-Match': tag})
+            assert status == 304 and headers['etag'] == etag and body == b''
+        print("SUCCESS: Suggestion snapshots behave as expected!")
+    except AssertionError as e:
+        print(f"FAILED: Suggestion snapshot check failed: {e}")
+        raise
+
+def test_cohort_analytics():
+    """Test that columnar cohort analytics matches the per-student analysis"""
+    print("\nTesting Cohort Analytics...")
+    
+    engine = SuggestionEngine()
+    cohort = [
+        {'student_id': 'STU001', 'grades': [{'grade': 'A'}, {'grade': 'B+'}], 'attendance': 92, 'exam_scores': [{'score': 88}]},
+        {'student_id': 'STU002', 'grades': [{'grade': 'C'}], 'attendance': {'Math': 60, 'Physics': 70}, 'exam_scores': []},
+        {'student_id': 'STU003', 'grades': [], 'attendance': {}, 'exam_scores': [{'score': 55}, {'score': 61}]},
+        {'student_id': 'STU004', 'grades': ['not-a-record']},
+        {'student_id': 'STU005', 'attendance': {'Math': '90'}}
+    ]
+    
+    try:
+        analyses, errors = engine.cohort_analytics.analyze(cohort)
+        for student, analysis in zip(cohort[:3], analyses):
+            expected = engine._analyze_performance(student)
+            for key in ('gpa', 'avg_attendance', 'avg_exam_score', 'performance_level', 'strengths', 'weaknesses'):
+                assert analysis[key] == expected[key], f"{student['student_id']} {key}: {analysis[key]} != {expected[key]}"
+        assert analyses[3] is None and 3 in errors
+        # Numeric strings are rejected here as they are by the per-student analysis
+        assert analyses[4] is None and 'attendance must be a number' in errors[4]
+        try:
+            engine._analyze_performance(cohort[4])
+            assert False, "per-student analysis accepted a numeric string"
+        except TypeError:
+            pass
+        
+        report = engine.cohort_analytics.analyze_cohort(cohort)
+        gpa_percentiles = [entry['percentiles']['gpa'] for entry in report['students']]
+        assert max(gpa_percentiles) == report['students'][0]['percentiles']['gpa']  # STU001 has the top GPA
+        assert report['summary']['students'] == 3
+        print("SUCCESS: Cohort analytics matches per-student analysis!")
+    except AssertionError as e:
+        print(f"FAILED: Cohort analytics check failed: {e}")
+        raise
+
+def test_batch_suggestions_http():
+    """Test that one malformed student in a batch becomes that item's error, not a 422 for the batch"""
+    print("\nTesting Batch Suggestions over HTTP...")
+    
+    import json
+    students = [
+        {'student_id': 'STU001', 'grades': [{'course': 'Maths', 'grade': 'A'}], 'attendance': 90},
+        {'student_id': 'STU002', 'grades': ['bad']},
+        'not-a-student',
+        {'student_id': 'STU003', 'grades': [{'course': 'Physics', 'grade': 'C'}], 'attendance': 70}
+    ]
+    
+    try:
+        status, _, body = call_service('POST', '/api/get-suggestions/batch', {'students': students})
+        assert status == 200, status
+        response = json.loads(body)
+        results = response['data']
+        assert [result['success'] for result in results] == [True, False, False, True]
+        assert [result['student_id'] for result in results] == ['STU001', 'STU002', None, 'STU003']
+        assert results[1]['error'].startswith('Invalid student record: grades.0')
+        assert response['failed'] == 2 and response['total'] == 4
+        print("SUCCESS: Malformed students fail individually!")
+    except AssertionError as e:
+        print(f"FAILED: Batch suggestions HTTP check failed: {e}")
+        raise
+
+def test_keyword_index():
+    """Test TF-IDF ranking and on-disk persistence of the corpus index"""
+    print("\nTesting Keyword Index...")
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'keyword_index.bin')
+            index = CorpusIndex(path)
+            assert index.add_document('doc-1', ['syllabus', 'graphs'])
+            assert index.add_document('doc-2', ['syllabus', 'trees'])
+            assert not index.add_document('doc-1', ['syllabus'])  # counted once
+            index.save()
+            
+            reloaded = CorpusIndex(path)
+            assert reloaded.documents == 2
+            assert list(reloaded.document_frequencies(['syllabus', 'graphs', 'unknown'])) == [2, 1, 0]
+            
+            # Equal counts, but 'syllabus' is in every document so the rarer term ranks first
+            counts = Counter({'syllabus': 2, 'graphs': 2})
+            assert reloaded.top_keywords(counts, 1) == ['graphs']
+            
+            # Autosave runs on a background thread; counts stay visible while it writes
+            autosaved = CorpusIndex(path, autosave_every=1)
+            assert autosaved.add_document('doc-3', ['graphs'])
+            assert list(autosaved.document_frequencies(['graphs'])) == [2]
+            deadline = time.time() + 5
+            while CorpusIndex(path).documents < 3 and time.time() < deadline:
+                time.sleep(0.01)
+            assert CorpusIndex(path).documents == 3
+            
+            # Keyword extraction only counts a text into the corpus when asked to
+            processor = TextProcessor(keyword_index=CorpusIndex())
+            processor.extract_keywords("Graph traversal and graph search", 5)
+            assert processor.keyword_index.documents == 0
+            processor.extract_keywords("Graph traversal and graph search", 5, update_corpus=True)
+            assert processor.keyword_index.documents == 1
+        print("SUCCESS: Keyword index behaves as expected!")
+    except AssertionError as e:
+        print(f"FAILED: Keyword index check failed: {e}")
+        raise
+
+def test_incremental_mindmap():
+    """Test that an edit reparses only the changed unit and keeps node ids stable"""
+    print("\nTesting Incremental Mindmap...")
+    
+    original = "Unit 1: Basics\n- Variables and types\nUnit 2: Graphs\n- Traversal orders\n"
+    # Unit 0 inserted up front, Unit 2 edited, Unit 1 untouched
+    edited = "Unit 0: Setup\n- Installing tools\n" + original.replace("Traversal orders", "Shortest paths")
+    
+    try:
+        generator = MindmapGenerator()
+        incremental = IncrementalMindmapGenerator(generator, MindmapVersionStore(ResultCache(LRUCache())))
+        first = incremental.generate(original)
+        assert first['mode'] == 'full'
+        assert first['mindmap']['nodes'] == generator.generate_mindmap(original)['mindmap']['nodes']
+        
+        second = incremental.generate(edited, first['version_id'])
+        delta = second['delta']
+        assert second['mode'] == 'delta'
+        assert second['units'] == {'total': 3, 'reused': 1, 'reparsed': 2, 'removed': 0}
+        # Existing units keep their ids; the inserted unit gets a fresh one
+        assert [node['id'] for node in delta['added_nodes']] == ['unit_3', 'unit_3_sub_1', 'unit_2_sub_2']
+        assert delta['removed_node_ids'] == ['unit_2_sub_1']
+        assert second['analysis']['complexity']['total_words'] > first['analysis']['complexity']['total_words']
+        
+        # Generating the edited text from scratch must not replace the version the client holds
+        fresh = incremental.generate(edited)
+        assert fresh['version_id'] != second['version_id']
+        third = incremental.generate(edited + "- Spanning trees\n", second['version_id'])
+        assert third['mode'] == 'delta' and third['delta']['removed_node_ids'] == []
+        assert [node['label'] for node in third['delta']['added_nodes']] == ['- Spanning trees']
+        # The same edit from the same base rebuilds the same version
+        assert incremental.generate(edited, first['version_id'])['version_id'] == second['version_id']
+        print("SUCCESS: Incremental mindmap behaves as expected!")
+    except AssertionError as e:
+        print(f"FAILED: Incremental mindmap check failed: {e}")
+        raise
+
+def test_mindmap_jobs():
+    """Test that bulk mindmap jobs run to completion and survive a restart"""
+    print("\nTesting Mindmap Jobs...")
+    
+    async def process(request):
+        if 'fail' in request['syllabus_text']:
+            raise ValueError("bad syllabus")
+        return {'length': len(request['syllabus_text'])}
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'jobs.sqlite3')
+            store = JobStore(path)
+            job_id = store.create([{'syllabus_text': text} for text in ('Unit 1: A', 'fail', 'Unit 2: BB')])
+            assert store.status(job_id)['status'] == 'queued'
+            
+            # A worker claims two items and dies before finishing them
+            claimed = store.claim(2)
+            assert [item['position'] for item in claimed] == [0, 1]
+            worker = subprocess.Popen([sys.executable, '-c', 'pass'])
+            worker.wait()
+            store._conn.execute('UPDATE job_items SET claimed_by = ?', (worker.pid,))
+            
+            # After a restart the orphaned items are queued again and the job completes
+            restarted = JobStore(path)
+            assert restarted.status(job_id)['progress']['running'] == 2
+            assert restarted.release_orphaned() == 2
+            runner = JobRunner(restarted, process, batch_size=2)
+            while asyncio.run(runner.run_once()):
+                pass
+            status = restarted.status(job_id)
+            assert status['status'] == 'completed'
+            assert status['progress'] == {'total': 3, 'completed': 2, 'failed': 1, 'running': 0, 'pending': 0, 'percent': 100.0}
+            results = restarted.results(job_id)
+            assert results[0]['data'] == {'length': 9} and results[1]['error'] == 'bad syllabus'
+            assert restarted.purge_finished(0) == 1 and restarted.status(job_id) is None
+        print("SUCCESS: Mindmap jobs behave as expected!")
+    except AssertionError as e:
+        print(f"FAILED: Mindmap job check failed: {e}")
+        raise
+
+# Syllabus-like texts without abbreviations, whose handling depends on punkt's trained model
+SEGMENTATION_CORPUS = [
+    """Unit 1: Foundations of Computing
+    - Number systems, binary arithmetic and 2's complement
+    - Boolean algebra: gates, truth tables; Karnaugh maps
+    Unit 2. Programming in Python 3.11
+    Students write programs! Which paradigms matter? Procedural, object-oriented and functional ones.
+    Lab sessions run 2:30-4:30 on weekdays -- attendance is 1,000 percent mandatory...
+    Assessment: 40 percent coursework, 60 percent final exam.""",
+    """Module 3: Data Structures and Algorithms
+    1. Arrays and linked lists
+    1.1 Dynamic arrays -- amortized analysis
+    2. Trees: binary search trees, AVL trees, B-trees.
+    Graph traversal covers BFS and DFS. Shortest paths use Dijkstra's algorithm; negative edges need Bellman-Ford!
+    Why does complexity matter? Because well-chosen structures make programs fast. __init__ methods appear later.""",
+    """Course Overview
+    This introductory course presents the principles of thermodynamics. Energy, entropy and equilibrium are
+    explained with real-world examples... then applied to engines. Problem sets are due every Friday.
+    Chapter 4: Heat Engines
+    - Carnot cycle
+    - Refrigerators and heat pumps""",
+    """Unit 5: Case Studies
+    Dr. Smith leads the unit, e.g. sorting networks and hashing, i.e. the practical side. Prof. Rao covers
+    Ch. 3 and Fig. 2 on pp. 40-45 etc. then reviews U.S. case studies with Mr. Lee vs. the class.
+    Readings by J. K. Rowling and A. b. Author are optional. Sec. 4 is approx. two weeks long."""
+]
+
+def test_segmentation_conformance():
+    """Test that fast regex segmentation matches the punkt/TextBlob path on a corpus"""
+    print("\nTesting Segmentation Conformance...")
+    
+    fast = TextProcessor(segmentation='fast')
+    accurate = TextProcessor(segmentation='accurate')
+    
+    try:
+        for index, text in enumerate(SEGMENTATION_CORPUS):
+            fast_doc, accurate_doc = fast.build_document(text), accurate.build_document(text)
+            assert fast_doc.words == accurate_doc.words, f"text {index}: words differ"
+            assert fast_doc.sentences == accurate_doc.sentences, f"text {index}: sentences differ"
+            # Counting without token lists gives the same figures as the full document
+            assert fast.analyze_complexity(text) == accurate.analyze_complexity(text), f"text {index}: complexity differs"
+            assert fast.extract_keywords(text, 10) == accurate.extract_keywords(text, 10)
+            assert fast.extract_sentences(text) == accurate.extract_sentences(text)
+        
+        # A missing abbreviation list is an error, never an empty set
+        import nltk
+        saved, find = nlp_resources._abbreviations, nltk.data.find
+        def find_without_punkt_tab(resource, *args, **kwargs):
+            if resource.startswith('tokenizers/punkt_tab'):
+                raise LookupError(resource)
+            return find(resource, *args, **kwargs)
+        nlp_resources._abbreviations, nltk.data.find = None, find_without_punkt_tab
+        try:
+            nlp_resources.get_abbreviations()
+            assert False, "missing punkt_tab data was not reported"
+        except LookupError:
+            pass
+        finally:
+            nlp_resources._abbreviations, nltk.data.find = saved, find
+        print(f"SUCCESS: Fast segmentation matches the accurate path on {len(SEGMENTATION_CORPUS)} texts!")
+    except AssertionError as e:
+        print(f"FAILED: Segmentation conformance check failed: {e}")
+        raise
+
+def test_request_coalescing():
+    """Test that concurrent identical computations run once and share the result"""
+    print("\nTesting Request Coalescing...")
+    
+    async def scenario():
+        flights = SingleFlight('test')
+        calls = Counter()
+        release = asyncio.Event()
+        
+        async def compute(key):
+            calls[key] += 1
+            await release.wait()
+            if key == 'broken':
+                raise ValueError('boom')
+            return {'key': key}
+        
+        waiters = [asyncio.ensure_future(flights.do(key, lambda key=key: compute(key)))
+                   for key in ['a'] * 5 + ['b', 'broken', 'broken']]
+        await asyncio.sleep(0)
+        # A caller that gives up does not cancel the computation the others wait on
+        waiters[0].cancel()
+        release.set()
+        results = await asyncio.gather(*waiters[1:], return_exceptions=True)
+        assert calls == {'a': 1, 'b': 1, 'broken': 1}
+        assert results[:4] == [({'key': 'a'}, True)] * 4
+        assert results[4] == ({'key': 'b'}, False)
+        assert all(isinstance(result, ValueError) for result in results[5:])
+        assert flights.stats() == {'in_flight': 0, 'computed': 3, 'coalesced': 5}
+        # Once finished, the same key is computed again
+        assert await flights.do('a', lambda: compute('a')) == ({'key': 'a'}, False)
+        assert calls['a'] == 2
+    
+    try:
+        asyncio.run(scenario())
+        print("SUCCESS: Concurrent duplicates share one computation!")
+    except AssertionError as e:
+        print(f"FAILED: Request coalescing check failed: {e}")
+        raise
+
+def test_course_recommendations():
+    """Test item-item course neighbours, incremental refresh and recommendations"""
+    print("\nTesting Course Recommendations...")
+    
+    # Students strong in Calculus are strong in Physics, and the reverse for History/Literature
+    records = []
+    for index, (math, humanities) in enumerate([(10, 4), (9, 5), (8, 6), (5, 9), (4, 10), (6, 8)]):
+        student = f"STU{index}"
+        records += [(student, 'Calculus', math), (student, 'Physics', math - 1),
+                    (student, 'History', humanities), (student, 'Literature', humanities)]
+    records += [('STU9', 'Calculus', 9), ('STU9', 'History', 5)]
+    
+    try:
+        table = build_neighbour_table(GradeMatrix(records), k=2, min_overlap=2)
+        assert table.similar('Calculus')[0][0] == 'Physics'
+        assert table.similar('History')[0][0] == 'Literature'
+        
+        # New grades in one course: the refreshed table equals a full rebuild
+        updated = GradeMatrix(records + [('STU6', 'Physics', 7), ('STU6', 'Chemistry', 8), ('STU7', 'Chemistry', 6)])
+        refreshed, recomputed = refresh_neighbour_table(table, updated)
+        rebuilt = build_neighbour_table(updated, k=2, min_overlap=2)
+        assert refreshed.courses == rebuilt.courses
+        assert (refreshed.neighbours == rebuilt.neighbours).all() and (refreshed.sims == rebuilt.sims).all()
+        assert recomputed < len(rebuilt.courses)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'course_neighbours.bin')
+            table.save(path)
+            engine = SuggestionEngine(course_recommender=CourseRecommender(path))
+            student = {'student_id': 'STU9', 'grades': [{'course': 'Calculus', 'grade': 'A'}, {'course': 'History', 'grade': 'C'}]}
+            recommendations = engine.generate_suggestions(student)['course_recommendations']
+            assert recommendations[0].startswith('Consider Physics:'), recommendations
+            assert len(recommendations) == 4
+        print(f"SUCCESS: Course neighbours refreshed ({recomputed} of {len(rebuilt.courses)} courses recomputed)!")
+    except AssertionError as e:
+        print(f"FAILED: Course recommendation check failed: {e}")
+        raise
+
+def test_course_calendar():
+    """Test that registered calendars resolve course ids to the exam context requests used to carry"""
+    print("\nTesting Course Calendar...")
+    
+    calendar = CourseCalendar(LRUCache(16, 3600))
+    courses = [
+        {'course_id': 'CS101', 'course': 'Data Structures', 'exams': [{'date': '2025-03-20', 'total_marks': 100}, {'date': '2025-05-02', 'total_marks': 100}],
+         'topics': ['Trees', 'Graphs', 'Hashing', 'Heaps'], 'content_summary': 'Focus on Unit 2: Trees.'},
+        {'course_id': 'MA201', 'course': 'Linear Algebra', 'exams': [{'date': '2025-04-03', 'total_marks': 50}], 'topics': [], 'content_summary': None},
+        {'course_id': 'PH110', 'course': 'Physics', 'exams': [{'date': '2025-03-01'}], 'topics': ['Optics']}
+    ]
+    
+    try:
+        calendar.register('Computer Science', courses)
+        now = datetime(2025, 4, 1, tzinfo=timezone.utc)
+        exams, focus = calendar.resolve('Computer Science', ['CS101', 'MA201', 'PH110', 'XX999'], now)
+        # Past exams and unknown ids are skipped; the nearest exam comes first
+        assert [(e['course_id'], e['days_remaining']) for e in exams] == [('MA201', 2), ('CS101', 31)]
+        assert [f['course'] for f in focus] == ['Data Structures']
+        assert calendar.resolve('Mechanical', ['CS101'], now) is None
+        
+        # Exam times count like the backend's own: started exams are gone, the rest round up to whole days
+        calendar.register('Electrical', [{'course_id': 'EE101', 'course': 'Circuits', 'exams': [
+            {'date': '2025-04-01T09:00:00Z'}, {'date': '2025-04-01T21:00:00+00:00'}, {'date': '2025-04-03T09:00:00Z'}]}])
+        evening = datetime(2025, 4, 1, 20, 0, tzinfo=timezone.utc)
+        exams_today, _ = calendar.resolve('Electrical', ['EE101'], evening)
+        assert [(e['date'], e['days_remaining']) for e in exams_today] == [('2025-04-01T21:00:00+00:00', 1)]
+        exams_later, _ = calendar.resolve('Electrical', ['EE101'], datetime(2025, 4, 1, 22, 0, tzinfo=timezone.utc))
+        assert [e['days_remaining'] for e in exams_later] == [2]
+        
+        # Suggestions from resolved ids match those from the lists sent in full
+        engine = SuggestionEngine()
+        student = {'student_id': 'STU1', 'grades': [{'course': 'Data Structures', 'grade': 'B'}], 'attendance': 80}
+        explicit = {**student, 'upcoming_exams': [
+            {'course': 'Data Structures', 'days_remaining': 31, 'total_marks': 100},
+            {'course': 'Linear Algebra', 'days_remaining': 2, 'total_marks': 50}
+        ], 'syllabus_focus_areas': [{'course': 'Data Structures', 'topics': ['Trees', 'Graphs', 'Hashing', 'Heaps'], 'content_summary': 'Focus on Unit 2: Trees.'}]}
+        resolved = {**student, 'upcoming_exams': exams, 'syllabus_focus_areas': focus}
+        assert (engine.generate_suggestions(explicit)['study_recommendations']
+                == engine.generate_suggestions(resolved)['study_recommendations'])
+        
+        # Re-registering replaces the calendar and the worker's index
+        calendar.register('Computer Science', courses[:1])
+        exams, _ = calendar.resolve('Computer Science', ['CS101', 'MA201'], now)
+        assert [e['course_id'] for e in exams] == ['CS101']
+        assert calendar.stats()['rebuilds'] == 3
+        
+        # Over HTTP, a student of an unregistered department fails alone
+        import json
+        stranger = {'student_id': 'STU9', 'department': 'Unregistered', 'course_ids': ['CS101'], 'grades': []}
+        status, _, body = call_service('POST', '/api/get-suggestions/batch', {'students': [student, stranger]})
+        results = json.loads(body)['data']
+        assert status == 200 and [result['success'] for result in results] == [True, False]
+        assert 'Unregistered' in results[1]['error']
+        status, _, body = call_service('POST', '/api/cohort-analytics', {'students': [student, stranger]})
+        assert status == 200 and json.loads(body)['data']['summary']['students'] == 2
+        assert call_service('POST', '/api/get-suggestions', stranger)[0] == 404
+        print("SUCCESS: Course ids resolve to exams and syllabus focus!")
+    except AssertionError as e:
+        print(f"FAILED: Course calendar check failed: {e}")
+        raise
+
+def test_near_duplicates():
+    """Test that near-duplicate syllabi are matched and rebuilt from the matched version's units"""
+    print("\nTesting Near-Duplicate Syllabi...")
+    
+    topics = ['Sorting algorithms', 'Hash tables', 'Binary search trees', 'Graph traversal', 'Dynamic programming', 'Greedy methods']
+    lines = ["Data Structures and Algorithms, Section A, Spring 2024", "Midterm exam on 2024-03-14, final exam on 2024-05-09"]
+    for number, topic in enumerate(topics, 1):
+        lines.append(f"Unit {number}: {topic}")
+        lines.extend(f"- {topic} lecture {part}: definitions, worked examples and complexity analysis" for part in ('one', 'two', 'three'))
+    original = "\n".join(lines)
+    # Another section: new dates, wider spacing and one extra bullet in unit 4
+    variant = (original.replace("2024-03-14", "2025-03-20").replace("2024-05-09", "2025-05-15").replace(", ", ",  ")
+               .replace("Unit 5:", "- Graph traversal lab on shortest paths\nUnit 5:"))
+    unrelated = "\n".join(f"Unit {n}: Organic chemistry module {n}\n- Reaction mechanisms and lab safety for part {n}" for n in range(1, 7))
+    
+    try:
+        generator = MindmapGenerator()
+        incremental = IncrementalMindmapGenerator(generator, MindmapVersionStore(ResultCache(LRUCache())))
+        index = NearDuplicateIndex()
+        first = incremental.generate(original, include_graph=True)
+        index.add(first['version_id'], index.signature(original))
+        
+        version_id, similarity = index.query(index.signature(variant))
+        assert version_id == first['version_id'] and similarity >= index.threshold
+        assert index.query(index.signature(unrelated)) is None
+        assert index.query(index.signature("!!! ... ???")) is None
+        
+        # Only the overview (new dates) and the edited unit are reparsed; the result matches a fresh mindmap
+        reused = incremental.generate(variant, version_id, include_graph=True)
+        fresh = generator.generate_mindmap(variant)
+        assert reused['units']['reparsed'] == 2 and reused['units']['reused'] == len(topics) - 1
+        assert [n['label'] for n in reused['mindmap']['nodes']] == [n['label'] for n in fresh['mindmap']['nodes']]
+        assert reused['analysis']['keywords'] == fresh['analysis']['keywords']
+        # Sentences are counted per unit, as in the chunked path
+        for field in ('complexity_level', 'total_words', 'avg_word_length'):
+            assert reused['analysis']['complexity'][field] == fresh['analysis']['complexity'][field]
+        assert reused['suggestions'] == fresh['suggestions']
+        
+        # Capacity bounds the index
+        small = NearDuplicateIndex(capacity=1)
+        small.add('a', small.signature(original))
+        small.add('b', small.signature(unrelated))
+        assert small.query(small.signature(original)) is None and small.stats()['entries'] == 1
+        
+        # The service path: a miss is served by the regular generator and indexed in the background
+        saved = (tasks._mindmap_generator, tasks._incremental_generator, tasks._near_duplicate_index,
+                 config.MINDMAP_NEAR_DUPLICATES)
+        config.MINDMAP_NEAR_DUPLICATES = True
+        tasks._mindmap_generator = generator
+        tasks._incremental_generator = IncrementalMindmapGenerator(generator, MindmapVersionStore(ResultCache(LRUCache())))
+        tasks._near_duplicate_index = NearDuplicateIndex()
+        try:
+            miss = tasks.generate_mindmap_deduplicated(original)
+            assert miss.pop('near_duplicate') is None and miss == generator.generate_mindmap(original)
+            # The index was empty, so the signature is computed with the background record
+            assert tasks._near_duplicate_index.stats()['queries'] == 0
+            tasks._version_recorder.submit(lambda: None).result()  # wait for the background record
+            assert len(tasks._near_duplicate_index) == 1
+            hit = tasks.generate_mindmap_deduplicated(variant)['near_duplicate']
+            assert hit['reused_units'] == len(topics) - 1 and hit['similarity'] >= 0.8
+        finally:
+            (tasks._mindmap_generator, tasks._incremental_generator, tasks._near_duplicate_index,
+             config.MINDMAP_NEAR_DUPLICATES) = saved
+        print("SUCCESS: Near-duplicate syllabi reuse the matched units!")
+    except AssertionError as e:
+        print(f"FAILED: Near-duplicate check failed: {e}")
+        raise
+
+def test_profiling():
+    """Test that sampled and slow tasks are profiled into flame-graph formats and fast ones skipped"""
+    print("\nTesting Profiling...")
+    
+    text = "Unit 1: Sorting\n- Merge sort and quick sort compared on large inputs.\n" * 2000
+    generator = MindmapGenerator()
+    
+    try:
+        # Every task sampled with cProfile: the capture loads as a pstats file
+        sampled = Profiler(enabled=True, sample_rate=1.0, mode='cprofile')
+        task = sampled.submission(generator.generate_mindmap, (text,))
+        result, capture = task(text)
+        assert capture is None and result['mindmap']['nodes']
+        entry = sampled.profiles()[0]
+        assert entry['reason'] == 'sampled' and entry['kind'] == 'cprofile' and entry['input_size'] == len(text)
+        with tempfile.NamedTemporaryFile(suffix='.prof', delete=False) as handle:
+            handle.write(pstats_bytes(sampled.get(entry['id'])['data']))
+        try:
+            functions = {name for _, _, name in pstats.Stats(handle.name).stats}
+        finally:
+            os.unlink(handle.name)
+        assert 'generate_mindmap' in functions
+        
+        # Slow capture keeps stack samples of slow tasks only, rooted at the task function
+        slow = Profiler(enabled=True, slow_threshold_ms=20, interval=0.001)
+        slow.submission(len, (text,))(text)
+        assert slow.profiles() == []
+        slow.submission(generator.generate_mindmap, (text,))(text)
+        entry = slow.profiles()[0]
+        assert entry['reason'] == 'slow' and entry['kind'] == 'stacks' and entry['samples'] > 0
+        lines = folded_stacks(slow.get(entry['id'])['data']).splitlines()
+        assert all(line.startswith('generate_mindmap (') and line.rsplit(' ', 1)[1].isdigit() for line in lines)
+        
+        # A task sent to a process pool returns its capture for the submitter to record
+        detached = pickle.loads(pickle.dumps(slow.submission(len, (text,))))
+        assert detached.profiler is None and detached(text)[1]['kind'] == 'stacks'
+        assert Profiler(enabled=False, sample_rate=1.0).submission(len, (text,)) is None
+        print("SUCCESS: Profiles captured in flame-graph formats!")
+    except AssertionError as e:
+        print(f"FAILED: Profiling check failed: {e}")
+        raise
+
+def test_readiness_modes():
+    """Test that /ready follows each AI_NLP_PRELOAD mode"""
+    print("\nTesting Readiness Modes...")
+    
+    import main
+    saved = (config.NLP_PRELOAD, nlp_resources._ready, nlp_resources._stop_words)
+    
+    def unload():
+        nlp_resources._ready, nlp_resources._stop_words = False, None
+    
+    try:
+        # Preloading modes report warming up until the warm-up has run
+        for mode in ('import', 'background'):
+            config.NLP_PRELOAD = mode
+            unload()
+            status, _, body = call_service('GET', '/ready')
+            assert status == 503 and b'warming_up' in body, mode
+            asyncio.run(main.warm_up_in_background())
+            assert call_service('GET', '/ready')[0] == 200, mode
+        
+        # Lazy mode is ready from the start; first use of the resources marks them loaded
+        config.NLP_PRELOAD = 'lazy'
+        unload()
+        status, _, body = call_service('GET', '/ready')
+        assert status == 200 and b'"ready":false' in body.replace(b' ', b'')
+        assert call_service('POST', '/api/generate-mindmap', {'syllabus_text': "Unit 1: Readiness\n- Loaded on first use."})[0] == 200
+        assert nlp_resources.is_ready()
+        print("SUCCESS: Readiness follows the preload mode!")
+    except AssertionError as e:
+        print(f"FAILED: Readiness check failed: {e}")
+        raise
+    finally:
+        config.NLP_PRELOAD, nlp_resources._ready, nlp_resources._stop_words = saved
+
+def test_graph_backends():
+    """Test that the native tree and the networkx graph build identical mindmaps"""
+    print("\nTesting Graph Backend Equivalence...")
+    
+    native = MindmapGenerator(graph_backend='native')
+    graph = MindmapGenerator(graph_backend='networkx')
+    nested = "\n".join(
+        f"Unit {unit}: Topic {unit}\n" + "".join(f"{item}. Item {unit}.{item}\n- Point a\n- Point b\n" for item in (1, 2))
+        for unit in range(1, 6)
+    )
+    
+    try:
+        for index, text in enumerate(SEGMENTATION_CORPUS + [nested, "", "No structure at all"]):
+            native_result, graph_result = native.generate_mindmap(text), graph.generate_mindmap(text)
+            assert native_result['mindmap'] == graph_result['mindmap'], f"text {index}: mindmaps differ"
+            assert native_result == graph_result, f"text {index}: results differ"
+        # Bullets hang below the numbered item above them, so edges are grouped by a non-unit source
+        edges = native.generate_mindmap(nested)['mindmap']['edges']
+        assert {'source': 'unit_1_sub_4', 'target': 'unit_1_sub_5'} in edges
+        print("SUCCESS: Native and networkx backends build the same mindmaps!")
+    except AssertionError as e:
+        print(f"FAILED: Graph backend equivalence check failed: {e}")
+        raise
+
+def test_mindmap_stream():
+    """Test that the NDJSON stream carries the same graph as the full mindmap"""
+    print("\nTesting Mindmap Stream...")
+    
+    import json
+    text = SEGMENTATION_CORPUS[1] + "\nUnit 2: Graphs\n1. Traversal\n- BFS and DFS\n- Topological order\n"
+    
+    try:
+        status, headers, body = call_service('POST', '/api/generate-mindmap/stream',
+                                             {'syllabus_text': text, 'course_name': 'Algorithms'})
+        assert status == 200 and headers['content-type'].startswith('application/x-ndjson')
+        assert body.endswith(b'\n')
+        chunks = [json.loads(line) for line in body.splitlines()]
+        assert chunks[0]['type'] == 'root' and chunks[-1]['type'] == 'summary'
+        units = chunks[1:-1]
+        assert units and all(chunk['type'] == 'unit' for chunk in units)
+        
+        # Root plus unit chunks add up to the regular mindmap (edges come per unit, not grouped by source)
+        full = MindmapGenerator().generate_mindmap(text)
+        assert chunks[0]['nodes'] + [node for chunk in units for node in chunk['nodes']] == full['mindmap']['nodes']
+        edge_key = lambda edge: (edge['source'], edge['target'])
+        assert sorted((edge for chunk in units for edge in chunk['edges']), key=edge_key) == sorted(full['mindmap']['edges'], key=edge_key)
+        summary = chunks[-1]
+        assert summary['mindmap']['metadata']['total_nodes'] == len(full['mindmap']['nodes'])
+        assert summary['analysis']['keywords'] == full['analysis']['keywords'][:10]
+        assert summary['metadata']['course_name'] == 'Algorithms'
+        
+        # Errors after the headers are sent arrive as a final in-band chunk
+        error = json.loads(list(tasks.generate_mindmap_ndjson(None))[-1])
+        assert error['type'] == 'error' and error['message'].startswith('Error generating mindmap')
+        assert call_service('POST', '/api/generate-mindmap/stream', {'syllabus_text': 'short'})[0] == 400
+        print(f"SUCCESS: Stream carried {len(units)} units and a summary!")
+    except AssertionError as e:
+        print(f"FAILED: Mindmap stream check failed: {e}")
+        raise
+
+def test_metrics():
+    """Test stage metrics, the Prometheus exposition and the Server-Timing header"""
+    print("\nTesting Metrics...")
+    
+    import re
+    sample = re.compile(r'^[a-z_]+(\{[^}]*\})? [-+0-9.e]+$|^[a-z_]+(\{[^}]*\})? [0-9]+$')
+    
+    try:
+        registry = MetricsRegistry()
+        with registry.stage('demo.parse', size=5000):
+            pass
+        try:
+            with registry.stage('demo.parse'):
+                raise ValueError("bad input")
+        except ValueError:
+            pass
+        text = registry.render_prometheus()
+        assert 'ai_stage_duration_seconds_count{stage="demo.parse"} 2' in text
+        assert 'ai_stage_input_size_bucket{stage="demo.parse",le="10000"} 1' in text
+        assert 'ai_stage_errors_total{stage="demo.parse"} 1' in text
+        assert MetricsRegistry(enabled=False).stage('demo.parse').__class__.__name__ == 'nullcontext'
+        
+        # Server-Timing only when asked for, with the stages the request ran
+        payload = {'syllabus_text': "Unit 1: Metrics\n- Stage timings for a fresh syllabus " + str(time.time())}
+        status, headers, _ = call_service('POST', '/api/generate-mindmap', payload, {'X-Request-Timing': '1'})
+        assert status == 200 and 'mindmap_extract_topics;dur=' in headers['server-timing']
+        assert 'server-timing' not in call_service('POST', '/api/generate-mindmap', payload)[1]
+        
+        status, headers, body = call_service('GET', '/metrics')
+        lines = body.decode().splitlines()
+        assert status == 200 and headers['content-type'].startswith('text/plain; version=0.0.4')
+        assert all(sample.match(line) for line in lines if not line.startswith('#')), "malformed sample line"
+        assert any(line.startswith('ai_stage_duration_seconds_bucket{stage="mindmap.extract_topics",le="+Inf"}') for line in lines)
+        # The repeated syllabus above was served from the cache
+        hits = next(line for line in lines if line.startswith('ai_cache_hits_total{cache="mindmap"}'))
+        assert int(hits.rsplit(' ', 1)[1]) >= 1
+        assert any(line.startswith('ai_executor_pending{executor="mindmap"}') for line in lines)
+        print(f"SUCCESS: /metrics exposes {sum(1 for line in lines if not line.startswith('#'))} samples!")
+    except AssertionError as e:
+        print(f"FAILED: Metrics check failed: {e}")
+        raise
+
+def test_response_encoding():
+    """Test the compact mindmap format and brotli/gzip negotiation over HTTP"""
+    print("\nTesting Response Encoding...")
+    
+    import gzip
+    import json
+    from app import responses
+    preferred = 'br' if responses.brotli is not None else 'gzip'
+    text = "\n".join(f"Unit {unit}: Topic {unit}\n1. Item {unit}\n- Point a\n- Point b" for unit in range(1, 40))
+    
+    try:
+        assert negotiate_encoding('gzip, deflate') == 'gzip'
+        assert negotiate_encoding('br;q=0.5, gzip') == 'gzip'
+        assert negotiate_encoding('br, gzip') == preferred and negotiate_encoding('*') == preferred
+        assert negotiate_encoding('identity') is None and negotiate_encoding('gzip;q=0') is None
+        
+        # The compact format expands back to the full graph and is smaller
+        _, _, full_body = call_service('POST', '/api/generate-mindmap', {'syllabus_text': text})
+        status, _, compact_body = call_service('POST', '/api/generate-mindmap?format=compact', {'syllabus_text': text})
+        full, compact = json.loads(full_body)['data'], json.loads(compact_body)['data']
+        assert status == 200 and len(compact_body) < len(full_body)
+        # The endpoint returns its response directly, so check both formats against the declared models
+        import main
+        main.MindmapResponse.model_validate_json(full_body)
+        main.CompactMindmapResponse.model_validate_json(compact_body)
+        assert expand_mindmap(compact) == {'nodes': full['mindmap']['nodes'], 'edges': full['mindmap']['edges']}
+        assert call_service('POST', '/api/generate-mindmap?format=xml', {'syllabus_text': text})[0] == 400
+        
+        # Compressed bodies decode to the same result (now served from the cache)
+        status, headers, body = call_service('POST', '/api/generate-mindmap', {'syllabus_text': text},
+                                             {'Accept-Encoding': 'gzip'})
+        assert headers['content-encoding'] == 'gzip' and 'Accept-Encoding' in headers['vary']
+        assert int(headers['content-length']) == len(body)
+        assert json.loads(gzip.decompress(body))['data']['mindmap'] == full['mindmap']
+        if responses.brotli is not None:
+            _, headers, body = call_service('POST', '/api/generate-mindmap', {'syllabus_text': text},
+                                            {'Accept-Encoding': 'br, gzip'})
+            assert headers['content-encoding'] == 'br'
+            assert json.loads(responses.brotli.decompress(body))['data']['mindmap'] == full['mindmap']
+        
+        # Large bodies are compressed on a worker thread, with the same result
+        async def large_body(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': [(b'content-type', b'application/json')]})
+            await send({'type': 'http.response.body', 'body': full_body})
+        
+        async def compress_offloaded():
+            sent = []
+            async def collect(message):
+                sent.append(message)
+            scope = {'type': 'http', 'headers': [(b'accept-encoding', b'gzip')]}
+            await responses.CompressionMiddleware(large_body, offload_size=1)(scope, None, collect)
+            return sent[-1]['body']
+        assert gzip.decompress(asyncio.run(compress_offloaded())) == full_body
+        
+        # Small and streaming responses pass through uncompressed
+        assert 'content-encoding' not in call_service('GET', '/health', headers={'Accept-Encoding': 'gzip'})[1]
+        _, headers, body = call_service('POST', '/api/generate-mindmap/stream', {'syllabus_text': text},
+                                        {'Accept-Encoding': 'gzip'})
+        assert 'content-encoding' not in headers and body.startswith(b'{')
+        print(f"SUCCESS: Compact format is {len(compact_body) / len(full_body):.0%} of full; compression negotiated!")
+    except AssertionError as e:
+        print(f"FAILED: Response encoding check failed: {e}")
+        raise
+
+def test_request_limits():
+    """Test the 413 responses for oversized bodies, syllabi, batches and jobs"""
+    print("\nTesting Request Limits...")
+    
+    async def post(app, chunks, declared=None):
+        """Send a body in chunks through app; returns (status, body the inner app received)"""
+        messages = [{'type': 'http.request', 'body': chunk, 'more_body': index < len(chunks) - 1}
+                    for index, chunk in enumerate(chunks)]
+        headers = [(b'content-length', str(declared).encode())] if declared is not None else []
+        scope = {'type': 'http', 'method': 'POST', 'path': '/', 'headers': headers}
+        received = []
+        status = []
+        
+        async def inner(scope, receive, send):
+            message = await receive()
+            received.append(message['body'])
+            await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b''})
+        
+        async def receive():
+            return messages.pop(0) if messages else {'type': 'http.disconnect'}
+        
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+        
+        await BodySizeLimitMiddleware(inner, max_bytes=16)(scope, receive, send)
+        return status[0], received
+    
+    saved = (config.MAX_SYLLABUS_CHARS, config.SUGGESTION_BATCH_LIMIT, config.MINDMAP_JOB_LIMIT)
+    try:
+        # A declared length over the limit is refused before the body is read
+        assert asyncio.run(post(None, [b'x' * 32], declared=32)) == (413, [])
+        # Without one, the body is read until it passes the limit
+        assert asyncio.run(post(None, [b'x' * 10, b'x' * 10])) == (413, [])
+        assert asyncio.run(post(None, [b'{"a":', b' 1}'])) == (200, [b'{"a": 1}'])
+        
+        config.MAX_SYLLABUS_CHARS, config.SUGGESTION_BATCH_LIMIT, config.MINDMAP_JOB_LIMIT = 100, 2, 1
+        long_text = {'syllabus_text': "Unit 1: Limits\n" + "- point\n" * 20}
+        students = [{'student_id': f"LIM{i}", 'attendance': 80} for i in range(3)]
+        for path, payload in (('/api/generate-mindmap', long_text),
+                              ('/api/generate-mindmap/stream', long_text),
+                              ('/api/generate-mindmap/incremental', long_text),
+                              ('/api/get-suggestions/batch', {'students': students}),
+                              ('/api/cohort-analytics', {'students': students}),
+                              ('/api/generate-mindmap/jobs', {'syllabi': [long_text, long_text]})):
+            status, _, body = call_service('POST', path, payload)
+            assert status == 413, f"{path} answered {status}"
+            assert b'limit' in body, path
+        # One syllabus over the character limit fails the whole job before anything is queued
+        status, _, body = call_service('POST', '/api/generate-mindmap/jobs', {'syllabi': [long_text]})
+        assert status == 413 and b'Syllabus 0' in body
+        print("SUCCESS: Oversized requests are rejected with 413!")
+    except AssertionError as e:
+        print(f"FAILED: Request limit check failed: {e}")
+        raise
+    finally:
+        config.MAX_SYLLABUS_CHARS, config.SUGGESTION_BATCH_LIMIT, config.MINDMAP_JOB_LIMIT = saved
+
+def test_prefork_server():
+    """Test that serve.py's pre-forked workers share the cache, recycle on SIGHUP and stop on SIGTERM"""
+    print("\nTesting Pre-fork Server...")
+    
+    import json
+    import signal
+    import socket
+    import urllib.request
+    if not hasattr(os, 'fork') or not os.path.exists('/proc'):
+        print("SKIPPED: needs os.fork and /proc")
+        return
+    
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    url = f"http://127.0.0.1:{port}"
+    
+    def workers(pid):
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return set(map(int, f.read().split()))
+    
+    def request(path, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(url + path, data=data, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=10) as response:
+            return json.loads(response.read())
+    
+    def wait_until(check, timeout=30.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                if check():
+                    return True
+            except OSError:
+                pass
+            time.sleep(0.1)
+        return False
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, AI_MINDMAP_CACHE_PATH=os.path.join(tmp, 'cache.sqlite3'),
+                   AI_MINDMAP_JOB_PATH=os.path.join(tmp, 'jobs.sqlite3'), AI_KEYWORD_INDEX_PATH='',
+                   AI_WORKER_GRACEFUL_TIMEOUT='5')
+        server = subprocess.Popen([sys.executable, 'serve.py', '--workers', '2', '--host', '127.0.0.1',
+                                   '--port', str(port), '--log-level', 'warning'],
+                                  cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            assert wait_until(lambda: len(workers(server.pid)) == 2 and request('/ready')['status'] == 'ready')
+            
+            # The first response is computed; every later one is found in the shared SQLite cache,
+            # whichever worker serves it
+            payload = {'syllabus_text': "Unit 1: Pre-fork\n- Workers share one result store"}
+            assert request('/api/generate-mindmap', payload)['cached'] is False
+            assert all(request('/api/generate-mindmap', payload)['cached'] for _ in range(6))
+            
+            # SIGHUP replaces every worker while the service keeps answering
+            before = workers(server.pid)
+            server.send_signal(signal.SIGHUP)
+            assert wait_until(lambda: len(workers(server.pid)) == 2 and not workers(server.pid) & before), \
+                "workers were not recycled"
+            assert wait_until(lambda: request('/api/generate-mindmap', payload)['cached'])
+            
+            server.send_signal(signal.SIGTERM)
+            assert server.wait(timeout=15) == 0
+            print("SUCCESS: Pre-forked workers share the cache and recycle gracefully!")
+        except AssertionError as e:
+            print(f"FAILED: Pre-fork server check failed: {e}")
+            raise
+        finally:
+            if server.poll() is None:
+                server.kill()
+                server.wait()
+
+def test_work_executor():
+    """Test that a full executor rejects work (503) and a slow task times out (504)"""
+    print("\nTesting Work Executor Limits...")
+    
+    import main
+    release = threading.Event()
+    
+    class BlockedEngine:
+        def generate_suggestions(self, student_data, seed=None):
+            release.wait(5)
+            return {}
+    
+    async def exercise(executor):
+        slow = asyncio.ensure_future(executor.run(release.wait, 5))
+        await asyncio.sleep(0)
+        try:
+            await executor.run(len, 'queued')
+            raise AssertionError("a full executor accepted a task")
+        except ExecutorSaturatedError:
+            pass
+        try:
+            await slow
+            raise AssertionError("a slow task did not time out")
+        except ExecutorTimeoutError:
+            pass
+        # The timed-out task keeps its slot until it really finishes
+        assert executor.stats()['pending'] == 1
+        release.set()
+        while executor.stats()['pending']:
+            await asyncio.sleep(0.01)
+        assert await executor.run(len, 'free') == 4
+        return executor.stats()
+    
+    executor = WorkExecutor('test', max_workers=1, queue_size=0, timeout=0.05)
+    saved = (main.suggestion_executor, tasks._suggestion_engine)
+    try:
+        stats = asyncio.run(exercise(executor))
+        assert stats['rejected'] == 1 and stats['timed_out'] == 1
+        
+        # Over HTTP: the timed-out request is a 504, and the next one finds the pool full (503)
+        release.clear()
+        main.suggestion_executor = WorkExecutor('test-http', max_workers=1, queue_size=0, timeout=0.05)
+        tasks._suggestion_engine = BlockedEngine()
+        status, _, _ = call_service('POST', '/api/get-suggestions', {'student_id': 'SLOW01', 'attendance': 75})
+        assert status == 504
+        status, headers, _ = call_service('POST', '/api/get-suggestions', {'student_id': 'SLOW02', 'attendance': 75})
+        assert status == 503 and headers['retry-after'] == '1'
+        print("SUCCESS: Executor limits map to 503 and 504!")
+    except AssertionError as e:
+        print(f"FAILED: Executor limits check failed: {e}")
+        raise
+    finally:
+        release.set()
+        main.suggestion_executor.shutdown()
+        executor.shutdown()
+        main.suggestion_executor, tasks._suggestion_engine = saved
+
+# Run by main() in this order
+TESTS = [
+    test_mindmap_generation,
+    test_suggestion_engine,
+    test_result_cache,
+    test_suggestion_snapshots,
+    test_cohort_analytics,
+    test_batch_suggestions_http,
+    test_keyword_index,
+    test_incremental_mindmap,
+    test_mindmap_jobs,
+    test_segmentation_conformance,
+    test_request_coalescing,
+    test_course_recommendations,
+    test_course_calendar,
+    test_near_duplicates,
+    test_profiling,
+    test_readiness_modes,
+    test_work_executor,
+    test_graph_backends,
+    test_mindmap_stream,
+    test_metrics,
+    test_response_encoding,
+    test_request_limits,
+    test_prefork_server,
+]
+
+
+def run_test(test) -> bool:
+    """Run one test for the script summary; the test has already printed why it failed"""
+    try:
+        test()
+    except Exception:
         return False
+    return True
+
 
 def main():
     """Run all tests"""
     print("Testing Academic AI Service Components\n")
     
-    tests_passed = 0
-    total_tests = 2
-    
-    if test_mindmap_generation():
-        tests_passed += 1
-    
-    if test_suggestion_engine():
-        tests_passed += 1
+    tests_passed = sum(1 for test in TESTS if run_test(test))
+    total_tests = len(TESTS)
     
     print(f"\nTest Results: {tests_passed}/{total_tests} tests passed")
     